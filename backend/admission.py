@@ -0,0 +1,183 @@
+import threading
+import time
+from collections import Counter, deque
+
+# Kinds of AI-heavy work the controller bounds
+ADMISSION_START = "start"
+ADMISSION_ROUND = "round"
+
+
+class AdmissionTicket:
+    """A room's place in line for one piece of AI-heavy work"""
+
+    def __init__(self, kind, room_id, start, on_wait=None, max_wait=None):
+        self.kind = kind
+        self.room_id = room_id
+        self.key = (kind, room_id)
+        self.start = start
+        self.on_wait = on_wait
+        self.enqueued_at = time.monotonic()
+        self.deadline = None if max_wait is None else self.enqueued_at + max_wait
+        self.granted_at = None
+        self.began_at = None
+        self.position = None
+        self.notified_at = 0.0
+        self.granted = False
+        self.timed_out = False
+        self.released = False
+        self.shed = False
+
+    @property
+    def wait_seconds(self):
+        """Time from queueing until the work began running (or until now)"""
+        return (self.began_at or time.monotonic()) - self.enqueued_at
+
+
+class AdmissionController:
+    """Bounds how many game starts and rounds call the AI at once in this process.
+
+    Nothing blocks: `request()` queues a ticket and returns, and the
+    ticket's `start(ticket)` callback is called once a slot is free (or with
+    `timed_out` set when `max_wait` runs out first). Rooms are admitted in
+    arrival order per kind, and a room has at most one ticket per kind.
+    Waiting rooms get `on_wait(position, eta_seconds)` when their position
+    changes and on every `tick()`. The admitted work calls `begin(ticket)`
+    when it actually runs and `release(ticket)` when done; a round that
+    waited longer than `shed_wait_seconds` in total is marked `shed` so the
+    caller can switch to cheaper local work.
+    """
+
+    def __init__(self, limits, shed_wait_seconds=20, update_seconds=2, initial_seconds=None):
+        self.limits = {kind: max(1, limit) for kind, limit in limits.items()}
+        self.shed_wait_seconds = shed_wait_seconds
+        self.update_seconds = update_seconds
+        self.waiting = {kind: deque() for kind in self.limits}
+        self.running = Counter()
+        self.tickets = {}
+        # Moving average of how long admitted work holds its slot, for ETAs
+        self.durations = {kind: (initial_seconds or {}).get(kind, 10.0) for kind in self.limits}
+        self.last_wait = Counter()
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def request(self, kind, room_id, start, on_wait=None, max_wait=None, key=None):
+        """Queue work for a room; returns the ticket, or None if a ticket for the same
+        `key` (default: the room) and kind is already queued or running"""
+        with self.lock:
+            if (kind, key or room_id) in self.tickets:
+                self.stats[f"{kind}_duplicate"] += 1
+                return None
+            ticket = AdmissionTicket(kind, room_id, start, on_wait, max_wait)
+            ticket.key = (kind, key or room_id)
+            self.tickets[ticket.key] = ticket
+            self.waiting[kind].append(ticket)
+            self.stats[f"{kind}_queued"] += 1
+        self._dispatch(kind)
+        return ticket
+
+    def begin(self, ticket):
+        """Mark admitted work as running; False if the room was cancelled meanwhile"""
+        with self.lock:
+            if ticket.released:
+                return False
+            ticket.began_at = time.monotonic()
+            ticket.shed = ticket.granted and ticket.wait_seconds > self.shed_wait_seconds
+            self.last_wait[ticket.kind] = ticket.wait_seconds
+            if ticket.shed:
+                self.stats[f"{ticket.kind}_shed"] += 1
+            return True
+
+    def release(self, ticket):
+        """Free the ticket's slot (if it got one); safe to call more than once"""
+        with self.lock:
+            if not self._release(ticket):
+                return
+        self._dispatch(ticket.kind)
+
+    def cancel_room(self, room_id):
+        """Drop a room's waiting tickets and free slots it was granted but has not begun using"""
+        kinds = []
+        with self.lock:
+            for kind, queue in self.waiting.items():
+                for ticket in [ticket for ticket in queue if ticket.room_id == room_id]:
+                    queue.remove(ticket)
+                    self._release(ticket)
+                    self.stats[f"{kind}_cancelled"] += 1
+            for ticket in list(self.tickets.values()):
+                if ticket.room_id == room_id and ticket.began_at is None:
+                    self._release(ticket)
+                    kinds.append(ticket.kind)
+        for kind in kinds:
+            self._dispatch(kind)
+
+    def tick(self):
+        """Expire tickets past `max_wait` and resend positions; returns True while rooms are waiting"""
+        for kind in self.limits:
+            self._dispatch(kind, refresh=True)
+        with self.lock:
+            return any(self.waiting.values())
+
+    def shedding(self, kind):
+        """True while rooms of this kind wait (or recently waited) past the shed threshold"""
+        with self.lock:
+            queue = self.waiting[kind]
+            oldest = time.monotonic() - queue[0].enqueued_at if queue else 0.0
+            return max(oldest, self.last_wait[kind]) > self.shed_wait_seconds
+
+    def _release(self, ticket):
+        if ticket.released:
+            return False
+        ticket.released = True
+        if self.tickets.get(ticket.key) is ticket:
+            del self.tickets[ticket.key]
+        if ticket.granted:
+            self.running[ticket.kind] -= 1
+            if ticket.began_at is not None:
+                held = time.monotonic() - ticket.began_at
+                self.durations[ticket.kind] = 0.8 * self.durations[ticket.kind] + 0.2 * held
+        return True
+
+    def _dispatch(self, kind, refresh=False):
+        """Admit what fits, expire what waited too long, then run callbacks outside the lock"""
+        starts = []
+        notices = []
+        now = time.monotonic()
+        with self.lock:
+            queue = self.waiting[kind]
+            while queue and self.running[kind] < self.limits[kind]:
+                ticket = queue.popleft()
+                ticket.granted = True
+                ticket.granted_at = now
+                self.running[kind] += 1
+                self.stats[f"{kind}_admitted"] += 1
+                starts.append(ticket)
+            for ticket in [ticket for ticket in queue if ticket.deadline is not None and now >= ticket.deadline]:
+                # Runs without a slot; the caller does something cheaper instead
+                queue.remove(ticket)
+                ticket.timed_out = True
+                self.stats[f"{kind}_timed_out"] += 1
+                starts.append(ticket)
+            for position, ticket in enumerate(queue, start=1):
+                due = refresh and now - ticket.notified_at >= self.update_seconds
+                if ticket.on_wait and (position != ticket.position or due):
+                    ticket.position = position
+                    ticket.notified_at = now
+                    notices.append((ticket.on_wait, position, self._eta(kind, position)))
+        for ticket in starts:
+            ticket.start(ticket)
+        for on_wait, position, eta in notices:
+            on_wait(position, eta)
+
+    def _eta(self, kind, position):
+        """Seconds until the ticket at `position` is admitted, if slots keep freeing at the average pace"""
+        batches = (position + self.limits[kind] - 1) // self.limits[kind]
+        return round(batches * self.durations[kind], 1)
+
+    def get_stats(self):
+        with self.lock:
+            return dict(
+                self.stats,
+                **{f"{kind}_running": self.running[kind] for kind in self.limits},
+                **{f"{kind}_waiting": len(queue) for kind, queue in self.waiting.items()},
+                **{f"{kind}_average_seconds": round(seconds, 2) for kind, seconds in self.durations.items()}
+            )
@@ -3,7 +3,14 @@ import json
 import time
 import requests
 from config import Config
-from prompts import get_prompt, SUSTAINABILITY_THEMES
+from prompts import SUSTAINABILITY_THEMES
+from prompt_builder import PromptBuilder, estimate_tokens
+from rate_limiter import RateLimiter, RequestQueue, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from circuit_breaker import CircuitBreaker
+from fallback import StoryGenerator
+from scoring import HeuristicScorer
+from ai_metrics import AICallRecorder
+from retry_policy import RetryPolicy, parse_retry_after
 
 class AIEngine:
     def __init__(self):
@@ -14,6 +21,45 @@ class AIEngine:
         self.base_url = self._get_base_url()
         self.timeout = self.config.AI_TIMEOUT
         self.max_retries = self.config.AI_MAX_RETRIES
+        self.retry_policy = RetryPolicy(
+            max_attempts=self.max_retries,
+            base_delay=self.config.AI_RETRY_BASE_DELAY,
+            max_delay=self.config.AI_RETRY_MAX_DELAY,
+            attempt_timeout=self.timeout,
+            min_attempt_timeout=self.config.AI_MIN_ATTEMPT_TIMEOUT,
+            default_budget=self.config.AI_CALL_DEADLINE_SECONDS
+        )
+        requests_per_minute, tokens_per_minute = self._get_rate_limits()
+        self.rate_limiter = RateLimiter(
+            self.provider,
+            requests_per_minute,
+            tokens_per_minute,
+            backend=self.config.AI_RATE_LIMIT_BACKEND.lower()
+        )
+        self.request_queue = RequestQueue(self.rate_limiter, self.config.AI_MAX_CONCURRENT_REQUESTS)
+        self.circuit_breaker = CircuitBreaker(
+            failure_rate=self.config.AI_BREAKER_FAILURE_RATE,
+            min_calls=self.config.AI_BREAKER_MIN_CALLS,
+            window_size=self.config.AI_BREAKER_WINDOW_SIZE,
+            slow_call_seconds=self.config.AI_BREAKER_SLOW_CALL_SECONDS,
+            reset_timeout=self.config.AI_BREAKER_RESET_TIMEOUT,
+            half_open_max_calls=self.config.AI_BREAKER_HALF_OPEN_CALLS
+        )
+        self.local_fallback = self.config.AI_LOCAL_FALLBACK
+        self.local_scorer = HeuristicScorer.from_calibration_file(self.config.SCORING_CALIBRATION_PATH)
+        self.story_generator = StoryGenerator(self.local_scorer)
+        self.prompt_builder = PromptBuilder(
+            self.config.AI_PROMPT_BUDGETS,
+            decision_max_tokens=self.config.AI_DECISION_MAX_TOKENS,
+            summary_max_tokens=self.config.AI_SUMMARY_MAX_TOKENS
+        )
+        self.call_recorder = AICallRecorder(
+            self.provider,
+            self.model,
+            slow_call_seconds=self.config.AI_SLOW_CALL_SECONDS,
+            slow_sample_rate=self.config.AI_SLOW_PROMPT_SAMPLE_RATE,
+            slow_dump_dir=self.config.AI_SLOW_PROMPT_DIR or None
+        )
 
     def _get_api_key(self):
         """Get API key based on provider"""
@@ -64,36 +110,154 @@ class AIEngine:
         else:
             raise ValueError(f"Unsupported AI provider: {self.provider}")
 
-    def _make_ai_request(self, prompt, response_format=None):
+    def _get_rate_limits(self):
+        """Get requests/min and tokens/min limits based on provider"""
+        if self.provider == 'mistral':
+            return self.config.MISTRAL_REQUESTS_PER_MINUTE, self.config.MISTRAL_TOKENS_PER_MINUTE
+        elif self.provider == 'gemini':
+            return self.config.GEMINI_REQUESTS_PER_MINUTE, self.config.GEMINI_TOKENS_PER_MINUTE
+        elif self.provider == 'openai':
+            return self.config.OPENAI_REQUESTS_PER_MINUTE, self.config.OPENAI_TOKENS_PER_MINUTE
+        else:
+            raise ValueError(f"Unsupported AI provider: {self.provider}")
+
+    def _make_ai_request(self, prompt, response_format=None, priority=PRIORITY_INTERACTIVE, call=None, deadline=None):
         """Make AI request with retry logic using direct API calls"""
+        if call is None:
+            call = self.call_recorder.start(None)
+        if deadline is None:
+            deadline = self.retry_policy.new_deadline()
+        
         if not self.api_key:
+            call["outcome"] = "not_configured"
             return {"error": "AI API key not initialized"}
         
         # Get provider-specific headers and payload
         headers, payload = self._get_request_config(prompt, response_format)
+        estimated_tokens = self._estimate_tokens(prompt)
+        attempt = 0
         
-        for attempt in range(self.max_retries):
+        while True:
+            # Fail fast while the provider is known to be down
+            if not self.circuit_breaker.allow_request():
+                call["outcome"] = "circuit_open"
+                return {"error": "AI provider unavailable (circuit open)", "circuit_open": True}
+            
+            # Wait for a slot and rate limit capacity; interactive calls go first
+            waited = self.request_queue.acquire(priority, estimated_tokens, timeout=deadline.remaining())
+            if waited is None:
+                self.circuit_breaker.release_probe()
+                call["outcome"] = "deadline_exceeded"
+                return {"error": f"AI request deadline exceeded after {attempt} attempts (queued)"}
+            call["queue_wait"] += waited
+            
+            timeout = self.retry_policy.timeout_for(deadline)
+            if timeout <= 0:
+                self.request_queue.release()
+                self.circuit_breaker.release_probe()
+                call["outcome"] = "deadline_exceeded"
+                return {"error": f"AI request deadline exceeded after {attempt} attempts"}
+            
+            attempt += 1
+            call["attempts"] = attempt
+            started_at = time.monotonic()
+            retry_after = None
             try:
                 response = requests.post(
                     self.base_url,
                     headers=headers,
                     json=payload,
-                    timeout=self.timeout
+                    timeout=timeout
                 )
-                
+            except requests.exceptions.RequestException as e:
+                response = None
+                error_msg = str(e)
+                error_type = self._classify_exception(e)
+                retryable = self.retry_policy.is_retryable_exception(e)
+            finally:
+                self.request_queue.release()
+            
+            if response is None:
+                self.circuit_breaker.record_failure()
+            else:
+                call["time_to_first_byte"] = response.elapsed.total_seconds()
                 if response.status_code == 200:
-                    return self._parse_response(response.json())
-                else:
-                    error_msg = f"API request failed with status {response.status_code}: {response.text}"
-                    if attempt == self.max_retries - 1:
-                        return {"error": f"AI request failed after {self.max_retries} attempts: {error_msg}"}
+                    try:
+                        data = response.json()
+                        content = self._parse_response(data)
+                    except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+                        # A 200 without the expected body: the provider is misbehaving, retrying won't help
+                        self.circuit_breaker.record_failure()
+                        self.call_recorder.record_error(call, "invalid_response")
+                        call["outcome"] = "invalid_response"
+                        return {"error": f"AI provider returned an unexpected response: {e!r}"}
+                    self.circuit_breaker.record_success(time.monotonic() - started_at)
+                    self._record_usage(data, estimated_tokens, call)
+                    call["outcome"] = "ok"
+                    return content
                 
-            except requests.exceptions.RequestException as e:
-                if attempt == self.max_retries - 1:
-                    return {"error": f"AI request failed after {self.max_retries} attempts: {e}"}
-                time.sleep(2 ** attempt)  # Exponential backoff
-        
-        return {"error": "AI request failed"}
+                error_msg = f"API request failed with status {response.status_code}: {response.text}"
+                error_type = self._classify_status(response.status_code)
+                retryable = self.retry_policy.is_retryable_status(response.status_code)
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if response.status_code == 429:
+                    # Throttling says nothing about the provider's health: neither a success
+                    # nor a failure, just give back a half-open probe slot
+                    self.circuit_breaker.release_probe()
+                else:
+                    self.circuit_breaker.record_failure()
+            
+            self.call_recorder.record_error(call, error_type)
+            delay = self.retry_policy.backoff(attempt, retry_after)
+            if not retryable or not self.retry_policy.should_retry(attempt, deadline, delay):
+                call["outcome"] = error_type
+                return {"error": f"AI request failed after {attempt} attempts: {error_msg}"}
+            
+            if response is not None and response.status_code == 429:
+                # Pause every process sharing this provider's bucket; the next
+                # acquire() waits it out
+                self.rate_limiter.block(delay)
+            else:
+                time.sleep(delay)
+
+    def _classify_exception(self, error):
+        """Error taxonomy for transport failures"""
+        if isinstance(error, requests.exceptions.Timeout):
+            return "timeout"
+        if isinstance(error, requests.exceptions.ConnectionError):
+            return "connection_error"
+        return "request_error"
+
+    def _classify_status(self, status_code):
+        """Error taxonomy for non-200 responses"""
+        if status_code == 429:
+            return "rate_limited"
+        if status_code >= 500:
+            return "server_error"
+        return "client_error"
+
+    def _estimate_tokens(self, prompt):
+        """Rough prompt + completion token estimate used to reserve rate limit capacity"""
+        return estimate_tokens(prompt) + self.config.AI_COMPLETION_TOKENS_ESTIMATE
+
+    def _get_usage(self, data):
+        """Get (prompt, completion, total) tokens reported by the provider, if any"""
+        if self.provider == 'gemini':
+            usage = data.get("usageMetadata") or {}
+            return usage.get("promptTokenCount"), usage.get("candidatesTokenCount"), usage.get("totalTokenCount")
+        usage = data.get("usage") or {}
+        return usage.get("prompt_tokens"), usage.get("completion_tokens"), usage.get("total_tokens")
+
+    def _record_usage(self, data, estimated_tokens, call):
+        """Charge the rate limiter for tokens used beyond the estimate"""
+        try:
+            prompt_tokens, completion_tokens, used_tokens = self._get_usage(data)
+        except AttributeError:
+            return
+        call["prompt_tokens"] = prompt_tokens
+        call["completion_tokens"] = completion_tokens
+        if used_tokens:
+            self.rate_limiter.debit(used_tokens - estimated_tokens)
 
     def _get_request_config(self, prompt, response_format=None):
         """Get headers and payload based on AI provider"""
@@ -153,115 +317,130 @@ class AIEngine:
         else:
             raise ValueError(f"Unsupported AI provider: {self.provider}")
 
-    def generate_initial_scenario_and_roles(self, theme, player_count):
-        """Generate initial crisis scenario and assign roles to players"""
-        prompt = get_prompt("initial_scenario", theme=theme, player_count=player_count)
-        
-        response = self._make_ai_request(prompt, {"type": "json_object"})
+    def _request_json(self, prompt, prompt_type, fallback=None, priority=PRIORITY_INTERACTIVE, deadline=None):
+        """Make a JSON AI request, using the local fallback if the provider fails"""
+        call = self.call_recorder.start(prompt_type)
+        response = self._make_ai_request(prompt, {"type": "json_object"}, priority=priority, call=call,
+                                         deadline=deadline)
         
         if isinstance(response, dict) and "error" in response:
-            return response
+            result = response
+        else:
+            try:
+                result = json.loads(response)
+            except json.JSONDecodeError as e:
+                call["outcome"] = "parse_error"
+                result = {"error": f"Failed to parse AI response as JSON: {e}"}
         
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError as e:
-            return {"error": f"Failed to parse AI response as JSON: {e}"}
+        if "error" in result and fallback and self.local_fallback:
+            call["fallback"] = True
+            result = fallback()
+        
+        self.call_recorder.finish(call, prompt, response if isinstance(response, str) else None)
+        return result
+
+    def generate_initial_scenario_and_roles(self, theme, player_count, priority=PRIORITY_INTERACTIVE, deadline=None):
+        """Generate initial crisis scenario and assign roles to players"""
+        prompt = self.prompt_builder.build("initial_scenario", theme=theme, player_count=player_count)
+        
+        return self._request_json(
+            prompt,
+            "initial_scenario",
+            fallback=lambda: self.story_generator.initial_scenario(theme, player_count),
+            priority=priority,
+            deadline=deadline
+        )
 
-    def score_individual_response(self, theme, player_response, role, round_number):
+    def score_individual_response(self, theme, player_response, role, round_number, deadline=None):
         """Score an individual player's response"""
-        prompt = get_prompt("individual_scoring", 
+        budget = self.prompt_builder.available_tokens("individual_scoring",
+                                                      theme=theme,
+                                                      role=role,
+                                                      round_number=round_number)
+        prompt = self.prompt_builder.build("individual_scoring", 
                           theme=theme, 
                           role=role, 
                           round_number=round_number, 
-                          player_response=player_response)
+                          player_response=self.prompt_builder.format_decision(player_response, budget))
 
-        response = self._make_ai_request(prompt, {"type": "json_object"})
-        
-        if isinstance(response, dict) and "error" in response:
-            return response
-        
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError as e:
-            return {"error": f"Failed to parse AI response as JSON: {e}"}
+        return self._request_json(
+            prompt,
+            "individual_scoring",
+            fallback=lambda: dict(self.local_scorer.score(theme, player_response, role, round_number), fallback=True),
+            deadline=deadline
+        )
 
-    def update_crisis_score(self, theme, current_crisis_score, all_player_responses, round_number):
+    def update_crisis_score(self, theme, current_crisis_score, all_player_responses, round_number, deadline=None,
+                            priority=PRIORITY_INTERACTIVE):
         """Update the crisis score based on all player responses"""
-        formatted_responses = self._format_all_responses(all_player_responses)
+        budget = self.prompt_builder.available_tokens("crisis_score_update",
+                                                      theme=theme,
+                                                      current_crisis_score=current_crisis_score,
+                                                      round_number=round_number)
+        formatted_responses = self.prompt_builder.format_responses(all_player_responses, budget)
         
-        prompt = get_prompt("crisis_score_update",
+        prompt = self.prompt_builder.build("crisis_score_update",
                           theme=theme,
                           current_crisis_score=current_crisis_score,
                           round_number=round_number,
                           formatted_responses=formatted_responses)
 
-        response = self._make_ai_request(prompt, {"type": "json_object"})
-        
-        if isinstance(response, dict) and "error" in response:
-            return response
-        
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError as e:
-            return {"error": f"Failed to parse AI response as JSON: {e}"}
+        return self._request_json(
+            prompt,
+            "crisis_score_update",
+            fallback=lambda: self.story_generator.crisis_update(current_crisis_score, all_player_responses),
+            priority=priority,
+            deadline=deadline
+        )
 
-    def generate_story_continuation(self, theme, current_scenario, crisis_score, all_responses, round_number):
+    def generate_story_continuation(self, theme, current_scenario, crisis_score, all_responses, round_number,
+                                    story_summary=None, deadline=None, priority=PRIORITY_INTERACTIVE):
         """Generate the next part of the story"""
-        formatted_responses = self._format_all_responses(all_responses)
+        budget = self.prompt_builder.available_tokens("story_continuation",
+                                                      theme=theme,
+                                                      crisis_score=crisis_score,
+                                                      round_number=round_number)
+        # Earlier rounds travel as a rolling summary; the scenario gets half the budget
+        scenario = self.prompt_builder.format_scenario(current_scenario, story_summary, budget // 2)
+        formatted_responses = self.prompt_builder.format_responses(all_responses, budget - estimate_tokens(scenario))
         
-        prompt = get_prompt("story_continuation",
+        prompt = self.prompt_builder.build("story_continuation",
                           theme=theme,
-                          current_scenario=current_scenario,
+                          current_scenario=scenario,
                           crisis_score=crisis_score,
                           round_number=round_number,
                           formatted_responses=formatted_responses)
 
-        response = self._make_ai_request(prompt, {"type": "json_object"})
-        
-        if isinstance(response, dict) and "error" in response:
-            return response
-        
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError as e:
-            return {"error": f"Failed to parse AI response as JSON: {e}"}
+        return self._request_json(
+            prompt,
+            "story_continuation",
+            fallback=lambda: self.story_generator.story_continuation(crisis_score, all_responses, round_number),
+            priority=priority,
+            deadline=deadline
+        )
 
-    def calculate_final_game_scores(self, theme, all_rounds_data, final_crisis_score):
+    def calculate_final_game_scores(self, theme, all_rounds_data, final_crisis_score, deadline=None):
         """Calculate final scores for the entire game"""
-        formatted_rounds = self._format_all_rounds_data(all_rounds_data)
+        budget = self.prompt_builder.available_tokens("final_scoring",
+                                                      theme=theme,
+                                                      final_crisis_score=final_crisis_score,
+                                                      total_rounds=len(all_rounds_data))
+        formatted_rounds = self.prompt_builder.format_rounds(all_rounds_data, budget)
         
-        prompt = get_prompt("final_scoring",
+        prompt = self.prompt_builder.build("final_scoring",
                           theme=theme,
                           final_crisis_score=final_crisis_score,
                           total_rounds=len(all_rounds_data),
                           formatted_rounds=formatted_rounds)
 
-        response = self._make_ai_request(prompt, {"type": "json_object"})
-        
-        if isinstance(response, dict) and "error" in response:
-            return response
-        
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError as e:
-            return {"error": f"Failed to parse AI response as JSON: {e}"}
-
-    def _format_all_responses(self, all_player_responses):
-        """Format player responses for AI prompts"""
-        formatted = ""
-        for player, response in all_player_responses.items():
-            formatted += f"- {player}: {response}\n"
-        return formatted
-
-    def _format_all_rounds_data(self, all_rounds_data):
-        """Format all rounds data for AI prompts"""
-        formatted = ""
-        for i, round_data in enumerate(all_rounds_data, 1):
-            formatted += f"Round {i}:\n"
-            formatted += f"  Crisis Score: {round_data.get('crisis_score', 'N/A')}\n"
-            formatted += f"  Player Responses: {round_data.get('responses', {})}\n"
-            formatted += f"  Score Changes: {round_data.get('score_changes', 'N/A')}\n\n"
-        return formatted
+        # Final summaries are not blocking gameplay, so they yield to live rounds
+        return self._request_json(
+            prompt,
+            "final_scoring",
+            fallback=lambda: self.story_generator.final_scores(final_crisis_score, len(all_rounds_data)),
+            priority=PRIORITY_BACKGROUND,
+            deadline=deadline
+        )
 
     def determine_end_reason(self, final_crisis_score, total_rounds):
         """Determine why the game ended"""
@@ -286,5 +465,9 @@ class AIEngine:
             "base_url": self.base_url,
             "timeout": self.timeout,
             "max_retries": self.max_retries,
-            "client_available": self.is_client_available()
+            "client_available": self.is_client_available(),
+            "request_queue": self.request_queue.get_stats(),
+            "circuit_breaker": self.circuit_breaker.get_stats(),
+            "local_fallback": self.local_fallback,
+            "prompt_sizes": self.prompt_builder.get_stats()
         }
@@ -0,0 +1,127 @@
+import json
+import logging
+import os
+import random
+import time
+import uuid
+
+from metrics import Counter, Histogram
+
+logger = logging.getLogger("odyssey.ai")
+
+AI_REQUESTS = Counter(
+    "ai_requests_total",
+    "AI calls by prompt type, provider, model and outcome",
+    ("prompt_type", "provider", "model", "outcome")
+)
+AI_REQUEST_DURATION = Histogram(
+    "ai_request_duration_seconds",
+    "Total AI call latency including queueing and retries",
+    ("prompt_type", "provider", "model", "outcome")
+)
+AI_QUEUE_WAIT = Histogram(
+    "ai_queue_wait_seconds",
+    "Time spent waiting in the AI request queue / rate limiter",
+    ("prompt_type", "provider")
+)
+AI_TIME_TO_FIRST_BYTE = Histogram(
+    "ai_time_to_first_byte_seconds",
+    "Time until the provider's response headers arrived",
+    ("prompt_type", "provider", "model")
+)
+AI_ATTEMPTS = Histogram(
+    "ai_attempts",
+    "HTTP attempts per AI call",
+    ("prompt_type", "provider"),
+    buckets=(1, 2, 3, 4, 5, 8)
+)
+AI_TOKENS = Counter(
+    "ai_tokens_total",
+    "Tokens reported by the provider",
+    ("prompt_type", "provider", "model", "kind")
+)
+AI_ERRORS = Counter(
+    "ai_errors_total",
+    "Failed AI attempts by error type",
+    ("prompt_type", "provider", "error_type")
+)
+AI_JSON_PARSE_FAILURES = Counter(
+    "ai_json_parse_failures_total",
+    "AI responses that were not valid JSON",
+    ("prompt_type", "provider", "model")
+)
+
+
+class AICallRecorder:
+    """Aggregates per-call AI measurements into metrics and structured logs.
+
+    Calls slower than `slow_call_seconds` are sampled (`slow_sample_rate`) and
+    dumped with their prompt to `slow_dump_dir` for offline inspection.
+    """
+
+    def __init__(self, provider, model, slow_call_seconds=10, slow_sample_rate=0.0, slow_dump_dir=None):
+        self.provider = provider
+        self.model = model
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_sample_rate = slow_sample_rate
+        self.slow_dump_dir = slow_dump_dir
+
+    def start(self, prompt_type):
+        """Create the record that _make_ai_request fills in"""
+        return {
+            "prompt_type": prompt_type or "unknown",
+            "provider": self.provider,
+            "model": self.model,
+            "started_at": time.monotonic(),
+            "attempts": 0,
+            "queue_wait": 0.0,
+            "time_to_first_byte": None,
+            "prompt_tokens": None,
+            "completion_tokens": None,
+            "errors": [],
+            "outcome": None,
+            "fallback": False
+        }
+
+    def record_error(self, call, error_type):
+        call["errors"].append(error_type)
+        AI_ERRORS.inc(prompt_type=call["prompt_type"], provider=self.provider, error_type=error_type)
+
+    def finish(self, call, prompt, response_text=None):
+        call["duration"] = time.monotonic() - call.pop("started_at")
+        outcome = call["outcome"] or "error"
+        labels = {"prompt_type": call["prompt_type"], "provider": self.provider, "model": self.model}
+
+        AI_REQUESTS.inc(outcome=outcome, **labels)
+        AI_REQUEST_DURATION.observe(call["duration"], outcome=outcome, **labels)
+        AI_QUEUE_WAIT.observe(call["queue_wait"], prompt_type=call["prompt_type"], provider=self.provider)
+        if call["attempts"]:
+            AI_ATTEMPTS.observe(call["attempts"], prompt_type=call["prompt_type"], provider=self.provider)
+        if call["time_to_first_byte"] is not None:
+            AI_TIME_TO_FIRST_BYTE.observe(call["time_to_first_byte"], **labels)
+        if call["prompt_tokens"]:
+            AI_TOKENS.inc(call["prompt_tokens"], kind="prompt", **labels)
+        if call["completion_tokens"]:
+            AI_TOKENS.inc(call["completion_tokens"], kind="completion", **labels)
+        if outcome == "parse_error":
+            AI_JSON_PARSE_FAILURES.inc(**labels)
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({"event": "ai_call", **call}, default=str))
+
+        if call["duration"] >= self.slow_call_seconds:
+            self._maybe_dump_slow(call, prompt, response_text)
+
+    def _maybe_dump_slow(self, call, prompt, response_text):
+        if not self.slow_dump_dir or random.random() >= self.slow_sample_rate:
+            return
+        try:
+            os.makedirs(self.slow_dump_dir, exist_ok=True)
+            path = os.path.join(
+                self.slow_dump_dir,
+                f"{int(time.time())}-{call['prompt_type']}-{uuid.uuid4().hex[:8]}.json"
+            )
+            with open(path, "w") as f:
+                json.dump({"call": call, "prompt": prompt, "response": response_text}, f, indent=2, default=str)
+        except OSError:
+            logger.warning("Could not write slow AI prompt dump to %s", self.slow_dump_dir)
@@ -1,8 +1,12 @@
-from flask import request, jsonify
+from flask import request, jsonify, Response
+import hmac
 import json
 from datetime import datetime
 
+from config import Config
 from data import Data
+from metrics import REGISTRY
+from profiling import PROFILER
 
 
 class Api:
@@ -242,4 +246,57 @@ class Api:
                 return jsonify({
                     "success": False,
                     "error": str(e)
-                }), 500
\ No newline at end of file
+                }), 500
+
+        @self.app.route('/metrics', methods=['GET'])
+        def get_metrics():
+            """All backend metrics in the Prometheus text format"""
+            return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+        @self.app.route('/api/profiling', methods=['GET', 'POST'])
+        def profiling():
+            """Get profiler status and recent slow traces, or change its settings (admin token only)"""
+            try:
+                if request.method == 'POST':
+                    token = request.headers.get("X-Admin-Token", "")
+                    if not Config.PROFILING_ADMIN_TOKEN or not hmac.compare_digest(token, Config.PROFILING_ADMIN_TOKEN):
+                        return jsonify({
+                            "success": False,
+                            "error": "Not allowed to change profiling settings"
+                        }), 403
+                    data = request.get_json() or {}
+                    sample_rate = data.get("sample_rate")
+                    slow_seconds = data.get("slow_seconds")
+                    status = PROFILER.configure(
+                        enabled=data.get("enabled"),
+                        sample_rate=None if sample_rate is None
+                        else min(float(sample_rate), Config.PROFILING_MAX_SAMPLE_RATE),
+                        slow_seconds=None if slow_seconds is None
+                        else max(float(slow_seconds), Config.PROFILING_MIN_SLOW_SECONDS)
+                    )
+                else:
+                    status = PROFILER.get_status()
+                return jsonify({
+                    "success": True,
+                    "profiling": status
+                })
+            except Exception as e:
+                return jsonify({
+                    "success": False,
+                    "error": str(e)
+                }), 500
+
+        @self.app.route('/api/metrics/ai', methods=['GET'])
+        def get_ai_metrics():
+            """Get AI call latency, token usage and error metrics"""
+            try:
+                return jsonify({
+                    "success": True,
+                    "metrics": REGISTRY.snapshot(prefix="ai_"),
+                    "timestamp": datetime.now().isoformat()
+                })
+            except Exception as e:
+                return jsonify({
+                    "success": False,
+                    "error": str(e)
+                }), 500
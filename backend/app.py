@@ -1,3 +1,9 @@
+# The server runs in eventlet mode; patch sockets, threading and time before anything
+# else is imported so Redis, AI calls and waits yield instead of stalling the worker
+import eventlet
+eventlet.monkey_patch()
+
+import logging
 from flask import Flask, request
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
@@ -5,14 +11,43 @@ from flask import jsonify
 from data import Data
 from socket_engine import SocketEngine
 from api import Api
+from config import Config
+from message_queue import get_message_queue
+from instrumentation import instrument_app, instrument_static_methods
+from profiling import PROFILER, trace_methods, profile_views
+from ai_engine import AIEngine
 
 
 def start():
+    logging.basicConfig(
+        level=Config.LOG_LEVEL,
+        format="%(asctime)s %(levelname)s %(name)s %(message)s"
+    )
     app = Flask(__name__)
     CORS(app)
+    instrument_app(app)
+    instrument_static_methods(Data, skip=("get_redis_client", "room_summary"))
     Api(app)
 
-    socket = SocketIO(app, cors_allowed_origins="*")
+    PROFILER.configure(
+        enabled=Config.PROFILING_ENABLED,
+        sample_rate=Config.PROFILING_SAMPLE_RATE,
+        slow_seconds=Config.PROFILING_SLOW_SECONDS,
+        output_dir=Config.PROFILING_DIR
+    )
+    profile_views(app)
+    trace_methods(Data, "data", skip=("get_redis_client", "room_summary"))
+    trace_methods(AIEngine, "ai")
+
+    # With a message queue, room broadcasts reach clients on every worker
+    socket = SocketIO(
+        app,
+        async_mode="eventlet",
+        cors_allowed_origins="*",
+        message_queue=get_message_queue(),
+        channel=Config.SOCKETIO_CHANNEL
+    )
+    trace_methods(socket.server, "socketio", ["emit"])
     SocketEngine(socket)
 
     @socket.on_error_default
@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import deque
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Error/latency based circuit breaker for calls to the AI provider.
+
+    Outcomes of recent calls are kept in a rolling window. When enough of them
+    failed (errors, timeouts or calls slower than `slow_call_seconds`) the
+    circuit opens and calls are short-circuited. After `reset_timeout` seconds
+    a limited number of half-open probe calls are let through; a successful
+    probe closes the circuit again, a failed one re-opens it.
+    """
+
+    def __init__(self, failure_rate=0.5, min_calls=5, window_size=20,
+                 slow_call_seconds=20, reset_timeout=30, half_open_max_calls=1):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self.outcomes = deque(maxlen=window_size)
+        self.state = STATE_CLOSED
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.times_opened = 0
+        self.short_circuited = 0
+        self.lock = threading.Lock()
+
+    def allow_request(self):
+        """Return True if a call may go to the provider right now"""
+        with self.lock:
+            if self.state == STATE_CLOSED:
+                return True
+
+            if self.state == STATE_OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    self.short_circuited += 1
+                    return False
+                self.state = STATE_HALF_OPEN
+                self.half_open_calls = 0
+
+            if self.half_open_calls < self.half_open_max_calls:
+                self.half_open_calls += 1
+                return True
+
+            self.short_circuited += 1
+            return False
+
+    def release_probe(self):
+        """Give back a half-open probe slot taken by a call that never reached the provider"""
+        with self.lock:
+            if self.state == STATE_HALF_OPEN and self.half_open_calls > 0:
+                self.half_open_calls -= 1
+
+    def record_success(self, latency=0.0):
+        """Record a completed call; calls slower than the threshold count as failures"""
+        if self.slow_call_seconds and latency > self.slow_call_seconds:
+            self.record_failure()
+            return
+
+        with self.lock:
+            if self.state == STATE_HALF_OPEN:
+                self._close()
+            else:
+                self.outcomes.append(True)
+
+    def record_failure(self):
+        """Record a failed call"""
+        with self.lock:
+            if self.state == STATE_HALF_OPEN:
+                self._open()
+                return
+
+            self.outcomes.append(False)
+            failures = self.outcomes.count(False)
+            if (self.state == STATE_CLOSED and len(self.outcomes) >= self.min_calls
+                    and failures / len(self.outcomes) >= self.failure_rate):
+                self._open()
+
+    def is_open(self):
+        """Return True while calls are being short-circuited"""
+        with self.lock:
+            return self.state != STATE_CLOSED
+
+    def _open(self):
+        self.state = STATE_OPEN
+        self.opened_at = time.monotonic()
+        self.half_open_calls = 0
+        self.times_opened += 1
+
+    def _close(self):
+        self.state = STATE_CLOSED
+        self.outcomes.clear()
+        self.half_open_calls = 0
+
+    def get_stats(self):
+        """Get current breaker state"""
+        with self.lock:
+            failures = self.outcomes.count(False)
+            return {
+                "state": self.state,
+                "recent_calls": len(self.outcomes),
+                "recent_failures": failures,
+                "times_opened": self.times_opened,
+                "short_circuited": self.short_circuited
+            }
@@ -13,6 +13,10 @@ class Config:
     
     # SocketIO Configuration
     SOCKETIO_CORS_ALLOWED_ORIGINS = os.environ.get('SOCKETIO_CORS_ALLOWED_ORIGINS', "*")
+    # Multi-worker fan-out: '' (single process), 'redis' (REDIS_* connection) or a queue URL
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE', '')
+    SOCKETIO_CHANNEL = os.environ.get('SOCKETIO_CHANNEL', 'odyssey-socketio')
+    WORKERS = int(os.environ.get('WORKERS', 1))
     
     # Application Configuration
     DEBUG = os.environ.get('DEBUG', 'True').lower() == 'true'
@@ -42,6 +46,114 @@ class Config:
     OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-4')
     OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL', 'https://api.openai.com/v1/chat/completions')
     
+    # AI Rate Limiting (per provider, shared across processes through Redis)
+    AI_RATE_LIMIT_BACKEND = os.environ.get('AI_RATE_LIMIT_BACKEND', 'redis')
+    AI_MAX_CONCURRENT_REQUESTS = int(os.environ.get('AI_MAX_CONCURRENT_REQUESTS', 8))
+    AI_COMPLETION_TOKENS_ESTIMATE = int(os.environ.get('AI_COMPLETION_TOKENS_ESTIMATE', 512))
+    MISTRAL_REQUESTS_PER_MINUTE = int(os.environ.get('MISTRAL_REQUESTS_PER_MINUTE', 60))
+    MISTRAL_TOKENS_PER_MINUTE = int(os.environ.get('MISTRAL_TOKENS_PER_MINUTE', 500000))
+    GEMINI_REQUESTS_PER_MINUTE = int(os.environ.get('GEMINI_REQUESTS_PER_MINUTE', 60))
+    GEMINI_TOKENS_PER_MINUTE = int(os.environ.get('GEMINI_TOKENS_PER_MINUTE', 1000000))
+    OPENAI_REQUESTS_PER_MINUTE = int(os.environ.get('OPENAI_REQUESTS_PER_MINUTE', 500))
+    OPENAI_TOKENS_PER_MINUTE = int(os.environ.get('OPENAI_TOKENS_PER_MINUTE', 30000))
+    
     # Common AI Settings
     AI_TIMEOUT = int(os.environ.get('AI_TIMEOUT', 30)) 
-    AI_MAX_RETRIES = int(os.environ.get('AI_MAX_RETRIES', 3))
\ No newline at end of file
+    AI_MAX_RETRIES = int(os.environ.get('AI_MAX_RETRIES', 3))
+    AI_RETRY_BASE_DELAY = float(os.environ.get('AI_RETRY_BASE_DELAY', 0.5))
+    AI_RETRY_MAX_DELAY = float(os.environ.get('AI_RETRY_MAX_DELAY', 8))
+    AI_MIN_ATTEMPT_TIMEOUT = float(os.environ.get('AI_MIN_ATTEMPT_TIMEOUT', 2))
+    AI_CALL_DEADLINE_SECONDS = float(os.environ.get('AI_CALL_DEADLINE_SECONDS', 45))
+    AI_ROUND_DEADLINE_SECONDS = float(os.environ.get('AI_ROUND_DEADLINE_SECONDS', 60))
+    
+    # AI Circuit Breaker and local fallback
+    AI_BREAKER_FAILURE_RATE = float(os.environ.get('AI_BREAKER_FAILURE_RATE', 0.5))
+    AI_BREAKER_MIN_CALLS = int(os.environ.get('AI_BREAKER_MIN_CALLS', 5))
+    AI_BREAKER_WINDOW_SIZE = int(os.environ.get('AI_BREAKER_WINDOW_SIZE', 20))
+    AI_BREAKER_SLOW_CALL_SECONDS = float(os.environ.get('AI_BREAKER_SLOW_CALL_SECONDS', 20))
+    AI_BREAKER_RESET_TIMEOUT = float(os.environ.get('AI_BREAKER_RESET_TIMEOUT', 30))
+    AI_BREAKER_HALF_OPEN_CALLS = int(os.environ.get('AI_BREAKER_HALF_OPEN_CALLS', 1))
+    AI_LOCAL_FALLBACK = os.environ.get('AI_LOCAL_FALLBACK', 'True').lower() == 'true'
+    
+    # Scoring backend ('llm' or 'heuristic'); rooms may override it on creation
+    SCORING_MODE = os.environ.get('SCORING_MODE', 'llm')
+    SCORING_CALIBRATION_PATH = os.environ.get('SCORING_CALIBRATION_PATH', 'scoring_calibration.json')
+    SCORING_RECORD_PATH = os.environ.get('SCORING_RECORD_PATH', '')
+    SCORING_WORKERS = int(os.environ.get('SCORING_WORKERS', 16))
+    
+    # Draft the crisis update and story once all but one player have submitted
+    SPECULATIVE_ROUNDS = os.environ.get('SPECULATIVE_ROUNDS', 'False').lower() == 'true'
+    
+    # Rounds processed concurrently by the background room workers
+    ROUND_WORKERS = int(os.environ.get('ROUND_WORKERS', 8))
+    
+    # Admission control: game starts and rounds calling the AI at once, per worker process
+    ADMISSION_MAX_STARTS = int(os.environ.get('ADMISSION_MAX_STARTS', 4))
+    ADMISSION_MAX_ROUNDS = int(os.environ.get('ADMISSION_MAX_ROUNDS', 6))
+    # Rounds that waited longer are scored by the local heuristic scorer
+    ADMISSION_SHED_WAIT_SECONDS = float(os.environ.get('ADMISSION_SHED_WAIT_SECONDS', 20))
+    # Starts that wait longer use the local scenario generator
+    ADMISSION_START_MAX_WAIT_SECONDS = float(os.environ.get('ADMISSION_START_MAX_WAIT_SECONDS', 30))
+    # How often waiting rooms get their queue position and ETA
+    ADMISSION_UPDATE_SECONDS = float(os.environ.get('ADMISSION_UPDATE_SECONDS', 2))
+    
+    # Server-side timers (seconds); players see a 2 minute limit, the rest is grace
+    ROUND_TIMEOUT_SECONDS = float(os.environ.get('ROUND_TIMEOUT_SECONDS', 150))
+    SPECULATION_LEAD_SECONDS = float(os.environ.get('SPECULATION_LEAD_SECONDS', 15))
+    GAME_AUTO_EXIT_SECONDS = float(os.environ.get('GAME_AUTO_EXIT_SECONDS', 10))
+    
+    # Game session storage ('redis' shares sessions across workers, 'memory' keeps them in process)
+    GAME_STATE_BACKEND = os.environ.get('GAME_STATE_BACKEND', 'redis')
+    GAME_SESSION_TTL_SECONDS = int(os.environ.get('GAME_SESSION_TTL_SECONDS', 6 * 3600))
+    GAME_LOCK_TIMEOUT_SECONDS = float(os.environ.get('GAME_LOCK_TIMEOUT_SECONDS', 30))
+    GAME_LOCK_STRIPES = int(os.environ.get('GAME_LOCK_STRIPES', 256))
+    # Times a change is re-read and retried when another worker saved the session first
+    GAME_SAVE_ATTEMPTS = int(os.environ.get('GAME_SAVE_ATTEMPTS', 3))
+    
+    # Most events (read from the game's stream) sent to a client resyncing after a reconnect
+    GAME_EVENT_HISTORY = int(os.environ.get('GAME_EVENT_HISTORY', 50))
+    
+    # Every game event also goes to a capped Redis Stream; finished games are archived to gzip files here
+    GAME_EVENT_STREAM_MAXLEN = int(os.environ.get('GAME_EVENT_STREAM_MAXLEN', 1000))
+    GAME_ARCHIVE_DIR = os.environ.get('GAME_ARCHIVE_DIR', 'game_archive')
+    # A stream expires this long after its last event
+    GAME_EVENT_STREAM_TTL_SECONDS = int(os.environ.get('GAME_EVENT_STREAM_TTL_SECONDS', 6 * 3600))
+    # Games with no event for this long are archived at startup instead of being rebuilt
+    GAME_REPLAY_MAX_IDLE_SECONDS = float(os.environ.get('GAME_REPLAY_MAX_IDLE_SECONDS', 1800))
+    
+    # Handler tracing and sampled cProfile dumps of slow handlers (can be switched at /api/profiling)
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() == 'true'
+    PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0.01))
+    PROFILING_SLOW_SECONDS = float(os.environ.get('PROFILING_SLOW_SECONDS', 0.5))
+    PROFILING_DIR = os.environ.get('PROFILING_DIR', 'profiles')
+    # Changing profiler settings over HTTP needs this token in X-Admin-Token; unset, the settings are read-only
+    PROFILING_ADMIN_TOKEN = os.environ.get('PROFILING_ADMIN_TOKEN', '')
+    # Runtime changes are clamped so profiling cannot be turned up to dumping every call
+    PROFILING_MAX_SAMPLE_RATE = float(os.environ.get('PROFILING_MAX_SAMPLE_RATE', 0.1))
+    PROFILING_MIN_SLOW_SECONDS = float(os.environ.get('PROFILING_MIN_SLOW_SECONDS', 0.1))
+    
+    # Room list changes are batched for this many seconds before going to the lobby
+    LOBBY_BROADCAST_WINDOW = float(os.environ.get('LOBBY_BROADCAST_WINDOW', 0.25))
+    
+    # Presence registry: connections expire unless their worker refreshes them every heartbeat
+    PRESENCE_TTL_SECONDS = float(os.environ.get('PRESENCE_TTL_SECONDS', 60))
+    PRESENCE_HEARTBEAT_SECONDS = float(os.environ.get('PRESENCE_HEARTBEAT_SECONDS', 20))
+    # Players offline this long are taken out of rooms that have not started
+    PRESENCE_GRACE_SECONDS = float(os.environ.get('PRESENCE_GRACE_SECONDS', 30))
+    
+    # Prompt token budgets (estimated tokens per prompt type)
+    AI_PROMPT_BUDGETS = {
+        'initial_scenario': int(os.environ.get('AI_PROMPT_BUDGET_INITIAL_SCENARIO', 400)),
+        'individual_scoring': int(os.environ.get('AI_PROMPT_BUDGET_INDIVIDUAL_SCORING', 400)),
+        'crisis_score_update': int(os.environ.get('AI_PROMPT_BUDGET_CRISIS_SCORE_UPDATE', 900)),
+        'story_continuation': int(os.environ.get('AI_PROMPT_BUDGET_STORY_CONTINUATION', 1400)),
+        'final_scoring': int(os.environ.get('AI_PROMPT_BUDGET_FINAL_SCORING', 1500))
+    }
+    AI_DECISION_MAX_TOKENS = int(os.environ.get('AI_DECISION_MAX_TOKENS', 150))
+    AI_SUMMARY_MAX_TOKENS = int(os.environ.get('AI_SUMMARY_MAX_TOKENS', 300))
+    
+    # AI call instrumentation
+    AI_SLOW_CALL_SECONDS = float(os.environ.get('AI_SLOW_CALL_SECONDS', 10))
+    AI_SLOW_PROMPT_SAMPLE_RATE = float(os.environ.get('AI_SLOW_PROMPT_SAMPLE_RATE', 0.0))
+    AI_SLOW_PROMPT_DIR = os.environ.get('AI_SLOW_PROMPT_DIR', 'logs/slow_prompts')
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
\ No newline at end of file
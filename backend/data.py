@@ -185,7 +185,7 @@ class Data:
 
     # Add the parameters room name, room theme, and players to be saved in Data
     @staticmethod
-    def create_room(room_id, username, room_name=None, room_theme=None, max_players=4):
+    def create_room(room_id, username, room_name=None, room_theme=None, max_players=4, scoring_mode=None):
         """Create a new game room"""
         if not(2 <= max_players <= 4):
             max_players = 4
@@ -203,7 +203,8 @@ class Data:
             "theme": room_theme or "climate_change",
             "max_players": max_players,
             "created_at": datetime.now().isoformat(),
-            "host": username
+            "host": username,
+            "scoring_mode": scoring_mode or app_config.SCORING_MODE
         }
         
         # Store room in Redis
@@ -249,7 +250,7 @@ class Data:
             return None
         
         members = room.get("members", [])
-        if members:
+        if username in members:
             members = [member for member in members if member != username]
             if len(members) == 0:
                 # Delete room if empty
@@ -294,21 +295,39 @@ class Data:
         
         for room_key in room_keys:
             room = redis_client.json().get(room_key)
-            if room:
-                members = len(room.get("members", []))
-                max_players = room.get("max_players", 4)
-                if not room.get("started", False) and members < max_players:
-                    # Extract room_id from key (room:room_id)
-                    room_id = room_key.replace("room:", "")
-                    rooms.append({
-                        "room_id": room_id, 
-                        "room_size": members,
-                        "max_players": max_players,
-                        "room_name": room.get("room_name", ""),
-                        "theme": room.get("theme", ""),
-                        "host": room.get("host", "")
-                    })
+            # Extract room_id from key (room:room_id)
+            summary = Data.room_summary(room_key.replace("room:", ""), room)
+            if summary:
+                rooms.append(summary)
         return rooms
+
+    @staticmethod
+    def room_summary(room_id, room):
+        """Lobby listing for a room, or None if it cannot be joined"""
+        if not room:
+            return None
+        members = len(room.get("members", []))
+        max_players = room.get("max_players", 4)
+        if room.get("started", False) or members >= max_players:
+            return None
+        return {
+            "room_id": room_id, 
+            "room_size": members,
+            "max_players": max_players,
+            "room_name": room.get("room_name", ""),
+            "theme": room.get("theme", ""),
+            "host": room.get("host", "")
+        }
+
+    @staticmethod
+    def get_lobby_rooms(room_ids):
+        """Get lobby listings for specific rooms (None for rooms that cannot be joined)"""
+        redis_client = Data.get_redis_client()
+        pipeline = redis_client.json().pipeline(transaction=False)
+        for room_id in room_ids:
+            pipeline.get(f"room:{room_id}")
+        rooms = pipeline.execute()
+        return {room_id: Data.room_summary(room_id, room) for room_id, room in zip(room_ids, rooms)}
     
     @staticmethod
     def get_all_users_rankings():
@@ -372,7 +391,8 @@ class Data:
             "started": room.get("started", False),
             "host": room.get("host", ""),
             "created_at": room.get("created_at", ""),
-            "current_players": len(room.get("members", []))
+            "current_players": len(room.get("members", [])),
+            "scoring_mode": room.get("scoring_mode", app_config.SCORING_MODE)
         }
 
     @staticmethod
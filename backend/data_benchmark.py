@@ -0,0 +1,322 @@
+"""Micro-benchmarks for the Redis data layer (data.py).
+
+Seeds synthetic users and rooms, then times the hot Data methods and counts
+the Redis round trips and bytes each call costs. Runs against an in-process
+fakeredis server (--backend memory) or a local Redis Stack given with
+--redis-url. Only local hosts are accepted; use a database nobody else uses,
+as the measured calls scan (and cleanup_empty_rooms deletes) every room in it.
+Seeded keys use the bench_ prefix and are deleted before and after the run.
+
+    python data_benchmark.py --backend memory --sizes 1000,10000 --output bench.json
+    python data_benchmark.py --backend redis --redis-url redis://127.0.0.1:6379/15 \
+        --sizes 100000 --baseline bench.json
+
+With --baseline, results are compared against a saved run and the exit code
+is 1 if any benchmark got slower than --threshold.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import urllib.parse
+from datetime import datetime
+
+import redis
+
+from config import Config
+from data import Data
+
+BENCHMARKS = (
+    "get_rooms",
+    "get_leaderboard",
+    "get_all_users_rankings",
+    "join_random_room",
+    "update_user_stats_from_rankings",
+    "cleanup_empty_rooms",
+)
+
+# Seeded users and rooms are named with this prefix so they can be deleted by pattern
+KEY_PREFIX = "bench_"
+SEEDED_PATTERNS = (f"user:{KEY_PREFIX}*", f"user_stats:{KEY_PREFIX}*", f"room:{KEY_PREFIX}*")
+
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+def _payload_size(value):
+    """Approximate bytes of a decoded Redis reply"""
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    if isinstance(value, (list, tuple, set)):
+        return sum(_payload_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(_payload_size(key) + _payload_size(item) for key, item in value.items())
+    return len(str(value))
+
+
+class TrafficCounter:
+    """Round trips and bytes seen by every connection of one pool"""
+
+    def __init__(self):
+        self.round_trips = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def snapshot(self):
+        return self.round_trips, self.bytes_sent, self.bytes_received
+
+
+def counting_connection(connection_class, counter):
+    """Subclass of a redis-py connection class that reports its traffic to `counter`"""
+
+    class CountingConnection(connection_class):
+        def send_packed_command(self, command, check_health=True):
+            # A pipeline sends all of its commands in one call: one round trip
+            counter.round_trips += 1
+            chunks = [command] if isinstance(command, (bytes, str)) else command
+            counter.bytes_sent += sum(len(chunk) for chunk in chunks)
+            return super().send_packed_command(command, check_health)
+
+        def read_response(self, *args, **kwargs):
+            response = super().read_response(*args, **kwargs)
+            counter.bytes_received += _payload_size(response)
+            return response
+
+    return CountingConnection
+
+
+def check_local_url(url):
+    """Error message if `url` is not a Redis on this machine, else None"""
+    parsed = urllib.parse.urlparse(url)
+    if parsed.scheme == "unix":
+        return None
+    if parsed.scheme not in ("redis", "rediss"):
+        return f"unsupported Redis URL {url!r}"
+    if parsed.hostname not in LOCAL_HOSTS:
+        return f"refusing to benchmark against non-local Redis host {parsed.hostname!r}"
+    return None
+
+
+def connect(backend, counter, redis_url=None):
+    """A client factory for `Data.get_redis_client` whose clients share one counting pool"""
+    if backend == "memory":
+        import fakeredis
+        pool = fakeredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True).connection_pool
+    else:
+        pool = redis.ConnectionPool.from_url(redis_url, decode_responses=True)
+    pool.connection_class = counting_connection(pool.connection_class, counter)
+    return lambda: redis.Redis(connection_pool=pool)
+
+
+def clear_seeded(batch=1000):
+    """Delete the keys written by `seed`, leaving everything else in the database alone"""
+    redis_client = Data.get_redis_client()
+    for pattern in SEEDED_PATTERNS:
+        keys = []
+        for key in redis_client.scan_iter(match=pattern, count=batch):
+            keys.append(key)
+            if len(keys) >= batch:
+                redis_client.delete(*keys)
+                keys = []
+        if keys:
+            redis_client.delete(*keys)
+
+
+def seed(users, rooms, batch=1000):
+    """Fill the database with `users` users (with stats) and `rooms` rooms in mixed states"""
+    clear_seeded(batch)
+    redis_client = Data.get_redis_client()
+    now = datetime.now().isoformat()
+    pipeline = redis_client.json().pipeline(transaction=False)
+    for index in range(users):
+        username = f"{KEY_PREFIX}user{index}"
+        pipeline.set(f"user:{username}", "$", {
+            "user_details": username, "created_at": now, "last_active": now
+        })
+        games = random.randint(0, 50)
+        total_score = games * random.randint(0, 100)
+        pipeline.set(f"user_stats:{username}", "$", {
+            "user_details": username,
+            "total_score": total_score,
+            "total_games": games,
+            "average_score": total_score / games if games else 0.0,
+            "games_won": random.randint(0, games),
+            "last_played": now if games else None,
+            "achievements": random.sample(["First Place", "Second Place", "Third Place"], random.randint(0, 3))
+        })
+        if index % batch == batch - 1:
+            pipeline.execute()
+    for index in range(rooms):
+        kind = index % 4
+        # Open, full, started and empty rooms in equal parts
+        members = [] if kind == 3 else [
+            f"{KEY_PREFIX}user{(index + n) % max(1, users)}" for n in range(4 if kind == 1 else 1)
+        ]
+        pipeline.set(f"room:{KEY_PREFIX}room{index}", "$", {
+            "members": members,
+            "started": kind == 2,
+            "room_name": f"Room {index}",
+            "theme": {"id": "space", "name": "Space Station"},
+            "max_players": 4,
+            "created_at": now,
+            "host": members[0] if members else "",
+            "scoring_mode": Config.SCORING_MODE
+        })
+        if index % batch == batch - 1:
+            pipeline.execute()
+    pipeline.execute()
+
+
+def reseed_empty_rooms(rooms):
+    """Put back the empty rooms cleanup_empty_rooms deletes"""
+    pipeline = Data.get_redis_client().json().pipeline(transaction=False)
+    for index in range(3, rooms, 4):
+        pipeline.set(f"room:{KEY_PREFIX}room{index}", "$", {"members": [], "started": False, "max_players": 4})
+    pipeline.execute()
+
+
+def benchmark_calls(name, users, rooms):
+    """(setup, call) for one benchmark; setup runs untimed before each call"""
+    if name == "get_rooms":
+        return None, Data.get_rooms
+    if name == "get_leaderboard":
+        return None, lambda: Data.get_leaderboard(10)
+    if name == "get_all_users_rankings":
+        return None, Data.get_all_users_rankings
+    if name == "join_random_room":
+        return None, lambda: Data.join_random_room(None, f"{KEY_PREFIX}user{random.randrange(max(1, users))}")
+    if name == "update_user_stats_from_rankings":
+        def rankings():
+            players = random.sample(range(max(1, users)), min(4, users))
+            return [
+                {"username": f"{KEY_PREFIX}user{player}", "rank": rank + 1, "total_score": random.randint(0, 100)}
+                for rank, player in enumerate(players)
+            ]
+        return None, lambda: Data.update_user_stats_from_rankings(rankings())
+    if name == "cleanup_empty_rooms":
+        return lambda: reseed_empty_rooms(rooms), Data.cleanup_empty_rooms
+    raise ValueError(f"Unknown benchmark {name}")
+
+
+def run_benchmark(name, users, rooms, repeat, counter):
+    setup, call = benchmark_calls(name, users, rooms)
+    durations = []
+    round_trips = bytes_sent = bytes_received = 0
+    for _ in range(repeat):
+        if setup:
+            setup()
+        before = counter.snapshot()
+        start = time.perf_counter()
+        call()
+        durations.append(time.perf_counter() - start)
+        after = counter.snapshot()
+        round_trips += after[0] - before[0]
+        bytes_sent += after[1] - before[1]
+        bytes_received += after[2] - before[2]
+
+    durations.sort()
+    return {
+        "users": users,
+        "rooms": rooms,
+        "repeat": repeat,
+        "median": statistics.median(durations),
+        "p95": durations[min(len(durations) - 1, int(0.95 * len(durations)))],
+        "mean": statistics.fmean(durations),
+        "round_trips": round_trips / repeat,
+        "bytes_sent": bytes_sent / repeat,
+        "bytes_received": bytes_received / repeat
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print the change against a baseline run; returns the names that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':<56}{'baseline':>12}{'now':>12}{'change':>9}{'trips':>14}")
+    for key, result in results.items():
+        previous = baseline.get("results", {}).get(key)
+        if not previous:
+            continue
+        ratio = result["median"] / previous["median"] if previous["median"] else 1.0
+        flag = " REGRESSION" if ratio > threshold else ""
+        if flag:
+            regressions.append(key)
+        trips = f"{previous['round_trips']:.0f}->{result['round_trips']:.0f}"
+        print(f"{key:<56}{previous['median'] * 1000:>10.2f}ms{result['median'] * 1000:>10.2f}ms"
+              f"{ratio:>8.2f}x{trips:>14}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("memory", "redis"), default="memory")
+    parser.add_argument("--redis-url", help="local Redis Stack for --backend redis, e.g. redis://127.0.0.1:6379/15")
+    parser.add_argument("--sizes", default="1000,10000", help="comma-separated user counts to seed")
+    parser.add_argument("--room-ratio", type=float, default=0.1, help="rooms seeded per user")
+    parser.add_argument("--repeat", type=int, default=20, help="timed calls per benchmark")
+    parser.add_argument("--only", help="comma-separated subset of: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against results saved with --output")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="slowdown ratio (median) that counts as a regression")
+    args = parser.parse_args()
+
+    if args.backend == "memory":
+        try:
+            import fakeredis  # noqa: F401
+        except ImportError:
+            parser.error("--backend memory needs fakeredis (pip install fakeredis jsonpath-ng)")
+    else:
+        if not args.redis_url:
+            parser.error("--backend redis needs an explicit --redis-url of a local Redis")
+        problem = check_local_url(args.redis_url)
+        if problem:
+            parser.error(problem)
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    random.seed(args.seed)
+    counter = TrafficCounter()
+    Data.get_redis_client = staticmethod(connect(args.backend, counter, args.redis_url))
+
+    results = {}
+    try:
+        print(f"{'benchmark':<56}{'median':>10}{'p95':>10}{'trips':>10}{'sent':>12}{'received':>12}")
+        for size in (int(value) for value in args.sizes.split(",")):
+            rooms = max(1, int(size * args.room_ratio))
+            seed(size, rooms)
+            for name in names:
+                key = f"{name}[users={size},rooms={rooms}]"
+                result = run_benchmark(name, size, rooms, args.repeat, counter)
+                results[key] = result
+                print(f"{key:<56}{result['median'] * 1000:>8.2f}ms{result['p95'] * 1000:>8.2f}ms"
+                      f"{result['round_trips']:>10.0f}{result['bytes_sent']:>12.0f}{result['bytes_received']:>12.0f}")
+    finally:
+        clear_seeded()
+
+    report = {
+        "meta": {
+            "backend": args.backend,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "timestamp": datetime.now().isoformat()
+        },
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            if compare(results, json.load(baseline), args.threshold):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Per-game event log on Redis Streams.
+
+Every game event is appended to `game_events:<room_id>` along with the
+session fields it changed, so a lost session can be rebuilt by replaying the
+stream. The newest entries also serve clients resyncing after a reconnect,
+so sessions do not carry their own copy of recent events. Streams are capped
+and expire once a game stops logging. Finished games, and games idle for
+longer than GAME_REPLAY_MAX_IDLE_SECONDS, are moved to gzip files in
+GAME_ARCHIVE_DIR:
+
+    python event_log.py archive
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import time
+
+import redis
+
+from config import Config
+from data import Data
+from game_events import events_since, next_version
+from session_model import GameSession, RoundRecord
+from scoring import TIMEOUT_DECISION
+
+logger = logging.getLogger("odyssey.event_log")
+
+STREAM_KEY_PREFIX = "game_events:"
+
+FINAL_EVENTS = ("game_ended",)
+
+
+def replay_events(events):
+    """Rebuild a game session from its logged events, or None if the start is missing"""
+    game_session = None
+    for event_type, data, state in events:
+        if event_type == "game_started":
+            game_session = GameSession.load(state)
+        if game_session is None:
+            continue
+
+        if event_type == "decision_submitted":
+            game_session["player_decisions"][data["username"]] = data["decision"]
+        elif event_type == "round_processing":
+            for player in data.get("missing_players", []):
+                game_session["player_decisions"][player] = TIMEOUT_DECISION
+            game_session["game_state"] = "processing_round"
+        elif event_type == "round_completed":
+            history_entry = state.pop("history_entry")
+            game_session.update(state)
+            game_session["game_history"].append(RoundRecord.load(history_entry, game_session["players"]))
+            game_session["player_decisions"] = {}
+            game_session["game_state"] = "waiting_for_decisions"
+            game_session["round_start_time"] = time.time()
+        elif event_type in ("game_ending",) + FINAL_EVENTS:
+            game_session["game_state"] = "ended"
+
+        if event_type not in FINAL_EVENTS:
+            next_version(game_session)
+    return game_session
+
+
+class GameEventLog:
+    """Capped Redis Stream of events per game; logging failures never break a game.
+
+    `history` bounds how many recent events a resyncing client is sent
+    before it gets a full snapshot instead. Each append pushes the stream's
+    expiry `ttl` seconds out, so abandoned games disappear on their own.
+    """
+
+    def __init__(self, max_length=1000, archive_dir="archive", history=50, ttl=6 * 3600):
+        self.max_length = max_length
+        self.archive_dir = archive_dir
+        self.history = history
+        self.ttl = ttl
+
+    def _key(self, room_id):
+        return f"{STREAM_KEY_PREFIX}{room_id}"
+
+    def append(self, room_id, event_type, data, state=None, version=None):
+        """Append an event; `state` holds the session fields it changed, for replay,
+        and `version` the session version it produced, for resyncing clients"""
+        fields = {
+            "type": event_type,
+            "data": json.dumps(data, separators=(",", ":")),
+            "state": json.dumps(state or {}, separators=(",", ":"))
+        }
+        if version is not None:
+            fields["version"] = version
+        try:
+            pipe = Data.get_redis_client().pipeline(transaction=False)
+            pipe.xadd(self._key(room_id), fields, maxlen=self.max_length, approximate=True)
+            pipe.expire(self._key(room_id), int(self.ttl))
+            pipe.execute()
+        except redis.RedisError:
+            logger.warning("Could not log %s event for game %s", event_type, room_id)
+
+    def read(self, room_id):
+        """All logged events of a game as (type, data, state) in order"""
+        entries = Data.get_redis_client().xrange(self._key(room_id))
+        return [
+            (fields["type"], json.loads(fields["data"]), json.loads(fields["state"]))
+            for _, fields in entries
+        ]
+
+    def recent(self, room_id, count):
+        """The newest `count` versioned events of a game, oldest first, as sent to clients"""
+        entries = Data.get_redis_client().xrevrange(self._key(room_id), count=count)
+        return [
+            {
+                "version": int(fields["version"]),
+                "type": fields["type"],
+                "data": json.loads(fields["data"]),
+                "at": int(entry_id.split("-")[0]) / 1000
+            }
+            for entry_id, fields in reversed(entries)
+            if "version" in fields
+        ]
+
+    def events_since(self, room_id, version, current):
+        """Events after `version` up to `current`, or None if a snapshot is needed instead"""
+        if not 0 <= current - version <= self.history:
+            return None
+        if current == version:
+            return []
+        try:
+            # A little slack for unversioned entries (e.g. game_ended) at the end
+            return events_since(self.recent(room_id, current - version + 1), version, current)
+        except redis.RedisError:
+            logger.warning("Could not read events of game %s", room_id)
+            return None
+
+    def replay(self, room_id):
+        """Rebuild a game session from its stream"""
+        return replay_events(self.read(room_id))
+
+    def room_ids(self):
+        """Games with a logged event stream"""
+        redis_client = Data.get_redis_client()
+        return [
+            key[len(STREAM_KEY_PREFIX):]
+            for key in redis_client.scan_iter(match=f"{STREAM_KEY_PREFIX}*", count=500, _type="stream")
+        ]
+
+    def is_finished(self, room_id, max_idle=None):
+        """Whether the game is over, or (with `max_idle`) has logged nothing for that many seconds"""
+        last = Data.get_redis_client().xrevrange(self._key(room_id), count=1)
+        if not last:
+            return False
+        entry_id, fields = last[0]
+        if fields["type"] in FINAL_EVENTS:
+            return True
+        return max_idle is not None and time.time() - int(entry_id.split("-")[0]) / 1000 > max_idle
+
+    def archive(self, room_id):
+        """Move a game's events to a gzip file and drop the stream; returns the file path"""
+        events = self.read(room_id)
+        if not events:
+            return None
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"{room_id}-{int(time.time())}.json.gz")
+        with gzip.open(path, "wt", encoding="utf-8") as archive:
+            json.dump({
+                "room_id": room_id,
+                "events": [
+                    {"type": event_type, "data": data, "state": state}
+                    for event_type, data, state in events
+                ]
+            }, archive, separators=(",", ":"))
+        Data.get_redis_client().delete(self._key(room_id))
+        return path
+
+    def archive_finished(self, max_idle=None):
+        """Archive every game whose stream ends with the game being over, or idle for `max_idle` seconds"""
+        archived = []
+        for room_id in self.room_ids():
+            try:
+                if self.is_finished(room_id, max_idle):
+                    path = self.archive(room_id)
+                    if path:
+                        archived.append(path)
+            except (redis.RedisError, OSError):
+                logger.exception("Could not archive game %s", room_id)
+        return archived
+
+
+def load_archive(path):
+    """Read back an archived game as (type, data, state) events"""
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        return [(event["type"], event["data"], event["state"]) for event in json.load(archive)["events"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("archive",))
+    parser.add_argument("--archive-dir", default=Config.GAME_ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=Config.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    event_log = GameEventLog(Config.GAME_EVENT_STREAM_MAXLEN, args.archive_dir, Config.GAME_EVENT_HISTORY,
+                             Config.GAME_EVENT_STREAM_TTL_SECONDS)
+    for path in event_log.archive_finished(Config.GAME_REPLAY_MAX_IDLE_SECONDS):
+        logger.info("Archived %s", path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+from prompts import SUSTAINABILITY_THEMES, get_theme_name
+from scoring import HeuristicScorer, TIMEOUT_DECISION, clamp
+
+DEFAULT_NEXT_DECISION_POINT = "What should the team do next? Consider the current crisis level and work together to find solutions."
+
+
+class StoryGenerator:
+    """Template-based stand-in for the AI story, crisis and summary prompts"""
+
+    def __init__(self, scorer=None):
+        self.scorer = scorer or HeuristicScorer()
+
+    def initial_scenario(self, theme, player_count):
+        theme_info = SUSTAINABILITY_THEMES.get(theme) if isinstance(theme, str) else None
+        theme_info = theme_info or SUSTAINABILITY_THEMES["climate_change"]
+        theme_name = get_theme_name(theme)
+
+        roles = {}
+        for i, role_name in enumerate(theme_info["roles"][:max(player_count, 1)], 1):
+            roles[f"player{i}"] = {
+                "role_name": role_name,
+                "description": f"Use your skills as a {role_name} to help the team through {theme_name}."
+            }
+
+        return {
+            "scenario": f"{theme_info['scenario_focus']}. Trouble is spreading fast in {theme_name} and the team has to act now.",
+            "roles": roles,
+            "initial_crisis_score": 50,
+            "next_decision_point": "What should the team do first?",
+            "fallback": True
+        }
+
+    def crisis_update(self, current_crisis_score, all_player_responses):
+        totals = [
+            self.scorer.score(None, response, "")["total_individual_score"]
+            for response in all_player_responses.values()
+        ]
+        average = sum(totals) / len(totals) if totals else 0
+        score_change = int(clamp(round((average - 40) / 4), -15, 15))
+        new_score = int(clamp(current_crisis_score + score_change, 0, 100))
+
+        if score_change > 0:
+            collaboration = "The team pulled in the same direction."
+        elif score_change < 0:
+            collaboration = "The team struggled to coordinate."
+        else:
+            collaboration = "The team had mixed results."
+
+        return {
+            "new_crisis_score": new_score,
+            "score_change": f"{score_change:+d}",
+            "team_collaboration": collaboration,
+            "reasoning": "Estimated locally while AI analysis is unavailable",
+            "fallback": True
+        }
+
+    def story_continuation(self, crisis_score, all_responses, round_number):
+        actions = [
+            f"{player} chose to {self._summarize(response)}"
+            for player, response in all_responses.items()
+            if response and response != TIMEOUT_DECISION
+        ]
+        if actions:
+            outcome = "; ".join(actions) + "."
+        else:
+            outcome = "Nobody acted in time and the situation drifted."
+
+        if crisis_score >= 60:
+            mood = "The plan is working and things are calming down, but a new complication appears."
+        elif crisis_score <= 40:
+            mood = "Despite the effort, the crisis is getting worse and pressure is mounting."
+        else:
+            mood = "The situation is holding steady, but nothing is settled yet."
+
+        return {
+            "story_continuation": f"Round {round_number}: {outcome} {mood}",
+            "next_decision_point": DEFAULT_NEXT_DECISION_POINT,
+            "fallback": True
+        }
+
+    def final_scores(self, final_crisis_score, total_rounds):
+        if final_crisis_score >= 80:
+            outcome = "The team resolved the crisis."
+        elif final_crisis_score <= 20:
+            outcome = "The crisis escalated beyond control."
+        else:
+            outcome = "The crisis was contained but not fully resolved."
+
+        return {
+            "game_summary": f"The team played {total_rounds} round(s) and finished with a crisis score of {final_crisis_score}/100.",
+            "crisis_outcome": outcome,
+            "team_highlights": "Every decision counted towards the final result.",
+            "fallback": True
+        }
+
+    def _summarize(self, response, max_words=12):
+        words = str(response).split()
+        summary = " ".join(words[:max_words])
+        if len(words) > max_words:
+            summary += "..."
+        return summary[:1].lower() + summary[1:]
@@ -0,0 +1,47 @@
+def next_version(game_session):
+    """Bump the session's state version; returns the version of the new event"""
+    version = game_session.get("version", 0) + 1
+    game_session["version"] = version
+    return version
+
+
+def events_since(events, version, current):
+    """Events after `version` in order, or None if `events` no longer reach back that far"""
+    if version > current:
+        return None
+    missed = [event for event in events if event["version"] > version]
+    if len(missed) != current - version:
+        return None
+    return missed
+
+
+def round_summary(history_entry):
+    """Compact view of a finished round from the game history"""
+    return {
+        "round": history_entry["round"],
+        "decisions": history_entry.get("decisions", {}),
+        "individual_scores": history_entry.get("individual_scores", {}),
+        "round_scores": history_entry.get("round_scores", {}),
+        "crisis_score": history_entry.get("crisis_update", {}).get("new_crisis_score"),
+        "story_continuation": history_entry.get("story_continuation", {}).get("story_continuation", "")
+    }
+
+
+def game_snapshot(game_session, username, time_remaining=None):
+    """Everything a (re)connecting player needs to rebuild the game screen"""
+    return {
+        "version": game_session.get("version", 0),
+        "scenario": game_session["scenario"],
+        "crisis_score": game_session["crisis_score"],
+        "current_round": game_session["current_round"],
+        "max_rounds": game_session["max_rounds"],
+        "game_state": game_session["game_state"],
+        "player_role": game_session["player_roles"].get(username, {}),
+        "remaining_decisions": len(game_session["players"]) - len(game_session["player_decisions"]),
+        "theme": game_session["theme"],
+        "players": game_session["players"],
+        "submitted_decisions": game_session["player_decisions"],
+        "player_total_scores": game_session["player_total_scores"],
+        "rounds": [round_summary(entry) for entry in game_session["game_history"]],
+        "time_remaining": time_remaining
+    }
@@ -0,0 +1,89 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
+
+from profiling import in_trace
+
+
+class IncrementalScorer:
+    """Scores decisions in the background as soon as they are submitted.
+
+    Pending scores are keyed by (room, player). A resubmission cancels the
+    previous score (or discards its result if it is already running) and
+    starts a new one, so `collect` at the end of the round only waits for
+    whatever is still outstanding.
+    """
+
+    def __init__(self, max_workers=16):
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="scoring")
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.stats = {"submitted": 0, "resubmitted": 0, "reused": 0, "scored_at_collect": 0, "timed_out": 0}
+
+    def submit(self, room_id, username, round_number, decision, score):
+        """Start scoring a decision with `score()` in the background"""
+        key = (room_id, username)
+        with self.lock:
+            entry = self.pending.get(key)
+            if entry and entry["round"] == round_number and entry["decision"] == decision:
+                return
+            if entry:
+                entry["future"].cancel()
+                self.stats["resubmitted"] += 1
+            self.pending[key] = {
+                "round": round_number,
+                "decision": decision,
+                "future": self.executor.submit(score)
+            }
+            self.stats["submitted"] += 1
+
+    def collect(self, room_id, round_number, decisions, score_for, timeout=None, on_result=None):
+        """Wait for the scores of every decision in `decisions`.
+
+        Decisions that were never scored, or whose background score is stale,
+        are scored now with `score_for(username, decision)`. Returns a dict of
+        username -> score result; scores not ready within `timeout` seconds
+        come back as `{"error": ...}`. `on_result(username, result)` is called
+        as each score becomes available.
+        """
+        futures = {}
+        with self.lock:
+            for username, decision in decisions.items():
+                entry = self.pending.pop((room_id, username), None)
+                if entry and entry["round"] == round_number and entry["decision"] == decision:
+                    futures[entry["future"]] = username
+                    self.stats["reused"] += 1
+                    continue
+                if entry:
+                    entry["future"].cancel()
+                futures[self.executor.submit(in_trace(score_for), username, decision)] = username
+                self.stats["scored_at_collect"] += 1
+
+        results = {}
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                username = futures[future]
+                try:
+                    results[username] = future.result()
+                except Exception as e:
+                    results[username] = {"error": f"Scoring failed: {str(e)}"}
+                if on_result:
+                    on_result(username, results[username])
+        except FuturesTimeoutError:
+            for future, username in futures.items():
+                if username in results:
+                    continue
+                future.cancel()
+                with self.lock:
+                    self.stats["timed_out"] += 1
+                results[username] = {"error": "Scoring did not finish before the round deadline"}
+        return results
+
+    def discard(self, room_id):
+        """Cancel every pending score for a room (e.g. when its game ends)"""
+        with self.lock:
+            for key in [key for key in self.pending if key[0] == room_id]:
+                self.pending.pop(key)["future"].cancel()
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, pending=len(self.pending))
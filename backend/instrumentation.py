@@ -0,0 +1,142 @@
+import functools
+import inspect
+import time
+
+from flask import g, request
+
+from metrics import Counter, Gauge, Histogram
+
+# Seconds; socket handlers, routes and Redis calls are mostly sub-millisecond to tens of ms
+FAST_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+SOCKET_EVENTS = Counter(
+    "socketio_events_total",
+    "Socket.IO events handled by event and outcome",
+    ("event", "outcome")
+)
+SOCKET_EVENT_DURATION = Histogram(
+    "socketio_event_duration_seconds",
+    "Socket.IO handler latency",
+    ("event",),
+    buckets=FAST_LATENCY_BUCKETS
+)
+SOCKET_CONNECTIONS = Gauge(
+    "socketio_connections",
+    "Socket.IO clients connected to this worker"
+)
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route, method and status",
+    ("route", "method", "status")
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ("route", "method"),
+    buckets=FAST_LATENCY_BUCKETS
+)
+REDIS_CALLS = Counter(
+    "redis_data_calls_total",
+    "Data layer calls by method and outcome",
+    ("method", "outcome")
+)
+REDIS_CALL_DURATION = Histogram(
+    "redis_data_call_duration_seconds",
+    "Data layer latency (Redis round trips included) by method",
+    ("method",),
+    buckets=FAST_LATENCY_BUCKETS
+)
+GAMES_ACTIVE = Gauge("games_active", "Game sessions currently stored")
+LOBBY_ROOMS = Gauge("lobby_rooms", "Rooms open for players to join")
+ROOM_TASKS = Gauge("room_tasks", "Background room work by state", ("state",))
+PLAYERS_ONLINE = Gauge("players_online", "Usernames with a live connection on any worker")
+TIMERS_SCHEDULED = Gauge("scheduled_timers", "Round, speculation and auto-exit timers pending")
+ADMISSION_SLOTS = Gauge("admission_slots", "Game starts and rounds admitted to the AI or waiting", ("kind", "state"))
+ADMISSION_SHED = Counter("admission_shed_total", "Starts and rounds switched to local generation under load", ("kind",))
+
+
+def _positional_limit(handler):
+    """How many positional arguments `handler` accepts (None for *args)"""
+    parameters = inspect.signature(handler).parameters.values()
+    if any(parameter.kind == parameter.VAR_POSITIONAL for parameter in parameters):
+        return None
+    return sum(
+        1 for parameter in parameters
+        if parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD)
+    )
+
+
+def instrument_handler(event, handler):
+    """Wrap a Socket.IO handler to count it and time it"""
+    limit = _positional_limit(handler)
+    events_ok = SOCKET_EVENTS.labels(event=event, outcome="ok")
+    events_error = SOCKET_EVENTS.labels(event=event, outcome="error")
+    duration = SOCKET_EVENT_DURATION.labels(event=event)
+
+    @functools.wraps(handler)
+    def wrapper(*args):
+        # Socket.IO passes extras (e.g. the connect auth payload) the handler may not take
+        if limit is not None:
+            args = args[:limit]
+        start = time.perf_counter()
+        try:
+            result = handler(*args)
+        except Exception:
+            events_error.inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - start)
+        events_ok.inc()
+        return result
+
+    return wrapper
+
+
+def instrument_app(app):
+    """Count and time every Flask route by its URL rule"""
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, route=route, method=request.method)
+            HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+        return response
+
+
+def _timed(name, function):
+    calls_ok = REDIS_CALLS.labels(method=name, outcome="ok")
+    calls_error = REDIS_CALLS.labels(method=name, outcome="error")
+    duration = REDIS_CALL_DURATION.labels(method=name)
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        except Exception:
+            calls_error.inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - start)
+        calls_ok.inc()
+        return result
+
+    wrapper.instrumented = True
+    return wrapper
+
+
+def instrument_static_methods(cls, skip=()):
+    """Time every static method of a data-access class such as `Data`"""
+    for name, attribute in list(vars(cls).items()):
+        if not isinstance(attribute, staticmethod) or name in skip or name.startswith("_"):
+            continue
+        function = attribute.__func__
+        if getattr(function, "instrumented", False):
+            continue
+        setattr(cls, name, staticmethod(_timed(name, function)))
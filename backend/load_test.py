@@ -0,0 +1,346 @@
+"""Headless multiplayer load test for the Socket.IO server.
+
+Plays --games concurrent games with --players simulated clients each:
+login through /login, create and join a room, start_game, submit_decision
+every round after a random think time, and optionally end_game early.
+Reports latency percentiles per step, throughput and error rates.
+
+The simulated clients need the Socket.IO client with WebSocket support
+(pip install -r requirements-dev.txt).
+
+Against a running server (AI pointed at mock_provider.py):
+
+    python load_test.py --url http://127.0.0.1:5001 --games 50 --players 4
+
+Or let the harness start the mock provider and one server worker itself.
+Rooms always live in Redis, so the spawned worker must be pointed at a
+test Redis explicitly; it never falls back to the production REDIS_* defaults:
+
+    REDIS_HOST=127.0.0.1 REDIS_PORT=6379 python load_test.py --spawn --games 20
+"""
+import argparse
+import collections
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import requests
+import socketio
+
+DECISIONS = (
+    "I reroute emergency power to the shelters and coordinate with the medical team",
+    "We split into two groups, one evacuating civilians and one containing the damage",
+    "I share my resources with the team and scout ahead for the safest route",
+    "Let's pool our supplies, set up a command post and assign clear roles",
+    "I negotiate with the local leaders so everyone works toward the same plan",
+)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, math.ceil(q * len(values)) - 1))]
+
+
+class LoadStats:
+    """Latencies and failures per step, shared by every simulated client"""
+
+    def __init__(self):
+        self.latencies = collections.defaultdict(list)
+        self.errors = collections.Counter()
+        self.notifications = collections.Counter()
+        self.games = collections.Counter()
+        self.lock = threading.Lock()
+
+    def record(self, step, seconds):
+        with self.lock:
+            self.latencies[step].append(seconds)
+
+    def error(self, step):
+        with self.lock:
+            self.errors[step] += 1
+
+    def notification(self, message):
+        with self.lock:
+            self.notifications[message] += 1
+
+    def game(self, outcome):
+        with self.lock:
+            self.games[outcome] += 1
+
+    def summary(self, elapsed):
+        with self.lock:
+            steps = {}
+            for step in sorted(set(self.latencies) | set(self.errors)):
+                values = sorted(self.latencies[step])
+                attempts = len(values) + self.errors[step]
+                steps[step] = {
+                    "count": len(values),
+                    "errors": self.errors[step],
+                    "error_rate": round(self.errors[step] / attempts, 4) if attempts else 0.0,
+                    "throughput": round(len(values) / elapsed, 3) if elapsed else 0.0,
+                    "p50": round(percentile(values, 0.5), 4),
+                    "p95": round(percentile(values, 0.95), 4),
+                    "p99": round(percentile(values, 0.99), 4),
+                    "max": round(values[-1], 4) if values else 0.0
+                }
+            return {
+                "elapsed": round(elapsed, 3),
+                "games": dict(self.games),
+                "steps": steps,
+                "notifications": dict(self.notifications.most_common(20))
+            }
+
+
+class SimulatedPlayer:
+    """One Socket.IO client that remembers how many of each event it has received"""
+
+    def __init__(self, url, username, stats, timeout):
+        self.url = url
+        self.username = username
+        self.stats = stats
+        self.timeout = timeout
+        self.received = collections.Counter()
+        self.payloads = {}
+        self.condition = threading.Condition()
+        self.client = socketio.Client(reconnection=False)
+        self.client.on("*", self._on_event)
+
+    def _on_event(self, event, *args):
+        if event == "notification" and args:
+            self.stats.notification(args[0].get("message", ""))
+        with self.condition:
+            self.received[event] += 1
+            self.payloads[event] = args[0] if args else None
+            self.condition.notify_all()
+
+    def mark(self, *events):
+        """Current counts, to wait for the next occurrence of any of `events`"""
+        with self.condition:
+            return {event: self.received[event] for event in events}
+
+    def wait(self, marks):
+        """Wait until one of the marked events arrives again; returns its name"""
+        deadline = time.monotonic() + self.timeout
+        with self.condition:
+            while True:
+                for event, count in marks.items():
+                    if self.received[event] > count:
+                        return event
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"{self.username} waited too long for {', '.join(marks)}")
+                self.condition.wait(remaining)
+
+    def login(self):
+        start = time.perf_counter()
+        response = requests.post(f"{self.url}/login", json={"username": self.username}, timeout=self.timeout)
+        response.raise_for_status()
+        self.stats.record("login", time.perf_counter() - start)
+
+    def connect(self):
+        start = time.perf_counter()
+        self.client.connect(f"{self.url}?username={self.username}", transports=["websocket"],
+                            wait_timeout=self.timeout)
+        self.stats.record("connect", time.perf_counter() - start)
+
+    def call(self, event, data):
+        """Emit an event and wait for the server to finish handling it"""
+        start = time.perf_counter()
+        self.client.call(event, data, timeout=self.timeout)
+        self.stats.record(event, time.perf_counter() - start)
+
+    def disconnect(self):
+        try:
+            self.client.disconnect()
+        except Exception:
+            pass
+
+
+def play_game(index, args, stats, run_id):
+    """Play one game from login to game_ended; returns True if it finished"""
+    room_id = f"load-{run_id}-{index}"
+    players = [
+        SimulatedPlayer(args.url, f"load_{run_id}_{index}_{number}", stats, args.timeout)
+        for number in range(args.players)
+    ]
+    host = players[0]
+    step = "login"
+    try:
+        for player in players:
+            player.login()
+        step = "connect"
+        for player in players:
+            player.connect()
+
+        step = "join"
+        for number, player in enumerate(players):
+            marks = player.mark("room-joined")
+            start = time.perf_counter()
+            if number == 0:
+                player.call("join", {
+                    "username": player.username, "room": room_id, "option": "create",
+                    "roomName": f"Load test {index}", "roomTheme": args.theme, "maxPlayers": args.players
+                })
+            else:
+                player.call("join", {"username": player.username, "room": room_id, "option": "join"})
+            player.wait(marks)
+            stats.record("room_joined", time.perf_counter() - start)
+
+        step = "start_game"
+        marks = host.mark("game_started")
+        start = time.perf_counter()
+        host.call("start_game", {"room_id": room_id, "username": host.username})
+        host.wait(marks)
+        stats.record("game_started", time.perf_counter() - start)
+
+        for round_number in range(1, args.rounds + 1):
+            if args.end_after and round_number > args.end_after:
+                step = "end_game"
+                marks = host.mark("game_ended")
+                start = time.perf_counter()
+                host.call("end_game", {"room_id": room_id, "username": host.username})
+                host.wait(marks)
+                stats.record("game_ended", time.perf_counter() - start)
+                break
+
+            step = "submit_decision"
+            marks = host.mark("round_completed", "game_ended")
+            waited = 0.0
+            thinks = sorted(
+                ((random.uniform(args.think_min, args.think_max), player) for player in players),
+                key=lambda item: item[0]
+            )
+            for think, player in thinks:
+                time.sleep(max(0.0, think - waited))
+                waited = max(waited, think)
+                player.call("submit_decision", {
+                    "room_id": room_id, "username": player.username, "decision": random.choice(DECISIONS)
+                })
+
+            step = "round"
+            start = time.perf_counter()
+            outcome = host.wait(marks)
+            stats.record("round_completed" if outcome == "round_completed" else "game_ended",
+                         time.perf_counter() - start)
+            if outcome == "game_ended":
+                break
+        stats.game("finished")
+        return True
+    except Exception:
+        stats.error(step)
+        stats.game("failed")
+        return False
+    finally:
+        for player in players:
+            player.disconnect()
+
+
+def wait_for_server(url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"{url}/metrics", timeout=1)
+            return True
+        except requests.RequestException:
+            time.sleep(0.2)
+    return False
+
+
+def spawn(args):
+    """Start the mock AI provider and one server worker for the test"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    port = int(args.url.rsplit(":", 1)[-1])
+    mock = subprocess.Popen([
+        sys.executable, os.path.join(here, "mock_provider.py"),
+        "--port", str(args.mock_port), "--latency-mean", str(args.mock_latency), "--seed", "1"
+    ])
+    env = dict(
+        os.environ,
+        AI_PROVIDER="mistral",
+        MISTRAL_BASE_URL=f"http://127.0.0.1:{args.mock_port}/v1/chat/completions",
+        GAME_STATE_BACKEND=args.store,
+        LOG_LEVEL=os.environ.get("LOG_LEVEL", "WARNING")
+    )
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(here, "workers.py"), "--workers", "1", "--host", "127.0.0.1", "--port", str(port)],
+        env=env
+    )
+    return [server, mock]
+
+
+def print_report(report):
+    print(f"\n{report['elapsed']}s, games: {report['games']}")
+    print(f"{'step':<18}{'count':>8}{'errors':>8}{'per sec':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for step, values in report["steps"].items():
+        print(f"{step:<18}{values['count']:>8}{values['errors']:>8}{values['throughput']:>10}"
+              f"{values['p50']:>9}{values['p95']:>9}{values['p99']:>9}{values['max']:>9}")
+    if report["notifications"]:
+        print("\nServer notifications:")
+        for message, count in report["notifications"].items():
+            print(f"{count:>8}  {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5001")
+    parser.add_argument("--games", type=int, default=10, help="concurrent games")
+    parser.add_argument("--players", type=int, default=4, help="players per game (2-4)")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--end-after", type=int, default=0, help="host ends the game after this many rounds")
+    parser.add_argument("--think-min", type=float, default=1.0, help="seconds before a player submits")
+    parser.add_argument("--think-max", type=float, default=5.0)
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="seconds over which games are started")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for any server response")
+    parser.add_argument("--theme", type=json.loads,
+                        default={"id": "space", "name": "Space Station", "intro_msg": "Load test"})
+    parser.add_argument("--spawn", action="store_true", help="start mock_provider.py and a server worker")
+    parser.add_argument("--store", choices=("redis", "memory"), default="memory", help="game sessions with --spawn")
+    parser.add_argument("--mock-port", type=int, default=8001)
+    parser.add_argument("--mock-latency", type=float, default=0.5)
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+    if args.spawn and not os.environ.get("REDIS_HOST"):
+        parser.error("--spawn needs REDIS_HOST (and REDIS_PORT etc.) set to a test Redis")
+
+    processes = spawn(args) if args.spawn else []
+    try:
+        if not wait_for_server(args.url, 30):
+            parser.error(f"server at {args.url} is not responding")
+
+        stats = LoadStats()
+        run_id = uuid.uuid4().hex[:6]
+        threads = []
+        start = time.perf_counter()
+        for index in range(args.games):
+            thread = threading.Thread(target=play_game, args=(index, args, stats, run_id), daemon=True)
+            thread.start()
+            threads.append(thread)
+            time.sleep(args.ramp_up / max(1, args.games))
+        for thread in threads:
+            thread.join()
+        report = stats.summary(time.perf_counter() - start)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
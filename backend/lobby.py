@@ -0,0 +1,162 @@
+import json
+import logging
+import threading
+
+from data import Data
+
+logger = logging.getLogger("odyssey.lobby")
+
+# Socket.IO rooms for lobby subscribers
+LOBBY_ROOM = "lobby"
+LOBBY_DELTA_ROOM = "lobby:deltas"
+
+LOBBY_ROOMS_KEY = "lobby:rooms"
+LOBBY_VERSION_KEY = "lobby:version"
+LOBBY_DELTAS_KEY = "lobby:deltas"
+LOBBY_REBUILD_LOCK = "lobby:rebuild"
+
+
+class LobbyBroadcaster:
+    """Coalesces room list changes into versioned lobby updates.
+
+    Changed rooms are collected for `window` seconds and then diffed against
+    the lobby listing kept in Redis (`lobby:rooms`), so a flush costs one
+    lookup per changed room instead of a scan of every room. Each flush
+    bumps the shared lobby version, is logged to a capped delta list and is
+    sent once to the lobby Socket.IO rooms: delta subscribers get the
+    changes, clients that asked for plain lists get the new snapshot.
+    """
+
+    def __init__(self, socket, window=0.25, history=200):
+        self.socket = socket
+        self.window = window
+        self.history = history
+        self.dirty = set()
+        self.resync = False
+        self.flush_pending = False
+        self.lock = threading.Lock()
+
+    def rebuild(self):
+        """Rebuild the lobby listing from the rooms in Redis"""
+        rooms = Data.get_rooms()
+        redis_client = Data.get_redis_client()
+        pipeline = redis_client.pipeline()
+        pipeline.delete(LOBBY_ROOMS_KEY)
+        if rooms:
+            pipeline.hset(LOBBY_ROOMS_KEY, mapping={room["room_id"]: json.dumps(room) for room in rooms})
+        pipeline.incr(LOBBY_VERSION_KEY)
+        pipeline.delete(LOBBY_DELTAS_KEY)
+        pipeline.execute()
+
+    def ensure(self):
+        """Make sure the lobby listing exists, for a starting worker.
+
+        Only a worker that finds the listing missing rebuilds it, under a lock so
+        workers starting together build it once. Otherwise the listing other
+        workers are serving is kept, with its version and delta history, and a
+        resync catches up on rooms changed while no worker was running.
+        """
+        redis_client = Data.get_redis_client()
+        if not redis_client.exists(LOBBY_VERSION_KEY):
+            with redis_client.lock(LOBBY_REBUILD_LOCK, timeout=30, blocking_timeout=10):
+                if not redis_client.exists(LOBBY_VERSION_KEY):
+                    self.rebuild()
+                    return
+        self.room_changed()
+
+    def room_changed(self, room_id=None):
+        """Mark a room as changed; None means any room may have changed"""
+        with self.lock:
+            if room_id is None:
+                self.resync = True
+            else:
+                self.dirty.add(room_id)
+            if self.flush_pending:
+                return
+            self.flush_pending = True
+        self.socket.start_background_task(self._flush_later)
+
+    def _flush_later(self):
+        self.socket.sleep(self.window)
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Lobby flush failed")
+
+    def flush(self):
+        with self.lock:
+            dirty, self.dirty = self.dirty, set()
+            resync, self.resync = self.resync, False
+            self.flush_pending = False
+        if not dirty and not resync:
+            return
+
+        redis_client = Data.get_redis_client()
+        if resync:
+            current = {room["room_id"]: room for room in Data.get_rooms()}
+            previous = {
+                room_id: json.loads(room)
+                for room_id, room in redis_client.hgetall(LOBBY_ROOMS_KEY).items()
+            }
+            room_ids = set(current) | set(previous)
+        else:
+            room_ids = sorted(dirty)
+            current = Data.get_lobby_rooms(room_ids)
+            previous = {
+                room_id: json.loads(room)
+                for room_id, room in zip(room_ids, redis_client.hmget(LOBBY_ROOMS_KEY, room_ids))
+                if room
+            }
+
+        changes = []
+        for room_id in room_ids:
+            before, after = previous.get(room_id), current.get(room_id)
+            if after and not before:
+                changes.append({"type": "room_added", "room": after})
+            elif after and after != before:
+                changes.append({"type": "room_updated", "room": after})
+            elif before and not after:
+                changes.append({"type": "room_removed", "room_id": room_id})
+        if not changes:
+            return
+
+        version = redis_client.incr(LOBBY_VERSION_KEY)
+        delta = {"version": version, "changes": changes}
+        pipeline = redis_client.pipeline()
+        for change in changes:
+            if change["type"] == "room_removed":
+                pipeline.hdel(LOBBY_ROOMS_KEY, change["room_id"])
+            else:
+                pipeline.hset(LOBBY_ROOMS_KEY, change["room"]["room_id"], json.dumps(change["room"]))
+        pipeline.rpush(LOBBY_DELTAS_KEY, json.dumps(delta))
+        pipeline.ltrim(LOBBY_DELTAS_KEY, -self.history, -1)
+        pipeline.hvals(LOBBY_ROOMS_KEY)
+        rooms = [json.loads(room) for room in pipeline.execute()[-1]]
+
+        self.socket.emit("lobby-delta", delta, to=LOBBY_DELTA_ROOM)
+        self.socket.emit("available-rooms", {"rooms": rooms, "version": version}, to=LOBBY_ROOM)
+
+    def snapshot(self):
+        """Current (version, rooms) of the lobby"""
+        redis_client = Data.get_redis_client()
+        pipeline = redis_client.pipeline()
+        pipeline.get(LOBBY_VERSION_KEY)
+        pipeline.hvals(LOBBY_ROOMS_KEY)
+        version, rooms = pipeline.execute()
+        return int(version or 0), [json.loads(room) for room in rooms]
+
+    def room_count(self):
+        return Data.get_redis_client().hlen(LOBBY_ROOMS_KEY)
+
+    def deltas_since(self, version):
+        """Deltas after `version` in order, or None if they are no longer all available"""
+        redis_client = Data.get_redis_client()
+        deltas = sorted(
+            (json.loads(delta) for delta in redis_client.lrange(LOBBY_DELTAS_KEY, 0, -1)),
+            key=lambda delta: delta["version"]
+        )
+        missed = [delta for delta in deltas if delta["version"] > version]
+        current = int(redis_client.get(LOBBY_VERSION_KEY) or 0)
+        if version > current or [delta["version"] for delta in missed] != list(range(version + 1, current + 1)):
+            return None
+        return missed
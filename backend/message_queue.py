@@ -0,0 +1,40 @@
+from urllib.parse import quote
+
+from flask_socketio import SocketIO
+
+from config import Config
+
+
+def redis_url(config=Config):
+    """Redis URL for the configured REDIS_* connection"""
+    auth = ""
+    if config.REDIS_PASSWORD:
+        auth = f"{quote(config.REDIS_USERNAME or '', safe='')}:{quote(config.REDIS_PASSWORD, safe='')}@"
+    return f"redis://{auth}{config.REDIS_HOST}:{config.REDIS_PORT}/{config.REDIS_DB}"
+
+
+def get_message_queue(config=Config):
+    """Message queue URL for Socket.IO fan-out, or None when running a single process.
+
+    SOCKETIO_MESSAGE_QUEUE may be "redis" (use the REDIS_* connection) or any
+    URL python-socketio understands (redis://, rediss://, or a kombu URL such
+    as amqp:// for a local broker).
+    """
+    queue = config.SOCKETIO_MESSAGE_QUEUE
+    if not queue:
+        return None
+    if queue == "redis":
+        return redis_url(config)
+    return queue
+
+
+def create_external_emitter(config=Config):
+    """Write-only Socket.IO handle for processes that are not serving clients.
+
+    Emits go through the message queue to whichever worker holds the
+    recipients, e.g. `create_external_emitter().emit("notification", data, to=room_id)`.
+    """
+    queue = get_message_queue(config)
+    if not queue:
+        raise ValueError("SOCKETIO_MESSAGE_QUEUE must be set to emit from outside the server")
+    return SocketIO(message_queue=queue, channel=config.SOCKETIO_CHANNEL)
@@ -0,0 +1,274 @@
+import bisect
+import math
+import threading
+
+# Seconds; covers fast local work up to slow LLM calls
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+
+class Metric:
+    """Base class for labelled metrics kept in a registry"""
+
+    metric_type = "untyped"
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        self.lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        child = self.children.get(key)
+        if child is None:
+            with self.lock:
+                child = self.children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self.children[key] = child
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self):
+        """Yield (labels dict, child) pairs"""
+        with self.lock:
+            items = list(self.children.items())
+        for key, child in items:
+            yield dict(zip(self.labelnames, key)), child
+
+
+class _Sharded:
+    """Striped cells, so hot paths on different threads rarely share a lock.
+
+    A thread writes to the stripe picked by its id, under that stripe's own
+    lock; readers sum the stripes. The number of stripes is fixed, so cells
+    do not pile up as worker threads come and go.
+    """
+
+    STRIPES = 16
+
+    def __init__(self):
+        self.shards = [self._new_shard() for _ in range(self.STRIPES)]
+        self.locks = [threading.Lock() for _ in range(self.STRIPES)]
+
+    def _stripe(self):
+        return threading.get_native_id() % self.STRIPES
+
+    def _shard_list(self):
+        return self.shards
+
+
+class _CounterChild(_Sharded):
+    def _new_shard(self):
+        return [0.0]
+
+    def inc(self, amount=1):
+        stripe = self._stripe()
+        with self.locks[stripe]:
+            self.shards[stripe][0] += amount
+
+    def get(self):
+        return sum(shard[0] for shard in self._shard_list())
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1, **labels):
+        self.labels(**labels).inc(amount)
+
+
+class _GaugeChild:
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        with self.lock:
+            self.value = value
+
+    def set_function(self, function):
+        """Read the value from `function()` at collection time instead"""
+        self.function = function
+
+    def get(self):
+        if self.function is not None:
+            try:
+                return float(self.function())
+            except Exception:
+                return math.nan
+        return self.value
+
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value, **labels):
+        self.labels(**labels).set(value)
+
+    def set_function(self, function, **labels):
+        self.labels(**labels).set_function(function)
+
+
+class _HistogramChild(_Sharded):
+    def __init__(self, buckets):
+        self.buckets = buckets
+        super().__init__()
+
+    def _new_shard(self):
+        # Bucket counts, then the total count and sum
+        return [0] * (len(self.buckets) + 1) + [0, 0.0]
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        stripe = self._stripe()
+        with self.locks[stripe]:
+            shard = self.shards[stripe]
+            shard[index] += 1
+            shard[-2] += 1
+            shard[-1] += value
+
+    def snapshot(self):
+        counts = [0] * (len(self.buckets) + 1)
+        count, total = 0, 0.0
+        for shard in self._shard_list():
+            for index in range(len(counts)):
+                counts[index] += shard[index]
+            count += shard[-2]
+            total += shard[-1]
+        return counts, count, total
+
+    def quantile(self, q, counts=None, count=None):
+        """Estimate a quantile by linear interpolation inside the bucket"""
+        if counts is None:
+            counts, count, _ = self.snapshot()
+        if not count:
+            return 0.0
+        target = q * count
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= target and bucket_count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (target - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value, **labels):
+        self.labels(**labels).observe(value)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        with self.lock:
+            self.metrics[metric.name] = metric
+
+    def get(self, name):
+        return self.metrics.get(name)
+
+    def snapshot(self, prefix=""):
+        """JSON-friendly view of every metric whose name starts with `prefix`"""
+        with self.lock:
+            metrics = [metric for name, metric in sorted(self.metrics.items()) if name.startswith(prefix)]
+
+        result = {}
+        for metric in metrics:
+            samples = []
+            for labels, child in metric.samples():
+                if metric.metric_type == "histogram":
+                    counts, count, total = child.snapshot()
+                    samples.append({
+                        "labels": labels,
+                        "count": count,
+                        "sum": round(total, 6),
+                        "average": round(total / count, 6) if count else 0.0,
+                        "p50": round(child.quantile(0.5, counts, count), 6),
+                        "p95": round(child.quantile(0.95, counts, count), 6),
+                        "p99": round(child.quantile(0.99, counts, count), 6)
+                    })
+                else:
+                    samples.append({"labels": labels, "value": child.get()})
+            result[metric.name] = {
+                "type": metric.metric_type,
+                "help": metric.documentation,
+                "samples": samples
+            }
+        return result
+
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        with self.lock:
+            metrics = [metric for _, metric in sorted(self.metrics.items())]
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            for labels, child in metric.samples():
+                if metric.metric_type != "histogram":
+                    lines.append(f"{metric.name}{_labels(labels)} {_number(child.get())}")
+                    continue
+                counts, count, total = child.snapshot()
+                cumulative = 0
+                for bound, bucket_count in zip(metric.buckets + (math.inf,), counts):
+                    cumulative += bucket_count
+                    lines.append(f"{metric.name}_bucket{_labels(labels, le=_number(bound))} {cumulative}")
+                lines.append(f"{metric.name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{metric.name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    if value != value:
+        return "NaN"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _labels(labels, **extra):
+    labels = {**labels, **extra}
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+REGISTRY = Registry()
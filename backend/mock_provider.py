@@ -0,0 +1,400 @@
+"""Local mock of the Mistral, OpenAI and Gemini chat APIs for load and latency testing.
+
+Point the backend at it instead of a real provider, e.g.:
+
+    python mock_provider.py --port 8001 --latency-mean 1.5 --error-rate 0.02 --rate-limit-rate 0.05
+    MISTRAL_BASE_URL=http://127.0.0.1:8001/v1/chat/completions python app.py
+    GEMINI_BASE_URL=http://127.0.0.1:8001/v1beta/models AI_PROVIDER=gemini python app.py
+
+Responses are schema-valid JSON for every prompt type in PROMPT_TEMPLATES.
+Behaviour can be changed while running with POST /mock/config and counters
+are available from GET /mock/stats.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+
+from flask import Flask, Response, jsonify, request
+
+from prompt_builder import estimate_tokens
+from prompts import PROMPT_TEMPLATES
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+# The first line of each template identifies the prompt type
+PROMPT_MARKERS = {
+    prompt_type: template.strip().splitlines()[0].split("{")[0].strip()
+    for prompt_type, template in PROMPT_TEMPLATES.items()
+}
+
+
+class MockSettings:
+    """Runtime-adjustable behaviour of the mock provider"""
+
+    FIELDS = {
+        "latency_distribution": str,
+        "latency_mean": float,
+        "latency_spread": float,
+        "error_rate": float,
+        "rate_limit_rate": float,
+        "retry_after": float,
+        "malformed_rate": float,
+        "stream_chunk_delay": float
+    }
+
+    def __init__(self, **values):
+        self.latency_distribution = "lognormal"
+        self.latency_mean = 1.0
+        self.latency_spread = 0.5
+        self.error_rate = 0.0
+        self.rate_limit_rate = 0.0
+        self.retry_after = 1.0
+        self.malformed_rate = 0.0
+        self.stream_chunk_delay = 0.02
+        self.update(values)
+
+    def update(self, values):
+        for field, cast in self.FIELDS.items():
+            if values.get(field) is not None:
+                setattr(self, field, cast(values[field]))
+        if self.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {self.latency_distribution}")
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+class MockProvider:
+    def __init__(self, settings, seed=None):
+        self.settings = settings
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "ok": 0,
+            "errors": 0,
+            "rate_limited": 0,
+            "malformed": 0,
+            "streamed": 0,
+            "by_prompt_type": {}
+        }
+
+    def sample_latency(self):
+        settings = self.settings
+        with self.lock:
+            if settings.latency_distribution == "fixed":
+                latency = settings.latency_mean
+            elif settings.latency_distribution == "uniform":
+                latency = self.random.uniform(settings.latency_mean - settings.latency_spread,
+                                              settings.latency_mean + settings.latency_spread)
+            elif settings.latency_distribution == "normal":
+                latency = self.random.gauss(settings.latency_mean, settings.latency_spread)
+            else:
+                # lognormal with the requested mean; spread is sigma of the underlying normal
+                sigma = settings.latency_spread
+                mu = -sigma * sigma / 2
+                latency = settings.latency_mean * self.random.lognormvariate(mu, sigma)
+        return max(0.0, latency)
+
+    def roll(self, rate):
+        with self.lock:
+            return self.random.random() < rate
+
+    def count(self, key, prompt_type=None):
+        with self.lock:
+            self.stats[key] += 1
+            if prompt_type:
+                by_type = self.stats["by_prompt_type"]
+                by_type[prompt_type] = by_type.get(prompt_type, 0) + 1
+
+    def get_stats(self):
+        with self.lock:
+            return json.loads(json.dumps(self.stats))
+
+    def detect_prompt_type(self, prompt):
+        for prompt_type, marker in PROMPT_MARKERS.items():
+            if marker and marker in prompt:
+                return prompt_type
+        return None
+
+    def generate_content(self, prompt):
+        """Schema-valid JSON text for the prompt type"""
+        prompt_type = self.detect_prompt_type(prompt)
+        with self.lock:
+            rng = random.Random(self.random.random())
+
+        if prompt_type == "initial_scenario":
+            match = re.search(r"for (\d+) players", prompt)
+            player_count = int(match.group(1)) if match else 4
+            content = {
+                "scenario": "A storm has knocked out power across the city and the hospital backup generator is failing.",
+                "roles": {
+                    f"player{i}": {"role_name": name, "description": f"The team's {name.lower()}"}
+                    for i, name in enumerate(["Engineer", "Doctor", "Coordinator", "Reporter"][:max(1, min(player_count, 4))], 1)
+                },
+                "initial_crisis_score": 50,
+                "next_decision_point": "What should the team do first?"
+            }
+        elif prompt_type == "individual_scoring":
+            scores = [rng.randint(5, 25) for _ in range(4)]
+            content = {
+                "creativity_score": scores[0],
+                "helping_nature_score": scores[1],
+                "team_strategy_score": scores[2],
+                "role_appropriateness_score": scores[3],
+                "total_individual_score": sum(scores)
+            }
+        elif prompt_type == "crisis_score_update":
+            match = re.search(r"Current Score: (\d+)", prompt)
+            current = int(match.group(1)) if match else 50
+            change = rng.randint(-15, 15)
+            content = {
+                "new_crisis_score": max(0, min(100, current + change)),
+                "score_change": f"{change:+d}",
+                "team_collaboration": "The team split the work sensibly.",
+                "reasoning": "Mock provider score update"
+            }
+        elif prompt_type == "story_continuation":
+            content = {
+                "story_continuation": "The generator holds for now, but flood water is rising in the basement.",
+                "next_decision_point": "How does the team protect the basement equipment?"
+            }
+        elif prompt_type == "final_scoring":
+            content = {
+                "game_summary": "The team kept the hospital running through the storm.",
+                "crisis_outcome": "Crisis contained",
+                "team_highlights": "Quick coordination on power and patient safety"
+            }
+        else:
+            content = {"message": "Mock response"}
+
+        return prompt_type, json.dumps(content)
+
+
+def chat_prompt(payload):
+    messages = payload.get("messages") or []
+    return "\n".join(str(message.get("content", "")) for message in messages)
+
+
+def gemini_prompt(payload):
+    parts = []
+    for content in payload.get("contents") or []:
+        for part in content.get("parts") or []:
+            parts.append(str(part.get("text", "")))
+    return "\n".join(parts)
+
+
+def chunk_text(text, size=24):
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+def create_app(provider):
+    app = Flask(__name__)
+
+    def simulate(prompt_type):
+        """Apply latency and injected failures; return an error response or None"""
+        provider.count("requests", prompt_type)
+        time.sleep(provider.sample_latency())
+
+        if provider.roll(provider.settings.rate_limit_rate):
+            provider.count("rate_limited")
+            response = jsonify({"error": {"message": "Rate limit exceeded (mock)", "code": 429}})
+            response.status_code = 429
+            response.headers["Retry-After"] = str(provider.settings.retry_after)
+            return response
+
+        if provider.roll(provider.settings.error_rate):
+            provider.count("errors")
+            response = jsonify({"error": {"message": "Internal server error (mock)", "code": 500}})
+            response.status_code = 500
+            return response
+
+        return None
+
+    def maybe_malform(content):
+        if provider.roll(provider.settings.malformed_rate):
+            provider.count("malformed")
+            return content[:len(content) // 2]
+        return content
+
+    def usage(prompt, content):
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(content)
+        return prompt_tokens, completion_tokens
+
+    @app.route("/v1/chat/completions", methods=["POST"])
+    def chat_completions():
+        """Mistral and OpenAI chat completions"""
+        payload = request.get_json(silent=True) or {}
+        prompt = chat_prompt(payload)
+        prompt_type, content = provider.generate_content(prompt)
+
+        error = simulate(prompt_type)
+        if error is not None:
+            return error
+
+        content = maybe_malform(content)
+        prompt_tokens, completion_tokens = usage(prompt, content)
+        completion_id = f"mock-{uuid.uuid4().hex[:12]}"
+        model = payload.get("model", "mock-model")
+
+        if payload.get("stream"):
+            provider.count("streamed")
+
+            def stream():
+                for piece in chunk_text(content):
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "model": model,
+                        "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                    time.sleep(provider.settings.stream_chunk_delay)
+                final = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens
+                    }
+                }
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            provider.count("ok")
+            return Response(stream(), mimetype="text/event-stream")
+
+        provider.count("ok")
+        return jsonify({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        })
+
+    @app.route("/v1beta/models/<path:target>", methods=["POST"])
+    def gemini_generate(target):
+        """Gemini generateContent and streamGenerateContent"""
+        model, _, method = target.partition(":")
+        if method not in ("generateContent", "streamGenerateContent"):
+            return jsonify({"error": {"message": f"Unknown method: {method}", "code": 404}}), 404
+
+        payload = request.get_json(silent=True) or {}
+        prompt = gemini_prompt(payload)
+        prompt_type, content = provider.generate_content(prompt)
+
+        error = simulate(prompt_type)
+        if error is not None:
+            return error
+
+        content = maybe_malform(content)
+        prompt_tokens, completion_tokens = usage(prompt, content)
+
+        def candidate(text, finish_reason=None):
+            body = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+            if finish_reason:
+                body["finishReason"] = finish_reason
+            return body
+
+        usage_metadata = {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": completion_tokens,
+            "totalTokenCount": prompt_tokens + completion_tokens
+        }
+
+        if method == "streamGenerateContent":
+            provider.count("streamed")
+            pieces = chunk_text(content)
+            chunks = [
+                {"candidates": [candidate(piece, "STOP" if i == len(pieces) - 1 else None)],
+                 "modelVersion": model}
+                for i, piece in enumerate(pieces)
+            ]
+            chunks[-1]["usageMetadata"] = usage_metadata
+
+            if request.args.get("alt") == "sse":
+                def stream():
+                    for chunk in chunks:
+                        yield f"data: {json.dumps(chunk)}\n\n"
+                        time.sleep(provider.settings.stream_chunk_delay)
+
+                provider.count("ok")
+                return Response(stream(), mimetype="text/event-stream")
+
+            provider.count("ok")
+            return jsonify(chunks)
+
+        provider.count("ok")
+        return jsonify({
+            "candidates": [candidate(content, "STOP")],
+            "usageMetadata": usage_metadata,
+            "modelVersion": model
+        })
+
+    @app.route("/mock/config", methods=["GET", "POST"])
+    def mock_config():
+        if request.method == "POST":
+            try:
+                provider.settings.update(request.get_json(silent=True) or {})
+            except (TypeError, ValueError) as e:
+                return jsonify({"success": False, "error": str(e)}), 400
+        return jsonify({"success": True, "config": provider.settings.to_dict()})
+
+    @app.route("/mock/stats", methods=["GET"])
+    def mock_stats():
+        return jsonify({"success": True, "stats": provider.get_stats()})
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.environ.get("MOCK_PROVIDER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("MOCK_PROVIDER_PORT", 8001)))
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--latency-mean", type=float, default=1.0, help="mean response time in seconds")
+    parser.add_argument("--latency-spread", type=float, default=0.5,
+                        help="uniform half-width, normal stddev or lognormal sigma")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests failing with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="fraction of responses with broken JSON")
+    parser.add_argument("--stream-chunk-delay", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    settings = MockSettings(
+        latency_distribution=args.latency_distribution,
+        latency_mean=args.latency_mean,
+        latency_spread=args.latency_spread,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        malformed_rate=args.malformed_rate,
+        stream_chunk_delay=args.stream_chunk_delay
+    )
+    app = create_app(MockProvider(settings, seed=args.seed))
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import logging
+import threading
+import time
+
+import redis
+
+from data import Data
+
+logger = logging.getLogger("odyssey.presence")
+
+PRESENCE_SIDS_KEY_PREFIX = "presence:sids:"
+PRESENCE_ONLINE_KEY = "presence:online"
+PRESENCE_ROOMS_KEY = "presence:rooms"
+
+
+class PresenceRegistry:
+    """Which Socket.IO connections (sids) each username has, shared by every worker.
+
+    `presence:sids:<username>` maps each of a user's sids to the time it
+    expires, and `presence:online` scores every user by their latest expiry,
+    so finding a user's sids or counting who is online is one Redis call.
+    Each worker refreshes the expiry of its own connections with
+    `heartbeat()`; connections of a worker that died simply expire. The
+    lobby room a user is waiting in is kept in `presence:rooms` so rooms of
+    players who went away can be cleaned up without scanning every room.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        # Connections of this worker: sid -> username
+        self.local = {}
+        self.lock = threading.Lock()
+
+    def _key(self, username):
+        return f"{PRESENCE_SIDS_KEY_PREFIX}{username}"
+
+    def connect(self, sid, username):
+        with self.lock:
+            self.local[sid] = username
+        self._refresh({sid: username})
+
+    def disconnect(self, sid):
+        """Forget a connection; returns its username if that was the user's last live one"""
+        with self.lock:
+            username = self.local.pop(sid, None)
+        if username is None:
+            return None
+        try:
+            redis_client = Data.get_redis_client()
+            redis_client.hdel(self._key(username), sid)
+            if self.sids(username):
+                return None
+            redis_client.zrem(PRESENCE_ONLINE_KEY, username)
+        except redis.RedisError:
+            logger.warning("Could not remove connection of %s from the presence registry", username)
+            return None
+        return username
+
+    def heartbeat(self):
+        """Push back the expiry of every connection of this worker"""
+        with self.lock:
+            connections = dict(self.local)
+        if connections:
+            self._refresh(connections)
+
+    def _refresh(self, connections):
+        expires_at = time.time() + self.ttl
+        by_user = {}
+        for sid, username in connections.items():
+            by_user.setdefault(username, {})[sid] = expires_at
+        try:
+            pipeline = Data.get_redis_client().pipeline(transaction=False)
+            for username, sids in by_user.items():
+                pipeline.hset(self._key(username), mapping=sids)
+                pipeline.expire(self._key(username), int(self.ttl) + 1)
+            pipeline.zadd(PRESENCE_ONLINE_KEY, dict.fromkeys(by_user, expires_at), gt=True)
+            pipeline.execute()
+        except redis.RedisError:
+            logger.warning("Could not refresh %d connections in the presence registry", len(connections))
+
+    def sids(self, username):
+        """Live sids of a user on any worker"""
+        redis_client = Data.get_redis_client()
+        entries = redis_client.hgetall(self._key(username))
+        now = time.time()
+        expired = [sid for sid, expires_at in entries.items() if float(expires_at) <= now]
+        if expired:
+            redis_client.hdel(self._key(username), *expired)
+        return [sid for sid in entries if sid not in expired]
+
+    def is_online(self, username):
+        return bool(self.sids(username))
+
+    def online_count(self):
+        return Data.get_redis_client().zcount(PRESENCE_ONLINE_KEY, time.time(), "+inf")
+
+    def sweep(self):
+        """Drop users whose connections all expired (their worker went away); returns them"""
+        redis_client = Data.get_redis_client()
+        stale = redis_client.zrangebyscore(PRESENCE_ONLINE_KEY, "-inf", time.time())
+        gone = [username for username in stale if not self.sids(username)]
+        if gone:
+            redis_client.zrem(PRESENCE_ONLINE_KEY, *gone)
+        return gone
+
+    def set_room(self, username, room_id):
+        Data.get_redis_client().hset(PRESENCE_ROOMS_KEY, username, room_id)
+
+    def clear_room(self, username):
+        Data.get_redis_client().hdel(PRESENCE_ROOMS_KEY, username)
+
+    def room_of(self, username):
+        return Data.get_redis_client().hget(PRESENCE_ROOMS_KEY, username)
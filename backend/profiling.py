@@ -0,0 +1,199 @@
+import collections
+import contextvars
+import cProfile
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+logger = logging.getLogger("odyssey.profiling")
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """Timings of one handler or background task and the spans nested inside it"""
+
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self.depth = 0
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "spans": self.spans
+        }
+
+
+class Profiler:
+    """Runtime-switchable tracing of handlers with sampled cProfile dumps of slow ones.
+
+    While disabled, wrapped handlers and spans cost one attribute or context
+    variable check. While enabled, every handler records its nested spans
+    (Data, AI and emit calls); `sample_rate` of them also run under cProfile,
+    and those slower than `slow_seconds` are written to `output_dir` as a
+    `.prof` file (open with pstats or snakeviz) next to a JSON span tree.
+    """
+
+    def __init__(self, enabled=False, sample_rate=0.01, slow_seconds=0.5, output_dir="profiles", keep=50):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+        self.output_dir = output_dir
+        self.slow_traces = collections.deque(maxlen=keep)
+        self.stats = collections.Counter()
+        self.lock = threading.Lock()
+
+    def configure(self, **settings):
+        """Change settings at runtime (enabled, sample_rate, slow_seconds, output_dir)"""
+        if settings.get("enabled") is not None:
+            enabled = settings["enabled"]
+            self.enabled = enabled if isinstance(enabled, bool) else str(enabled).lower() in ("1", "true", "yes", "on")
+        if settings.get("sample_rate") is not None:
+            self.sample_rate = min(1.0, max(0.0, float(settings["sample_rate"])))
+        if settings.get("slow_seconds") is not None:
+            self.slow_seconds = float(settings["slow_seconds"])
+        if settings.get("output_dir"):
+            self.output_dir = str(settings["output_dir"])
+        return self.get_status()
+
+    def get_status(self):
+        with self.lock:
+            return {
+                "enabled": self.enabled,
+                "sample_rate": self.sample_rate,
+                "slow_seconds": self.slow_seconds,
+                "output_dir": self.output_dir,
+                "stats": dict(self.stats),
+                "slow_traces": [trace.to_dict() for trace in self.slow_traces]
+            }
+
+    def profiled(self, kind, name, function):
+        """Wrap a handler or task so each call becomes a root trace while enabled"""
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not self.enabled or _current_trace.get() is not None:
+                return function(*args, **kwargs)
+            return self._run_root(kind, name, function, args, kwargs)
+
+        return wrapper
+
+    def _run_root(self, kind, name, function, args, kwargs):
+        trace = Trace(kind, name)
+        token = _current_trace.set(trace)
+        profile = None
+        if random.random() < self.sample_rate:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler is already running on this thread
+                profile = None
+        try:
+            return function(*args, **kwargs)
+        finally:
+            if profile:
+                profile.disable()
+            trace.duration = time.perf_counter() - trace.start
+            _current_trace.reset(token)
+            self._finish(trace, profile)
+
+    def _finish(self, trace, profile):
+        with self.lock:
+            self.stats["traces"] += 1
+            if trace.duration < self.slow_seconds:
+                return
+            self.stats["slow"] += 1
+            self.slow_traces.append(trace)
+        if profile is None:
+            return
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            base = os.path.join(
+                self.output_dir,
+                f"{trace.kind}-{trace.name}-{int(trace.started_at * 1000)}-{threading.get_ident()}"
+            )
+            profile.dump_stats(f"{base}.prof")
+            with open(f"{base}.json", "w") as output:
+                json.dump(trace.to_dict(), output, indent=2)
+            with self.lock:
+                self.stats["dumped"] += 1
+        except OSError:
+            logger.exception("Could not write profile for %s %s", trace.kind, trace.name)
+
+    def traced(self, name, function):
+        """Wrap a nested call so it is recorded as a span of the current trace"""
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            trace = _current_trace.get()
+            if trace is None:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            trace.depth += 1
+            try:
+                return function(*args, **kwargs)
+            finally:
+                trace.depth -= 1
+                trace.spans.append({
+                    "name": name,
+                    "offset": round(start - trace.start, 6),
+                    "duration": round(time.perf_counter() - start, 6),
+                    "depth": trace.depth,
+                    "thread": threading.current_thread().name
+                })
+
+        return wrapper
+
+
+def in_trace(function):
+    """Run `function` (e.g. on an executor thread) inside the caller's trace"""
+    if _current_trace.get() is None:
+        return function
+    return functools.partial(contextvars.copy_context().run, function)
+
+
+def trace_methods(target, prefix, names=None, skip=(), profiler=None):
+    """Record calls to `names` (default: public functions of a class) as spans named `prefix.name`.
+
+    Works on classes, keeping static methods static, and on single instances.
+    """
+    profiler = profiler or PROFILER
+    if names is None:
+        names = [
+            name for name, attribute in vars(target).items()
+            if not name.startswith("_") and name not in skip
+            and isinstance(attribute, (staticmethod, type(trace_methods)))
+        ]
+    for name in names:
+        attribute = getattr(target, name)
+        if getattr(attribute, "traced", False):
+            continue
+        wrapper = profiler.traced(f"{prefix}.{name}", attribute)
+        wrapper.traced = True
+        if inspect.isclass(target) and isinstance(inspect.getattr_static(target, name), staticmethod):
+            wrapper = staticmethod(wrapper)
+        setattr(target, name, wrapper)
+
+
+def profile_views(app, profiler=None):
+    """Make every registered Flask view a root trace"""
+    profiler = profiler or PROFILER
+    for endpoint, view in list(app.view_functions.items()):
+        app.view_functions[endpoint] = profiler.profiled("http", endpoint, view)
+
+
+PROFILER = Profiler()
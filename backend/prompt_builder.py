@@ -0,0 +1,176 @@
+import re
+import threading
+from collections import deque
+
+from prompts import PROMPT_TEMPLATES, get_prompt, get_theme_name
+
+CHARS_PER_TOKEN = 4
+WHITESPACE_PATTERN = re.compile(r"\s+")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+# Variable fields of each template that are filled with compacted content
+VARIABLE_FIELDS = {
+    "initial_scenario": (),
+    "individual_scoring": ("player_response",),
+    "crisis_score_update": ("formatted_responses",),
+    "story_continuation": ("current_scenario", "formatted_responses"),
+    "final_scoring": ("formatted_rounds",)
+}
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token)"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def compact_text(text, max_tokens):
+    """Collapse whitespace and cut the text at a word boundary to fit max_tokens"""
+    text = WHITESPACE_PATTERN.sub(" ", str(text)).strip()
+    max_chars = max(0, max_tokens) * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    if max_chars <= 3:
+        return ""
+    cut = text[:max_chars - 3]
+    if " " in cut:
+        cut = cut[:cut.rindex(" ")]
+    return cut.rstrip(",;:") + "..."
+
+
+def first_sentence(text):
+    text = WHITESPACE_PATTERN.sub(" ", str(text)).strip()
+    return SENTENCE_PATTERN.split(text, 1)[0] if text else ""
+
+
+class PromptBuilder:
+    """Builds prompts within per-prompt token budgets.
+
+    Player decisions are compacted to share the space left after the fixed
+    template text, game history is rendered as one compact line per round,
+    and earlier rounds are carried as a rolling summary instead of the full
+    story text so prompt size stays flat as the game gets longer.
+    """
+
+    def __init__(self, budgets, decision_max_tokens=150, summary_max_tokens=300, recent_size=100):
+        self.budgets = budgets
+        self.decision_max_tokens = decision_max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.recent = deque(maxlen=recent_size)
+        self.totals = {}
+        self.lock = threading.Lock()
+
+    def available_tokens(self, prompt_type, **fixed):
+        """Tokens left for the variable fields after the fixed template text"""
+        empty = {field: "" for field in VARIABLE_FIELDS.get(prompt_type, ())}
+        overhead = estimate_tokens(PROMPT_TEMPLATES[prompt_type].format(**self._normalize(fixed), **empty))
+        return max(0, self.budgets.get(prompt_type, 0) - overhead)
+
+    def build(self, prompt_type, **kwargs):
+        """Render a prompt and record its size against the budget"""
+        prompt = get_prompt(prompt_type, **self._normalize(kwargs))
+        self._record(prompt_type, estimate_tokens(prompt))
+        return prompt
+
+    def format_decision(self, decision, max_tokens=None):
+        limit = self.decision_max_tokens if max_tokens is None else min(max_tokens, self.decision_max_tokens)
+        return compact_text(decision, limit)
+
+    def format_responses(self, all_player_responses, budget):
+        """One compact line per player, sharing the budget equally"""
+        if not all_player_responses:
+            return ""
+        # Each line also carries "- name: " and a newline
+        per_player = budget // len(all_player_responses)
+        lines = []
+        for player, response in all_player_responses.items():
+            prefix = f"- {player}: "
+            room = per_player - estimate_tokens(prefix) - 1
+            lines.append(prefix + self.format_decision(response, room))
+        return "\n".join(lines) + "\n"
+
+    def format_rounds(self, all_rounds_data, budget):
+        """Compact per-round lines; older rounds are dropped into a summary line first"""
+        lines = [self._format_round(round_data) for round_data in all_rounds_data]
+        text = "\n".join(lines)
+        dropped = 0
+        while estimate_tokens(text) > budget and dropped < len(lines) - 1:
+            dropped += 1
+            text = "\n".join([self._summarize_rounds(all_rounds_data[:dropped])] + lines[dropped:])
+        if estimate_tokens(text) > budget:
+            text = compact_text(text, budget)
+        return text + "\n"
+
+    def format_scenario(self, current_scenario, story_summary, budget):
+        """Rolling summary of earlier rounds plus the latest scenario, within budget"""
+        summary = compact_text(story_summary or "", min(self.summary_max_tokens, budget // 2))
+        if summary:
+            summary = f"Story so far: {summary}\nLatest: "
+        return summary + compact_text(current_scenario, budget - estimate_tokens(summary))
+
+    def update_summary(self, story_summary, round_number, crisis_score, story_continuation):
+        """Append a one-line recap of the round, dropping the oldest recaps past the limit"""
+        recap = f"R{round_number} (crisis {crisis_score}): {first_sentence(story_continuation)}"
+        lines = [line for line in (story_summary or "").split("\n") if line]
+        lines.append(compact_text(recap, self.summary_max_tokens // 3))
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    def _normalize(self, kwargs):
+        """Send the theme name rather than the client's whole theme object"""
+        kwargs = dict(kwargs)
+        if "theme" in kwargs:
+            kwargs["theme"] = get_theme_name(kwargs["theme"])
+        return kwargs
+
+    def _format_round(self, round_data):
+        crisis_update = round_data.get("crisis_update", {}) or {}
+        crisis_score = crisis_update.get("new_crisis_score", round_data.get("crisis_score", "N/A"))
+        score_change = crisis_update.get("score_change", 0)
+        parts = []
+        round_scores = round_data.get("round_scores", {}) or {}
+        for player, decision in (round_data.get("decisions", {}) or {}).items():
+            total = (round_scores.get(player) or {}).get("total_round_score", 0)
+            parts.append(f"{player} ({total}/100): {self.format_decision(decision, self.decision_max_tokens // 3)}")
+        return f"Round {round_data.get('round', '?')} | crisis {crisis_score} ({score_change}) | " + "; ".join(parts)
+
+    def _summarize_rounds(self, rounds):
+        first = rounds[0].get("round", 1)
+        last = rounds[-1].get("round", len(rounds))
+        end_score = (rounds[-1].get("crisis_update", {}) or {}).get("new_crisis_score", "N/A")
+        totals = {}
+        for round_data in rounds:
+            for player, scores in (round_data.get("round_scores", {}) or {}).items():
+                totals[player] = totals.get(player, 0) + (scores or {}).get("total_round_score", 0)
+        players = ", ".join(f"{player} {total}" for player, total in totals.items())
+        return f"Rounds {first}-{last} | crisis reached {end_score} | points: {players}"
+
+    def _record(self, prompt_type, tokens):
+        budget = self.budgets.get(prompt_type, 0)
+        entry = {
+            "prompt_type": prompt_type,
+            "tokens": tokens,
+            "budget": budget,
+            "over_budget": bool(budget) and tokens > budget
+        }
+        with self.lock:
+            self.recent.append(entry)
+            totals = self.totals.setdefault(prompt_type, {"count": 0, "total_tokens": 0, "max_tokens": 0, "over_budget": 0})
+            totals["count"] += 1
+            totals["total_tokens"] += tokens
+            totals["max_tokens"] = max(totals["max_tokens"], tokens)
+            totals["over_budget"] += entry["over_budget"]
+
+    def get_stats(self):
+        """Get prompt size statistics per prompt type"""
+        with self.lock:
+            return {
+                prompt_type: {
+                    "count": totals["count"],
+                    "average_tokens": totals["total_tokens"] / totals["count"],
+                    "max_tokens": totals["max_tokens"],
+                    "over_budget": totals["over_budget"],
+                    "budget": self.budgets.get(prompt_type, 0)
+                }
+                for prompt_type, totals in self.totals.items()
+            }
@@ -145,3 +145,9 @@ def get_prompt(prompt_type: str, **kwargs) -> str:
         return template.format(**kwargs)
     except KeyError as e:
         raise ValueError(f"Missing required variable for prompt: {e}")
+
+def get_theme_name(theme) -> str:
+    """Get a readable theme name from a theme key or the client's theme object"""
+    if isinstance(theme, dict):
+        return theme.get("name") or "the crisis"
+    return str(theme or "the crisis").replace("_", " ")
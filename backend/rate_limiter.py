@@ -0,0 +1,282 @@
+import heapq
+import itertools
+import threading
+import time
+
+from data import Data
+
+# Request priorities (lower value is served first)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BACKGROUND: "background"
+}
+
+# Acquire request and token buckets atomically, shared by every process.
+# Returns 0 when the request may proceed, otherwise milliseconds to wait.
+TOKEN_BUCKET_SCRIPT = """
+local now_t = redis.call('TIME')
+local now = tonumber(now_t[1]) * 1000 + math.floor(tonumber(now_t[2]) / 1000)
+
+local blocked_until = tonumber(redis.call('GET', KEYS[3]) or '0')
+if blocked_until > now then
+    return blocked_until - now
+end
+
+local function refill(key, capacity, rate)
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    return math.min(capacity, tokens + math.max(0, now - ts) * rate)
+end
+
+local request_capacity = tonumber(ARGV[1])
+local token_capacity = tonumber(ARGV[2])
+local cost = math.min(tonumber(ARGV[3]), token_capacity)
+local request_rate = request_capacity / 60000
+local token_rate = token_capacity / 60000
+
+local requests = refill(KEYS[1], request_capacity, request_rate)
+local tokens = refill(KEYS[2], token_capacity, token_rate)
+
+local wait = 0
+if requests < 1 then
+    wait = math.max(wait, math.ceil((1 - requests) / request_rate))
+end
+if tokens < cost then
+    wait = math.max(wait, math.ceil((cost - tokens) / token_rate))
+end
+if wait == 0 then
+    requests = requests - 1
+    tokens = tokens - cost
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(requests), 'ts', tostring(now))
+redis.call('HSET', KEYS[2], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], 120000)
+redis.call('PEXPIRE', KEYS[2], 120000)
+return wait
+"""
+
+
+class LocalTokenBucket:
+    """In-process request/token buckets, used when Redis is not available"""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.request_capacity = requests_per_minute
+        self.token_capacity = tokens_per_minute
+        self.requests = float(requests_per_minute)
+        self.tokens = float(tokens_per_minute)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self.updated_at)
+        self.requests = min(self.request_capacity, self.requests + elapsed * self.request_capacity / 60.0)
+        self.tokens = min(self.token_capacity, self.tokens + elapsed * self.token_capacity / 60.0)
+        self.updated_at = now
+
+    def try_acquire(self, cost):
+        """Take one request and `cost` tokens; return seconds to wait (0 if acquired)"""
+        with self.lock:
+            now = time.monotonic()
+            if self.blocked_until > now:
+                return self.blocked_until - now
+
+            self._refill(now)
+            cost = min(cost, self.token_capacity)
+            wait = 0.0
+            if self.requests < 1:
+                wait = max(wait, (1 - self.requests) * 60.0 / self.request_capacity)
+            if self.tokens < cost:
+                wait = max(wait, (cost - self.tokens) * 60.0 / self.token_capacity)
+            if wait == 0:
+                self.requests -= 1
+                self.tokens -= cost
+            return wait
+
+    def debit(self, tokens):
+        """Charge tokens used beyond the original estimate (may go negative)"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= tokens
+
+    def block(self, seconds):
+        """Pause all acquisitions for `seconds` (e.g. after a 429 Retry-After)"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RedisTokenBucket:
+    """Request/token buckets shared across processes through Redis"""
+
+    def __init__(self, provider, requests_per_minute, tokens_per_minute):
+        self.request_capacity = requests_per_minute
+        self.token_capacity = tokens_per_minute
+        self.requests_key = f"ratelimit:{provider}:requests"
+        self.tokens_key = f"ratelimit:{provider}:tokens"
+        self.blocked_key = f"ratelimit:{provider}:blocked_until"
+        self.redis_client = Data.get_redis_client()
+        self.script = self.redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def try_acquire(self, cost):
+        """Take one request and `cost` tokens; return seconds to wait (0 if acquired)"""
+        wait_ms = self.script(
+            keys=[self.requests_key, self.tokens_key, self.blocked_key],
+            args=[self.request_capacity, self.token_capacity, int(cost)]
+        )
+        return int(wait_ms) / 1000.0
+
+    def debit(self, tokens):
+        """Charge tokens used beyond the original estimate (may go negative)"""
+        self.redis_client.hincrbyfloat(self.tokens_key, "tokens", -tokens)
+
+    def block(self, seconds):
+        """Pause all acquisitions for `seconds` (e.g. after a 429 Retry-After)"""
+        blocked_until = int((time.time() + seconds) * 1000)
+        self.redis_client.set(self.blocked_key, blocked_until, px=max(1, int(seconds * 1000)))
+
+
+class RateLimiter:
+    """Per-provider token bucket limiter, Redis-backed with a local fallback"""
+
+    def __init__(self, provider, requests_per_minute, tokens_per_minute, backend="redis"):
+        self.provider = provider
+        self.local_bucket = LocalTokenBucket(requests_per_minute, tokens_per_minute)
+        self.bucket = self.local_bucket
+        if backend == "redis":
+            try:
+                self.bucket = RedisTokenBucket(provider, requests_per_minute, tokens_per_minute)
+            except Exception:
+                self.bucket = self.local_bucket
+
+    def try_acquire(self, cost):
+        """Try to acquire capacity, falling back to the local bucket on Redis errors"""
+        try:
+            return self.bucket.try_acquire(cost)
+        except Exception:
+            return self.local_bucket.try_acquire(cost)
+
+    def debit(self, tokens):
+        if tokens <= 0:
+            return
+        try:
+            self.bucket.debit(tokens)
+        except Exception:
+            self.local_bucket.debit(tokens)
+
+    def block(self, seconds):
+        if seconds <= 0:
+            return
+        try:
+            self.bucket.block(seconds)
+        except Exception:
+            pass
+        self.local_bucket.block(seconds)
+
+
+class RequestQueue:
+    """Priority queue in front of the rate limiter.
+
+    Only the highest priority waiter competes for rate limit capacity, so
+    interactive calls overtake queued background work as soon as they arrive.
+    """
+
+    def __init__(self, rate_limiter, max_concurrent):
+        self.rate_limiter = rate_limiter
+        self.max_concurrent = max(1, max_concurrent)
+        self.condition = threading.Condition()
+        self.waiting = []
+        self.sequence = itertools.count()
+        self.active = 0
+        # Set while the head waiter asks the rate limiter, which happens outside the lock
+        self.acquiring = False
+        self.wait_stats = {
+            priority: {"count": 0, "total_wait": 0.0, "max_wait": 0.0}
+            for priority in PRIORITY_NAMES
+        }
+
+    def acquire(self, priority, tokens, timeout=None):
+        """Block until this request may be sent; return the time spent waiting.
+
+        Returns None if `timeout` seconds pass before capacity is available.
+        """
+        enqueued_at = time.monotonic()
+        give_up_at = enqueued_at + timeout if timeout is not None else None
+        ticket = (priority, next(self.sequence))
+
+        with self.condition:
+            heapq.heappush(self.waiting, ticket)
+            try:
+                while True:
+                    remaining = give_up_at - time.monotonic() if give_up_at is not None else None
+                    if remaining is not None and remaining <= 0:
+                        return None
+
+                    if (self.waiting[0] != ticket or self.acquiring
+                            or self.active >= self.max_concurrent):
+                        self.condition.wait(remaining)
+                        continue
+
+                    # The limiter may be a Redis round trip; only the lock holder picks the head
+                    self.acquiring = True
+                    self.condition.release()
+                    try:
+                        wait = self.rate_limiter.try_acquire(tokens)
+                    finally:
+                        self.condition.acquire()
+                        self.acquiring = False
+                    if wait <= 0:
+                        break
+                    # Keep our place at the head; a higher priority arrival
+                    # takes over and wakes us up via notify_all
+                    self.condition.notify_all()
+                    self.condition.wait(wait if remaining is None else min(wait, remaining))
+            finally:
+                self.waiting.remove(ticket)
+                heapq.heapify(self.waiting)
+                self.condition.notify_all()
+
+            self.active += 1
+
+        waited = time.monotonic() - enqueued_at
+        self._record_wait(priority, waited)
+        return waited
+
+    def release(self):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    def _record_wait(self, priority, waited):
+        with self.condition:
+            stats = self.wait_stats.setdefault(priority, {"count": 0, "total_wait": 0.0, "max_wait": 0.0})
+            stats["count"] += 1
+            stats["total_wait"] += waited
+            stats["max_wait"] = max(stats["max_wait"], waited)
+
+    def get_stats(self):
+        """Get queue depth and wait time metrics"""
+        with self.condition:
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _ in self.waiting:
+                depth[PRIORITY_NAMES.get(priority, str(priority))] += 1
+
+            wait_times = {}
+            for priority, stats in self.wait_stats.items():
+                name = PRIORITY_NAMES.get(priority, str(priority))
+                wait_times[name] = {
+                    "count": stats["count"],
+                    "average_wait": stats["total_wait"] / stats["count"] if stats["count"] else 0.0,
+                    "max_wait": stats["max_wait"]
+                }
+
+            return {
+                "queue_depth": depth,
+                "active_requests": self.active,
+                "max_concurrent": self.max_concurrent,
+                "wait_times": wait_times
+            }
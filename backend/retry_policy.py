@@ -0,0 +1,78 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class Deadline:
+    """Absolute time budget shared by every AI call made on its behalf (e.g. one round)"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Retry classification, jittered exponential backoff and deadline-aware timeouts.
+
+    429/5xx/408 responses, timeouts and connection errors are retried; other
+    4xx responses are not. Each attempt's timeout is capped by what is left of
+    the deadline, and a retry is only made if the backoff delay still leaves
+    at least `min_attempt_timeout` seconds for another attempt.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=8.0, attempt_timeout=30,
+                 min_attempt_timeout=2.0, default_budget=45):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.min_attempt_timeout = min_attempt_timeout
+        self.default_budget = default_budget
+
+    def new_deadline(self):
+        return Deadline(self.default_budget)
+
+    def is_retryable_status(self, status_code):
+        return status_code in RETRYABLE_STATUS_CODES
+
+    def is_retryable_exception(self, error):
+        return isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError))
+
+    def timeout_for(self, deadline):
+        """Per-attempt timeout, never longer than the remaining budget"""
+        return min(self.attempt_timeout, deadline.remaining())
+
+    def backoff(self, attempt, retry_after=None):
+        """Delay before the next attempt; Retry-After wins over full-jitter backoff"""
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+    def should_retry(self, attempt, deadline, delay):
+        if attempt >= self.max_attempts:
+            return False
+        return deadline.remaining() - delay >= self.min_attempt_timeout
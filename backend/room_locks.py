@@ -0,0 +1,70 @@
+import threading
+
+from redis.exceptions import LockError
+
+
+class StripedLock:
+    """Fixed pool of re-entrant locks shared out by key hash.
+
+    Memory stays constant however many rooms exist; unrelated rooms only
+    contend when they land on the same stripe.
+    """
+
+    def __init__(self, stripes=256):
+        self.locks = [threading.RLock() for _ in range(max(1, stripes))]
+
+    def get(self, key):
+        return self.locks[hash(key) % len(self.locks)]
+
+
+class RoomLock:
+    """Serializes work on one room: a local stripe, then an optional cross-worker lock.
+
+    Threads of the same worker queue up on the stripe instead of polling
+    Redis, and a thread that already holds the room can re-enter it.
+    """
+
+    def __init__(self, room_id, stripe, remote=None, held=None):
+        self.room_id = room_id
+        self.stripe = stripe
+        self.remote = remote
+        self.held = held
+        self.owns_remote = False
+
+    def __enter__(self):
+        self.stripe.acquire()
+        if self.remote is None:
+            return self
+        rooms = self._held_rooms()
+        if self.room_id in rooms:
+            return self
+        try:
+            acquired = self.remote.acquire()
+        except Exception:
+            self.stripe.release()
+            raise
+        if not acquired:
+            self.stripe.release()
+            raise LockError(f"Could not lock room {self.room_id}")
+        rooms.add(self.room_id)
+        self.owns_remote = True
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if self.owns_remote:
+                self._held_rooms().discard(self.room_id)
+                self.owns_remote = False
+                try:
+                    self.remote.release()
+                except LockError:
+                    # Expired while held; the version check on save still protects the session
+                    pass
+        finally:
+            self.stripe.release()
+        return False
+
+    def _held_rooms(self):
+        if not hasattr(self.held, "rooms"):
+            self.held.rooms = set()
+        return self.held.rooms
@@ -0,0 +1,105 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger("odyssey.scheduler")
+
+# Heap entry fields
+WHEN, SEQUENCE, KEY, CALLBACK, ARGS, ACTIVE = range(6)
+
+
+class DeadlineScheduler:
+    """One background task for every room's deadlines.
+
+    Deadlines live in a heap keyed by an arbitrary hashable (e.g.
+    `(room_id, "round")`); scheduling a key again replaces its deadline and
+    cancelled entries are dropped lazily. The loop is started with
+    `start_background_task` and waits on an event from `create_event`, so
+    it runs as a green thread under eventlet/gevent like the rest of the
+    Socket.IO work. Callbacks run on the scheduler task, so they should
+    only hand work off (e.g. to RoomTaskPool).
+    """
+
+    def __init__(self, start_background_task, create_event=threading.Event):
+        self.start_background_task = start_background_task
+        self.heap = []
+        self.entries = {}
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+        self.wakeup = create_event()
+        self.cancelled = 0
+        self.fired = 0
+        self.started = False
+
+    def schedule(self, key, delay, callback, *args):
+        """Call `callback(*args)` after `delay` seconds, replacing any deadline for `key`"""
+        entry = [time.monotonic() + max(0.0, delay), next(self.sequence), key, callback, args, True]
+        with self.lock:
+            self._cancel(key)
+            self.entries[key] = entry
+            heapq.heappush(self.heap, entry)
+            start = not self.started
+            self.started = True
+            earliest = self.heap[0] is entry
+        if start:
+            self.start_background_task(self._run)
+        elif earliest:
+            self.wakeup.set()
+
+    def cancel(self, key):
+        with self.lock:
+            return self._cancel(key)
+
+    def remaining(self, key):
+        """Seconds until `key` fires, or None if it is not scheduled"""
+        with self.lock:
+            entry = self.entries.get(key)
+            return max(0.0, entry[WHEN] - time.monotonic()) if entry else None
+
+    def _cancel(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return False
+        entry[ACTIVE] = False
+        self.cancelled += 1
+        # Rebuild once dead entries dominate so the heap stays proportional to live timers
+        if self.cancelled > 64 and self.cancelled > len(self.heap) // 2:
+            self.heap = [item for item in self.heap if item[ACTIVE]]
+            heapq.heapify(self.heap)
+            self.cancelled = 0
+        return True
+
+    def _run(self):
+        while True:
+            with self.lock:
+                # Cleared under the lock, so a deadline scheduled after this look wakes the wait below
+                self.wakeup.clear()
+                while self.heap and not self.heap[0][ACTIVE]:
+                    heapq.heappop(self.heap)
+                    self.cancelled = max(0, self.cancelled - 1)
+                entry = None
+                delay = None
+                if self.heap:
+                    delay = self.heap[0][WHEN] - time.monotonic()
+                    if delay <= 0:
+                        entry = heapq.heappop(self.heap)
+                        self.entries.pop(entry[KEY], None)
+                        self.fired += 1
+
+            if entry is None:
+                self.wakeup.wait(delay)
+                continue
+            try:
+                entry[CALLBACK](*entry[ARGS])
+            except Exception:
+                logger.exception("Scheduled callback failed for %s", entry[KEY])
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "scheduled": len(self.entries),
+                "heap_size": len(self.heap),
+                "fired": self.fired
+            }
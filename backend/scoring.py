@@ -0,0 +1,227 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+
+from prompts import SUSTAINABILITY_THEMES
+
+SCORING_MODE_LLM = "llm"
+SCORING_MODE_HEURISTIC = "heuristic"
+SCORING_MODES = (SCORING_MODE_LLM, SCORING_MODE_HEURISTIC)
+
+SCORE_FIELDS = (
+    "creativity_score",
+    "helping_nature_score",
+    "team_strategy_score",
+    "role_appropriateness_score"
+)
+
+TIMEOUT_DECISION = "No response provided - timeout"
+
+WORD_PATTERN = re.compile(r"[a-z']+")
+
+STOP_WORDS = {
+    "the", "a", "an", "and", "or", "to", "of", "in", "on", "for", "is", "it",
+    "be", "this", "that", "with", "as", "at", "by", "i", "will", "should"
+}
+
+HELPING_WORDS = {
+    "help", "helping", "support", "protect", "save", "assist", "care", "rescue",
+    "aid", "fix", "solve", "provide", "evacuate", "treat", "secure", "restore"
+}
+
+TEAM_WORDS = {
+    "team", "together", "we", "us", "our", "coordinate", "share", "collaborate",
+    "plan", "everyone", "communicate", "organize", "delegate", "split", "join"
+}
+
+# Keywords for the roles defined in SUSTAINABILITY_THEMES
+ROLE_KEYWORDS = {
+    "scientist": {"data", "research", "measure", "study", "evidence", "test", "analyze", "monitor"},
+    "leader": {"lead", "decide", "direct", "assign", "priority", "command", "organize", "announce"},
+    "activist": {"campaign", "awareness", "protest", "rally", "petition", "voice", "mobilize"},
+    "citizen": {"neighbors", "community", "volunteer", "local", "family", "report", "reduce"},
+    "manager": {"budget", "allocate", "schedule", "resources", "track", "ration", "supply"},
+    "inventor": {"build", "design", "prototype", "invent", "device", "tool", "engineer"},
+    "helper": {"help", "assist", "care", "comfort", "support", "shelter", "food"},
+    "organizer": {"organize", "gather", "schedule", "coordinate", "meeting", "group", "event"},
+    "engineer": {"build", "repair", "filter", "system", "design", "install", "pipe"},
+    "health worker": {"treat", "clinic", "patients", "medicine", "vaccinate", "screen", "health"},
+    "advocate": {"policy", "rights", "law", "speak", "represent", "campaign", "council"},
+    "resident": {"home", "neighbors", "street", "local", "report", "community", "family"}
+}
+
+
+def tokenize(text):
+    return WORD_PATTERN.findall(str(text).lower())
+
+
+def clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+def term_vector(words):
+    """Bag-of-words term frequency vector without stop words"""
+    return Counter(word for word in words if word not in STOP_WORDS)
+
+
+def cosine_similarity(vector_a, vector_b):
+    if not vector_a or not vector_b:
+        return 0.0
+    if len(vector_a) > len(vector_b):
+        vector_a, vector_b = vector_b, vector_a
+    dot = sum(count * vector_b.get(word, 0) for word, count in vector_a.items())
+    norm_a = math.sqrt(sum(count * count for count in vector_a.values()))
+    norm_b = math.sqrt(sum(count * count for count in vector_b.values()))
+    return dot / (norm_a * norm_b)
+
+
+def build_result(scores):
+    """Build the INDIVIDUAL_SCORING_PROMPT JSON shape from per-criterion scores"""
+    result = {field: int(round(clamp(scores[field], 0, 25))) for field in SCORE_FIELDS}
+    result["total_individual_score"] = sum(result[field] for field in SCORE_FIELDS)
+    return result
+
+
+class LLMScorer:
+    """Scores decisions with the INDIVIDUAL_SCORING_PROMPT through AIEngine"""
+
+    name = SCORING_MODE_LLM
+    # Slow enough to be worth scoring in the background as decisions arrive
+    incremental = True
+
+    def __init__(self, ai_engine, record_path=None):
+        self.ai_engine = ai_engine
+        self.record_path = record_path
+
+    def score(self, theme, player_response, role, round_number, teammates=(), other_responses=(), deadline=None):
+        result = self.ai_engine.score_individual_response(
+            theme=theme,
+            player_response=player_response,
+            role=role,
+            round_number=round_number,
+            deadline=deadline
+        )
+        if self.record_path and "error" not in result and not result.get("fallback"):
+            self._record(theme, player_response, role, round_number, teammates, other_responses, result)
+        return result
+
+    def _record(self, theme, player_response, role, round_number, teammates, other_responses, result):
+        """Append an LLM score to the calibration record file"""
+        record = {
+            "theme": theme,
+            "role": role,
+            "round_number": round_number,
+            "player_response": player_response,
+            "teammates": list(teammates),
+            "other_responses": list(other_responses),
+            "llm_scores": {field: result.get(field, 0) for field in SCORE_FIELDS}
+        }
+        try:
+            with open(self.record_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except (OSError, TypeError):
+            pass
+
+
+class HeuristicScorer:
+    """CPU-only scorer built from simple text features.
+
+    Returns the same JSON shape as the LLM scorer. Optional per-criterion
+    linear calibration (`{"creativity_score": {"scale": 1.0, "offset": 0.0}, ...}`)
+    can be produced by `scoring_calibration.py` from recorded LLM scores.
+    """
+
+    name = SCORING_MODE_HEURISTIC
+    # Cheap, so score at the end of the round with every teammate's response
+    incremental = False
+
+    def __init__(self, calibration=None):
+        self.calibration = calibration or {}
+
+    @classmethod
+    def from_calibration_file(cls, path):
+        if not path or not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, "r") as f:
+                return cls(json.load(f))
+        except (OSError, ValueError):
+            return cls()
+
+    def score(self, theme, player_response, role, round_number=None, teammates=(), other_responses=(), deadline=None):
+        scores = self.raw_scores(theme, player_response, role, teammates, other_responses)
+        result = build_result(self._calibrate(scores))
+        result["scoring_mode"] = self.name
+        return result
+
+    def raw_scores(self, theme, player_response, role, teammates=(), other_responses=()):
+        """Uncalibrated criterion scores"""
+        words = tokenize(player_response)
+        if not words or player_response == TIMEOUT_DECISION:
+            return {field: 0 for field in SCORE_FIELDS}
+
+        unique_words = set(words)
+        length_factor = min(1.0, len(words) / 40.0)
+        richness = len(unique_words) / len(words)
+
+        # Novelty: distance from the most similar other decision this round
+        vector = term_vector(words)
+        similarities = [
+            cosine_similarity(vector, term_vector(tokenize(other)))
+            for other in other_responses
+            if other and other != TIMEOUT_DECISION
+        ]
+        novelty = 1.0 - max(similarities, default=0.0)
+
+        teammate_words = set()
+        for teammate in teammates:
+            teammate_words.update(tokenize(teammate))
+        teammate_mentions = len(unique_words & teammate_words)
+
+        role_name = str(role or "").lower()
+        role_words = set(tokenize(role_name)) - STOP_WORDS
+        role_words |= ROLE_KEYWORDS.get(role_name, set())
+        role_words |= self._theme_role_keywords(theme, role_name)
+        role_overlap = len(unique_words & role_words)
+
+        scores = {
+            "creativity_score": 25 * (0.5 * novelty + 0.3 * length_factor + 0.2 * richness),
+            "helping_nature_score": 6 + 4 * len(unique_words & HELPING_WORDS) + 6 * length_factor,
+            "team_strategy_score": 5 + 4 * len(unique_words & TEAM_WORDS) + 5 * teammate_mentions,
+            "role_appropriateness_score": 8 + 5 * role_overlap + 4 * length_factor
+        }
+        return scores
+
+    def _theme_role_keywords(self, theme, role_name):
+        """Keywords of the theme's roles, if the role belongs to the theme"""
+        theme_info = SUSTAINABILITY_THEMES.get(theme) if isinstance(theme, str) else None
+        if not theme_info:
+            return set()
+        theme_roles = [name.lower() for name in theme_info["roles"]]
+        if role_name not in theme_roles:
+            return set()
+        return set(tokenize(theme_info["scenario_focus"])) - STOP_WORDS
+
+    def _calibrate(self, scores):
+        scores = dict(scores)
+        for field, params in self.calibration.items():
+            if field in scores:
+                scores[field] = scores[field] * params.get("scale", 1.0) + params.get("offset", 0.0)
+        return {field: clamp(value, 0, 25) for field, value in scores.items()}
+
+
+def get_scorers(ai_engine, config):
+    """Build the available scoring backends keyed by scoring mode"""
+    return {
+        SCORING_MODE_LLM: LLMScorer(ai_engine, record_path=config.SCORING_RECORD_PATH or None),
+        SCORING_MODE_HEURISTIC: HeuristicScorer.from_calibration_file(config.SCORING_CALIBRATION_PATH)
+    }
+
+
+def normalize_scoring_mode(mode, default=SCORING_MODE_LLM):
+    """Return a valid scoring mode, falling back to the default"""
+    mode = str(mode or "").lower()
+    return mode if mode in SCORING_MODES else default
+
@@ -0,0 +1,157 @@
+"""Calibrate and benchmark the heuristic scorer against recorded LLM scores.
+
+Records are JSON lines written by LLMScorer when SCORING_RECORD_PATH is set:
+
+    python scoring_calibration.py llm_scores.jsonl
+    python scoring_calibration.py llm_scores.jsonl --write scoring_calibration.json
+"""
+import argparse
+import json
+import math
+import sys
+import time
+
+from scoring import HeuristicScorer, SCORE_FIELDS
+
+
+def load_records(path):
+    records = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "player_response" in record and "llm_scores" in record:
+                records.append(record)
+    return records
+
+
+def score_record(scorer, record, raw=False):
+    args = (
+        record.get("theme"),
+        record["player_response"],
+        record.get("role", ""),
+    )
+    kwargs = {
+        "teammates": record.get("teammates", []),
+        "other_responses": record.get("other_responses", [])
+    }
+    if raw:
+        return scorer.raw_scores(*args, **kwargs)
+    return scorer.score(*args, round_number=record.get("round_number"), **kwargs)
+
+
+def pearson(xs, ys):
+    n = len(xs)
+    if n < 2:
+        return 0.0
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    var_y = sum((y - mean_y) ** 2 for y in ys)
+    if var_x == 0 or var_y == 0:
+        return 0.0
+    return cov / math.sqrt(var_x * var_y)
+
+
+def fit_linear(xs, ys):
+    """Least squares fit of ys = scale * xs + offset"""
+    n = len(xs)
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    if var_x == 0:
+        return {"scale": 1.0, "offset": mean_y - mean_x}
+    scale = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+    return {"scale": round(scale, 4), "offset": round(mean_y - scale * mean_x, 4)}
+
+
+def compare(scorer, records):
+    """Per-criterion error and correlation of the scorer against the LLM"""
+    report = {}
+    predictions = [score_record(scorer, record) for record in records]
+    fields = SCORE_FIELDS + ("total_individual_score",)
+    for field in fields:
+        predicted = [prediction[field] for prediction in predictions]
+        if field == "total_individual_score":
+            expected = [sum(record["llm_scores"].get(f, 0) for f in SCORE_FIELDS) for record in records]
+        else:
+            expected = [record["llm_scores"].get(field, 0) for record in records]
+        errors = [p - e for p, e in zip(predicted, expected)]
+        report[field] = {
+            "mae": round(sum(abs(error) for error in errors) / len(errors), 3),
+            "bias": round(sum(errors) / len(errors), 3),
+            "pearson": round(pearson(predicted, expected), 3)
+        }
+    return report
+
+
+def calibrate(records):
+    """Fit per-criterion linear corrections from raw heuristic scores to LLM scores"""
+    raw_scorer = HeuristicScorer()
+    raw = [score_record(raw_scorer, record, raw=True) for record in records]
+    return {
+        field: fit_linear(
+            [scores[field] for scores in raw],
+            [record["llm_scores"].get(field, 0) for record in records]
+        )
+        for field in SCORE_FIELDS
+    }
+
+
+def benchmark(scorer, records, repeat):
+    """Latency of the heuristic scorer in microseconds per decision"""
+    timings = []
+    for _ in range(repeat):
+        for record in records:
+            started_at = time.perf_counter()
+            score_record(scorer, record)
+            timings.append((time.perf_counter() - started_at) * 1e6)
+    timings.sort()
+    return {
+        "calls": len(timings),
+        "mean_us": round(sum(timings) / len(timings), 2),
+        "p50_us": round(timings[len(timings) // 2], 2),
+        "p99_us": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 2)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("records", help="JSON lines file with recorded LLM scores")
+    parser.add_argument("--calibration", help="existing calibration file to evaluate")
+    parser.add_argument("--write", help="fit a calibration and write it to this path")
+    parser.add_argument("--repeat", type=int, default=20, help="benchmark passes over the records")
+    args = parser.parse_args(argv)
+
+    records = load_records(args.records)
+    if not records:
+        print(f"No usable records in {args.records}", file=sys.stderr)
+        return 1
+
+    current = HeuristicScorer.from_calibration_file(args.calibration)
+    fitted_calibration = calibrate(records)
+    fitted = HeuristicScorer(fitted_calibration)
+
+    report = {
+        "records": len(records),
+        "current": compare(current, records),
+        "fitted": compare(fitted, records),
+        "fitted_calibration": fitted_calibration,
+        "benchmark": benchmark(current, records, max(1, args.repeat))
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.write:
+        with open(args.write, "w") as f:
+            json.dump(fitted_calibration, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
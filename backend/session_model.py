@@ -0,0 +1,360 @@
+"""Compact in-memory model of a game session.
+
+A session used to be a plain dict whose history repeated the totals,
+decisions and full AI responses of every round. `GameSession` keeps one
+copy of each fact: per-round scores live in a flat float array per round,
+player and role names are interned and shared by every round, and totals
+are summed from the rounds when asked for. Both classes still answer
+`session["key"]` and `session.get("key")` with the old dict shapes, so the
+code reading sessions did not have to change.
+"""
+import json
+import sys
+from array import array
+
+from scoring import SCORE_FIELDS
+
+# Keys of a player's entry in a round's `round_scores`, in array order
+ROUND_SCORE_KEYS = ("creativity", "helping_nature", "team_strategy", "role_appropriateness", "total_round_score")
+RESULT_FIELDS = SCORE_FIELDS + ("total_individual_score",)
+
+# Bump when the serialized layout changes
+FORMAT_VERSION = 1
+
+
+def _number(value):
+    """A stored score as it was given: int when whole, else rounded to 2 places"""
+    return int(value) if value.is_integer() else round(value, 2)
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class RoundRecord:
+    """One finished round: decisions and scores aligned with the session's players.
+
+    `feedback` holds the rest of each player's scorer result (its non-numeric
+    fields), or None where scoring failed; failed players count as zero in the
+    round but are left out of their `player_round_scores`.
+    """
+
+    __slots__ = ("round", "players", "decisions", "scores", "feedback", "crisis_score", "score_change",
+                 "story", "next_decision_point")
+
+    def __init__(self, round_number, players, decisions, scores, crisis_score=None, score_change=0,
+                 story="", next_decision_point="", feedback=None):
+        self.round = round_number
+        self.players = players
+        self.decisions = decisions
+        self.scores = scores
+        self.feedback = feedback if feedback is not None else tuple({} for _ in players)
+        self.crisis_score = crisis_score
+        self.score_change = score_change
+        self.story = story
+        self.next_decision_point = next_decision_point
+
+    @classmethod
+    def from_results(cls, round_number, players, decisions, score_results, crisis_update, story_continuation):
+        """Build a record from the scorer results and AI responses of a round"""
+        scores = array("f", bytes(4 * len(RESULT_FIELDS) * len(players)))
+        feedback = []
+        for index, player in enumerate(players):
+            result = score_results.get(player)
+            if result is None or "error" in result:
+                feedback.append(None)
+                continue
+            offset = index * len(RESULT_FIELDS)
+            for position, field in enumerate(RESULT_FIELDS):
+                scores[offset + position] = result.get(field, 0) or 0
+            feedback.append({key: value for key, value in result.items() if key not in RESULT_FIELDS})
+        return cls(
+            round_number,
+            players,
+            tuple(decisions.get(player) for player in players),
+            scores,
+            crisis_update.get("new_crisis_score"),
+            crisis_update.get("score_change", 0),
+            story_continuation.get("story_continuation", ""),
+            story_continuation.get("next_decision_point", ""),
+            tuple(feedback)
+        )
+
+    def scored(self, index):
+        """Whether the player at `index` got a score this round"""
+        return self.feedback[index] is not None
+
+    def player_scores(self, index):
+        """The `round_scores` entry of the player at `index`"""
+        offset = index * len(ROUND_SCORE_KEYS)
+        entry = {
+            key: _number(self.scores[offset + position])
+            for position, key in enumerate(ROUND_SCORE_KEYS)
+        }
+        entry["round"] = self.round
+        return entry
+
+    def total(self, index):
+        return self.scores[index * len(ROUND_SCORE_KEYS) + len(ROUND_SCORE_KEYS) - 1]
+
+    def round_scores(self):
+        return {player: self.player_scores(index) for index, player in enumerate(self.players)}
+
+    def individual_scores(self):
+        """The scorer results of the players scored this round"""
+        results = {}
+        for index, player in enumerate(self.players):
+            if not self.scored(index):
+                continue
+            offset = index * len(RESULT_FIELDS)
+            result = {field: _number(self.scores[offset + position]) for position, field in enumerate(RESULT_FIELDS)}
+            result.update(self.feedback[index])
+            results[player] = result
+        return results
+
+    def decision_map(self):
+        return {
+            player: decision
+            for player, decision in zip(self.players, self.decisions)
+            if decision is not None
+        }
+
+    def to_dict(self):
+        """The round in the shape of the old history entries"""
+        return {
+            "round": self.round,
+            "decisions": self.decision_map(),
+            "individual_scores": self.individual_scores(),
+            "round_scores": self.round_scores(),
+            "crisis_update": {"new_crisis_score": self.crisis_score, "score_change": self.score_change},
+            "story_continuation": {
+                "story_continuation": self.story,
+                "next_decision_point": self.next_decision_point
+            }
+        }
+
+    def get(self, key, default=None):
+        if key == "round":
+            return self.round
+        if key == "decisions":
+            return self.decision_map()
+        if key == "round_scores":
+            return self.round_scores()
+        if key == "individual_scores":
+            return self.individual_scores()
+        if key in ("crisis_update", "story_continuation"):
+            return self.to_dict()[key]
+        return default
+
+    def __getitem__(self, key):
+        value = self.get(key, KeyError)
+        if value is KeyError:
+            raise KeyError(key)
+        return value
+
+    def to_compact(self):
+        return [
+            self.round, list(self.decisions), [_number(score) for score in self.scores],
+            self.crisis_score, self.score_change, self.story, self.next_decision_point, list(self.feedback)
+        ]
+
+    @classmethod
+    def load(cls, data, players):
+        """Read a record written by `to_compact`, or an old dict history entry"""
+        if isinstance(data, dict):
+            round_scores = data.get("round_scores", {})
+            individual_scores = data.get("individual_scores")
+            results = {}
+            for player in players:
+                if individual_scores is not None and player not in individual_scores:
+                    # Its scoring failed
+                    continue
+                results[player] = dict((individual_scores or {}).get(player, {}))
+                results[player].update({
+                    field: round_scores.get(player, {}).get(key, 0)
+                    for field, key in zip(RESULT_FIELDS, ROUND_SCORE_KEYS)
+                })
+            return cls.from_results(data.get("round"), players, data.get("decisions", {}), results,
+                                    data.get("crisis_update", {}), data.get("story_continuation", {}))
+        round_number, decisions, scores, crisis_score, score_change, story, next_decision_point = data[:7]
+        # Records written before feedback was kept have every player scored
+        feedback = tuple(data[7]) if len(data) > 7 else None
+        return cls(round_number, players, tuple(decisions), array("f", scores), crisis_score, score_change,
+                   story, next_decision_point, feedback)
+
+
+class GameSession:
+    """State of one running game, readable and writable like the old session dict"""
+
+    # Read and written like dict keys; the optional ones are missing until first set
+    FIELDS = ("room_id", "theme", "players", "roles", "player_roles", "scenario", "crisis_score",
+              "current_round", "max_rounds", "game_state", "player_decisions", "game_history",
+              "started_at", "scoring_mode")
+    OPTIONAL_FIELDS = ("story_summary", "round_start_time", "version")
+    # Derived from game_history on every read
+    DERIVED_FIELDS = ("player_total_scores", "player_round_scores")
+
+    __slots__ = FIELDS + OPTIONAL_FIELDS
+
+    def __init__(self, room_id, theme, players, roles=None, player_roles=None, scenario="", crisis_score=50,
+                 current_round=1, max_rounds=3, game_state="waiting_for_decisions", player_decisions=None,
+                 game_history=None, started_at=None, scoring_mode=None):
+        self.room_id = room_id
+        self.theme = theme
+        self.players = tuple(sys.intern(player) for player in players)
+        self.roles = {}
+        self.player_roles = {}
+        for key, role in (roles or {}).items():
+            self.roles[sys.intern(key)] = {
+                sys.intern(name): _intern(value) for name, value in role.items()
+            } if isinstance(role, dict) else role
+        self.set_player_roles(player_roles or {})
+        self.scenario = scenario
+        self.crisis_score = crisis_score
+        self.current_round = current_round
+        self.max_rounds = max_rounds
+        self.game_state = game_state
+        self.player_decisions = player_decisions if player_decisions is not None else {}
+        self.game_history = game_history if game_history is not None else []
+        self.started_at = started_at
+        self.scoring_mode = _intern(scoring_mode)
+
+    def set_player_roles(self, player_roles):
+        """Assign roles, sharing the role dicts in `roles` instead of copying them"""
+        by_name = {role.get("role_name"): role for role in self.roles.values() if isinstance(role, dict)}
+        self.player_roles = {
+            sys.intern(player): by_name.get(role.get("role_name"), role) if isinstance(role, dict) else role
+            for player, role in player_roles.items()
+        }
+
+    @property
+    def player_total_scores(self):
+        totals = dict.fromkeys(self.players, 0)
+        for record in self.game_history:
+            for index, player in enumerate(self.players):
+                totals[player] += record.total(index)
+        return {player: _number(float(total)) for player, total in totals.items()}
+
+    @property
+    def player_round_scores(self):
+        return {
+            player: [record.player_scores(index) for record in self.game_history if record.scored(index)]
+            for index, player in enumerate(self.players)
+        }
+
+    def add_round(self, score_results, crisis_update, story_continuation):
+        """Record the current round's results; returns the new RoundRecord"""
+        record = RoundRecord.from_results(self.current_round, self.players, self.player_decisions,
+                                          score_results, crisis_update, story_continuation)
+        self.game_history.append(record)
+        return record
+
+    # Dict-style access, so code written against the old session dict keeps working
+
+    def __getitem__(self, key):
+        if key in self.__slots__ or key in self.DERIVED_FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == "player_roles":
+            self.set_player_roles(value)
+        elif key in self.__slots__:
+            setattr(self, key, value)
+        elif key not in self.DERIVED_FIELDS:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return (key in self.__slots__ and hasattr(self, key)) or key in self.DERIVED_FIELDS
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, fields):
+        """Set several fields; derived ones (left by older writers) are ignored"""
+        for key, value in fields.items():
+            self[key] = value
+
+    def to_dict(self):
+        """The session in the shape of the old session dict"""
+        data = {key: self[key] for key in self.FIELDS + self.DERIVED_FIELDS}
+        data["game_history"] = [record.to_dict() for record in self.game_history]
+        for key in self.OPTIONAL_FIELDS:
+            if key in self:
+                data[key] = self[key]
+        return data
+
+    def to_compact(self):
+        """JSON-ready positional form; roles are referenced by key and rounds are flat lists"""
+        role_keys = {id(role): key for key, role in self.roles.items()}
+        return [
+            FORMAT_VERSION,
+            self.room_id,
+            self.theme,
+            list(self.players),
+            self.roles,
+            {player: role_keys.get(id(role), role) for player, role in self.player_roles.items()},
+            self.scenario,
+            self.crisis_score,
+            self.current_round,
+            self.max_rounds,
+            self.game_state,
+            self.player_decisions,
+            [record.to_compact() for record in self.game_history],
+            self.started_at,
+            self.scoring_mode,
+            [getattr(self, key, None) for key in self.OPTIONAL_FIELDS]
+        ]
+
+    @classmethod
+    def load(cls, data):
+        """Read a session written by `to_compact`, or an old session dict"""
+        if isinstance(data, dict):
+            session = cls(
+                data["room_id"], data.get("theme"), data.get("players", []), data.get("roles"),
+                data.get("player_roles"), data.get("scenario", ""), data.get("crisis_score", 50),
+                data.get("current_round", 1), data.get("max_rounds", 3),
+                data.get("game_state", "waiting_for_decisions"), data.get("player_decisions"),
+                started_at=data.get("started_at"), scoring_mode=data.get("scoring_mode")
+            )
+            session.game_history = [RoundRecord.load(entry, session.players) for entry in data.get("game_history", [])]
+            for key in cls.OPTIONAL_FIELDS:
+                if key in data:
+                    session[key] = data[key]
+            return session
+
+        (_, room_id, theme, players, roles, role_keys, scenario, crisis_score, current_round, max_rounds,
+         game_state, player_decisions, rounds, started_at, scoring_mode, optional) = data
+        session = cls(room_id, theme, players, roles, None, scenario, crisis_score, current_round, max_rounds,
+                      game_state, player_decisions, started_at=started_at, scoring_mode=scoring_mode)
+        session.player_roles = {
+            sys.intern(player): session.roles.get(role, {}) if isinstance(role, str) else role
+            for player, role in role_keys.items()
+        }
+        session.game_history = [RoundRecord.load(entry, session.players) for entry in rounds]
+        for key, value in zip(cls.OPTIONAL_FIELDS, optional):
+            if value is not None:
+                session[key] = value
+        return session
+
+
+def encode_session(session):
+    """Serialize a session (or an old session dict) for Redis"""
+    if isinstance(session, dict):
+        session = GameSession.load(session)
+    return json.dumps(session.to_compact(), separators=(",", ":"))
+
+
+def decode_session(data):
+    return GameSession.load(json.loads(data))
@@ -0,0 +1,156 @@
+import logging
+import threading
+
+import redis
+
+from data import Data
+from room_locks import RoomLock, StripedLock
+from session_model import decode_session, encode_session
+
+logger = logging.getLogger("odyssey.sessions")
+
+# Write a session only if its stored version still matches the one we read.
+# ARGV[1] = expected version (-1 to overwrite), ARGV[2] = data, ARGV[3] = ttl.
+# Returns the new version, or -1 on a version conflict.
+SAVE_SESSION_SCRIPT = """
+local current = tonumber(redis.call('HGET', KEYS[1], 'version') or '0')
+if ARGV[1] ~= '-1' and current ~= tonumber(ARGV[1]) then
+    return -1
+end
+redis.call('HSET', KEYS[1], 'version', current + 1, 'data', ARGV[2])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+return current + 1
+"""
+
+SESSION_KEY_PREFIX = "game_session:"
+
+
+class SessionStore:
+    """Game sessions shared by every worker through Redis.
+
+    Each session is a hash (`version`, `data`) written with an optimistic
+    version check. Reads go through an in-process write-through cache that
+    only costs a version lookup when the session has not changed elsewhere.
+    With backend "memory" (or if Redis is unavailable at startup) the cache
+    is the store, which is the old single-process behaviour.
+    """
+
+    def __init__(self, backend="redis", ttl=6 * 3600, lock_timeout=30, lock_wait=10, lock_stripes=256):
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.lock_wait = lock_wait
+        self.cache = {}
+        self.versions = {}
+        self.stripes = StripedLock(lock_stripes)
+        self.held = threading.local()
+        self.guard = threading.Lock()
+        self.redis_client = None
+        if backend == "redis":
+            try:
+                self.redis_client = Data.get_redis_client()
+                self.redis_client.ping()
+                self.save_script = self.redis_client.register_script(SAVE_SESSION_SCRIPT)
+            except Exception:
+                logger.warning("Redis unavailable, keeping game sessions in process memory")
+                self.redis_client = None
+
+    def _key(self, room_id):
+        return f"{SESSION_KEY_PREFIX}{room_id}"
+
+    def get(self, room_id, default=None):
+        """Get a session, reloading it only if another worker changed it"""
+        if self.redis_client is None:
+            return self.cache.get(room_id, default)
+        try:
+            version = self.redis_client.hget(self._key(room_id), "version")
+            if version is None:
+                self._forget(room_id)
+                return default
+            version = int(version)
+            if self.versions.get(room_id) == version and room_id in self.cache:
+                return self.cache[room_id]
+            # Read both fields at once so the version always matches the payload
+            version, data = self.redis_client.hmget(self._key(room_id), "version", "data")
+            if version is None or data is None:
+                self._forget(room_id)
+                return default
+            version = int(version)
+            session = decode_session(data)
+        except redis.RedisError:
+            logger.warning("Could not load game session %s from Redis, using cached copy", room_id)
+            return self.cache.get(room_id, default)
+
+        with self.guard:
+            self.cache[room_id] = session
+            self.versions[room_id] = version
+        return session
+
+    def save(self, session, overwrite=False):
+        """Write a session through to Redis; returns False on a version conflict"""
+        room_id = session["room_id"]
+        with self.guard:
+            self.cache[room_id] = session
+            expected = -1 if overwrite else self.versions.get(room_id, 0)
+        if self.redis_client is None:
+            return True
+        try:
+            version = int(self.save_script(
+                keys=[self._key(room_id)],
+                args=[expected, encode_session(session), int(self.ttl)]
+            ))
+        except redis.RedisError:
+            logger.warning("Could not save game session %s to Redis", room_id)
+            return False
+        if version < 0:
+            logger.warning("Game session %s was changed by another worker; dropping cached copy", room_id)
+            self._forget(room_id)
+            return False
+        with self.guard:
+            self.versions[room_id] = version
+        return True
+
+    def delete(self, room_id):
+        self._forget(room_id)
+        if self.redis_client is not None:
+            try:
+                self.redis_client.delete(self._key(room_id))
+            except redis.RedisError:
+                logger.warning("Could not delete game session %s from Redis", room_id)
+
+    def lock(self, room_id):
+        """Lock a room (across workers with Redis) while its session is read, changed and saved"""
+        remote = None
+        if self.redis_client is not None:
+            remote = self.redis_client.lock(
+                f"game_lock:{room_id}",
+                timeout=self.lock_timeout,
+                blocking_timeout=self.lock_wait
+            )
+        return RoomLock(room_id, self.stripes.get(room_id), remote, self.held)
+
+    def room_ids(self):
+        """Rooms with a stored session"""
+        if self.redis_client is None:
+            return list(self.cache)
+        try:
+            return [
+                key[len(SESSION_KEY_PREFIX):]
+                for key in self.redis_client.scan_iter(match=f"{SESSION_KEY_PREFIX}*", count=500)
+            ]
+        except redis.RedisError:
+            return list(self.cache)
+
+    def _forget(self, room_id):
+        with self.guard:
+            self.cache.pop(room_id, None)
+            self.versions.pop(room_id, None)
+
+    def __contains__(self, room_id):
+        return self.get(room_id) is not None
+
+    def __setitem__(self, room_id, session):
+        session["room_id"] = room_id
+        self.save(session, overwrite=True)
+
+    def __delitem__(self, room_id):
+        self.delete(room_id)
@@ -5,8 +5,33 @@ import threading
 import time
 import random
 
+from config import Config
 from data import Data
 from ai_engine import AIEngine
+from scoring import get_scorers, normalize_scoring_mode, SCORING_MODE_HEURISTIC
+from retry_policy import Deadline
+from incremental_scoring import IncrementalScorer
+from speculation import RoundSpeculator
+from rate_limiter import PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from task_pool import RoomTaskPool, check_async_mode
+from admission import AdmissionController, ADMISSION_START, ADMISSION_ROUND
+from scheduler import DeadlineScheduler
+from session_store import SessionStore
+from session_model import GameSession
+from lobby import LobbyBroadcaster, LOBBY_ROOM, LOBBY_DELTA_ROOM
+from presence import PresenceRegistry
+from game_events import next_version, game_snapshot
+from wire_format import client_encoding, encoding_room, encode_payload
+from event_log import GameEventLog
+from profiling import PROFILER, in_trace
+from instrumentation import (
+    instrument_handler, SOCKET_CONNECTIONS, GAMES_ACTIVE, LOBBY_ROOMS, ROOM_TASKS, TIMERS_SCHEDULED,
+    ADMISSION_SLOTS, ADMISSION_SHED, PLAYERS_ONLINE
+)
+from scoring import TIMEOUT_DECISION
+
+# Returned by __apply_round when another worker saved the session first
+SAVE_CONFLICT = object()
 
 
 class SocketEngine:
@@ -14,26 +39,135 @@ class SocketEngine:
         self.rooms = {}
         self.socket = None
         self.socket = socket
+        self.config = Config()
         self.ai_engine = AIEngine()
-        self.active_games = {}  # Track active game sessions
+        self.scorers = get_scorers(self.ai_engine, self.config)
+        self.incremental_scorer = IncrementalScorer(self.config.SCORING_WORKERS)
+        self.speculator = RoundSpeculator(self.incremental_scorer.executor)
+        check_async_mode(self.socket.server.eio.async_mode)
+        self.room_tasks = RoomTaskPool(self.socket.start_background_task, self.config.ROUND_WORKERS)
+        # Bounds the game starts and rounds calling the AI at once
+        self.admission = AdmissionController(
+            {ADMISSION_START: self.config.ADMISSION_MAX_STARTS, ADMISSION_ROUND: self.config.ADMISSION_MAX_ROUNDS},
+            shed_wait_seconds=self.config.ADMISSION_SHED_WAIT_SECONDS,
+            update_seconds=self.config.ADMISSION_UPDATE_SECONDS
+        )
+        self.scheduler = DeadlineScheduler(
+            self.socket.start_background_task, self.socket.server.eio.create_event
+        )
+        # Game sessions, shared with the other workers through Redis
+        self.active_games = SessionStore(
+            backend=self.config.GAME_STATE_BACKEND,
+            ttl=self.config.GAME_SESSION_TTL_SECONDS,
+            lock_timeout=self.config.GAME_LOCK_TIMEOUT_SECONDS,
+            lock_stripes=self.config.GAME_LOCK_STRIPES
+        )
+        self.lobby = LobbyBroadcaster(self.socket, window=self.config.LOBBY_BROADCAST_WINDOW)
+        # Usernames to live sids on every worker, for messages to one player
+        self.presence = PresenceRegistry(ttl=self.config.PRESENCE_TTL_SECONDS)
+        self.event_log = GameEventLog(
+            max_length=self.config.GAME_EVENT_STREAM_MAXLEN,
+            archive_dir=self.config.GAME_ARCHIVE_DIR,
+            history=self.config.GAME_EVENT_HISTORY,
+            ttl=self.config.GAME_EVENT_STREAM_TTL_SECONDS
+        )
+        # Events recorded on a session under its room lock, logged once the session is saved
+        self.pending_events = {}
         self.__events()
+        self.__gauges()
+        self.__resume_games()
+        try:
+            self.lobby.ensure()
+        except Exception:
+            pass
+        self.__schedule_heartbeat()
 
     def __events(self):
-        self.socket.on_event("connect", self.__connect)
-        self.socket.on_event("join", self.__join_room)
-        self.socket.on_event("leave", self.__leave_room)
-        self.socket.on_event("send-story", self.__story)
-        self.socket.on_event("rooms", self.__available_rooms)
-        self.socket.on_event("delete-room", self.__delete_room)
-        
-        self.socket.on_event("start_game", self.__start_game)
-        self.socket.on_event("submit_decision", self.__submit_decision)
-        self.socket.on_event("get_game_state", self.__get_game_state)
-        self.socket.on_event("end_game", self.__end_game)
-        self.socket.on_event("confirm_winner_popup", self.__confirm_winner_popup)
+        self.__on("connect", self.__connect)
+        self.__on("disconnect", self.__disconnect)
+        self.__on("join", self.__join_room)
+        self.__on("leave", self.__leave_room)
+        self.__on("send-story", self.__story)
+        self.__on("rooms", self.__available_rooms)
+        self.__on("delete-room", self.__delete_room)
+        
+        self.__on("start_game", self.__start_game)
+        self.__on("submit_decision", self.__submit_decision)
+        self.__on("get_game_state", self.__get_game_state)
+        self.__on("end_game", self.__end_game)
+        self.__on("confirm_winner_popup", self.__confirm_winner_popup)
+
+    def __on(self, event, handler):
+        self.socket.on_event(event, instrument_handler(event, PROFILER.profiled("socket", event, handler)))
+
+    def __gauges(self):
+        """Point the backend gauges at live state, read when /metrics is scraped"""
+        GAMES_ACTIVE.set_function(lambda: len(self.active_games.room_ids()))
+        LOBBY_ROOMS.set_function(self.lobby.room_count)
+        ROOM_TASKS.set_function(lambda: self.room_tasks.get_stats()["running_rooms"], state="running")
+        ROOM_TASKS.set_function(lambda: self.room_tasks.get_stats()["waiting_rooms"], state="waiting")
+        TIMERS_SCHEDULED.set_function(lambda: self.scheduler.get_stats()["scheduled"])
+        for kind in (ADMISSION_START, ADMISSION_ROUND):
+            for state in ("running", "waiting"):
+                ADMISSION_SLOTS.set_function(
+                    lambda kind=kind, state=state: self.admission.get_stats()[f"{kind}_{state}"],
+                    kind=kind, state=state
+                )
+        PLAYERS_ONLINE.set_function(self.presence.online_count)
 
     def __connect(self):
         username = request.args.get("username")
+        SOCKET_CONNECTIONS.labels().inc()
+        if username:
+            self.presence.connect(request.sid, username)
+            self.scheduler.cancel((username, "offline"))
+
+    def __disconnect(self):
+        SOCKET_CONNECTIONS.labels().dec()
+        username = self.presence.disconnect(request.sid)
+        if username:
+            # Last connection gone: give the player time to reconnect before freeing their seat
+            self.scheduler.schedule((username, "offline"), self.config.PRESENCE_GRACE_SECONDS,
+                                    self.socket.start_background_task, self.__drop_offline_player, username)
+
+    def __schedule_heartbeat(self):
+        self.scheduler.schedule(("presence", "heartbeat"), self.config.PRESENCE_HEARTBEAT_SECONDS,
+                                self.socket.start_background_task, self.__presence_heartbeat)
+
+    def __presence_heartbeat(self):
+        """Keep this worker's connections alive and clean up after players of workers that went away"""
+        try:
+            self.presence.heartbeat()
+            for username in self.presence.sweep():
+                self.__drop_offline_player(username)
+        except Exception:
+            pass
+        finally:
+            self.__schedule_heartbeat()
+
+    def __drop_offline_player(self, username):
+        """Take a player who stayed offline out of the room they were waiting in"""
+        try:
+            if self.presence.is_online(username):
+                return
+            room_id = self.presence.room_of(username)
+            if not room_id:
+                return
+            # Rooms with a game running keep their players; the round timeout covers them
+            left = Data.exit_room(room_id, username)
+            if left is not None:
+                self.presence.clear_room(username)
+            # False when they were no longer a member; nothing to announce then
+            if left:
+                self.socket.emit("game-room", {"message": f"'{username}' left the game."}, to=room_id)
+                self.lobby.room_changed(room_id)
+        except Exception:
+            pass
+
+    def __emit_to_user(self, event, data, username):
+        """Send an event to every live connection of a player, on any worker"""
+        for sid in self.presence.sids(username):
+            self.socket.emit(event, data, to=sid)
 
     def __join_room(self, data):
         username = data["username"]
@@ -44,12 +178,13 @@ class SocketEngine:
             room_name = data.get("roomName")
             room_theme = data.get("roomTheme")
             max_players = data.get("maxPlayers", 4)
+            scoring_mode = data.get("scoringMode")
 
             if not isinstance(max_players, int) or not (2 <= max_players <= 4):
                 self.__notify(msg="Player count must be between 2 and 4")
                 return
             
-            Data.create_room(room_id, username, room_name, room_theme, max_players)
+            Data.create_room(room_id, username, room_name, room_theme, max_players, scoring_mode)
             self.__game_room(username, room_id)
 
         elif option == "join":
@@ -70,19 +205,42 @@ class SocketEngine:
         room = data.get("room")
         message = data.get("message")
         leave_room(room)
+        leave_room(encoding_room(room, self.__encoding()))
         Data.exit_room(room, username)
+        self.presence.clear_room(username)
         self.__notify(message, id=room)
-        self.__available_rooms({}, True)
+        self.lobby.room_changed(room)
 
     def __notify(self, msg, id=None):
         if not id:
             id = request.sid
-        emit("notification", {"message": msg}, to=id)
+        self.socket.emit("notification", {"message": msg}, to=id)
+
+    def __encoding(self):
+        """Payload encoding the current client asked for (`encoding` query parameter)"""
+        return client_encoding(request.args.get("encoding"))
+
+    def __broadcast(self, event, data, room_id):
+        """Send a large event to a room, as MessagePack to the clients that opted in"""
+        self.socket.emit(event, data, to=encoding_room(room_id, "json"))
+        self.socket.emit(event, encode_payload(event, data), to=encoding_room(room_id, "msgpack"))
+
+    def __reply(self, event, data):
+        """Send an event to the current client in its payload encoding"""
+        if self.__encoding() == "msgpack":
+            data = encode_payload(event, data)
+        emit(event, data, to=request.sid)
 
     def __game_room(self, username, room_id):
         join_room(room_id)
+        join_room(encoding_room(room_id, self.__encoding()))
+        # In a room now, so stop receiving lobby updates
+        leave_room(LOBBY_ROOM)
+        leave_room(LOBBY_DELTA_ROOM)
         
         room_info = Data.get_room_info(room_id)
+        if room_info:
+            self.presence.set_room(username, room_id)
         
         emit(
             "game-room",
@@ -111,7 +269,8 @@ class SocketEngine:
             {"room_id": room_id},
             to=request.sid,
         )
-        self.__available_rooms({}, True)
+        # A random join may have picked any room
+        self.lobby.room_changed(room_id if room_info else None)
 
     def __story(self, data):
         emit(
@@ -121,9 +280,29 @@ class SocketEngine:
             include_self=False,
         )
 
-    def __available_rooms(self, _, broadcast=False):
-        rooms = Data.get_rooms()
-        emit("available-rooms", {"rooms": rooms}, to=request.sid, broadcast=broadcast)
+    def __available_rooms(self, data):
+        """Subscribe to the lobby and send the current room list.
+
+        Clients passing `deltas: true` get `lobby-delta` updates afterwards and,
+        with `since_version`, only the deltas they missed when still available.
+        Other clients get coalesced `available-rooms` lists.
+        """
+        data = data or {}
+        if not data.get("deltas"):
+            join_room(LOBBY_ROOM)
+            version, rooms = self.lobby.snapshot()
+            emit("available-rooms", {"rooms": rooms, "version": version}, to=request.sid)
+            return
+        
+        join_room(LOBBY_DELTA_ROOM)
+        since_version = data.get("since_version")
+        if isinstance(since_version, int):
+            deltas = self.lobby.deltas_since(since_version)
+            if deltas is not None:
+                emit("lobby-deltas", {"since_version": since_version, "deltas": deltas}, to=request.sid)
+                return
+        version, rooms = self.lobby.snapshot()
+        emit("lobby-snapshot", {"version": version, "rooms": rooms}, to=request.sid)
 
     def __delete_room(self, data):
         """Delete a room"""
@@ -150,11 +329,12 @@ class SocketEngine:
         success = Data.delete_room(room_id)
         if success:
             for member in room_info.get("members", []):
-                emit("room_deleted", {
+                self.presence.clear_room(member)
+                self.__emit_to_user("room_deleted", {
                     "message": f"Room {room_id} has been deleted by the host"
-                }, to=member)
+                }, member)
             
-            self.__available_rooms({}, True)
+            self.lobby.room_changed(room_id)
             self.__notify("Room deleted successfully")
         else:
             self.__notify("Failed to delete room")
@@ -181,33 +361,47 @@ class SocketEngine:
             self.__notify("Game already started")
             return
         
+        sid = request.sid
+        ticket = self.admission.request(
+            ADMISSION_START, room_id,
+            lambda ticket: self.socket.start_background_task(
+                PROFILER.profiled("task", "start_game", self.__create_game), ticket, sid
+            ),
+            on_wait=self.__queue_notice(room_id, ADMISSION_START),
+            max_wait=self.config.ADMISSION_START_MAX_WAIT_SECONDS
+        )
+        if ticket is None:
+            self.__notify("Game is already starting")
+            return
+        self.__schedule_admission_tick()
+
+    def __create_game(self, ticket, sid):
+        """Generate the scenario and start the game, once admitted (or locally after waiting too long)"""
+        room_id = ticket.room_id
         try:
-            game_data = self.ai_engine.generate_initial_scenario_and_roles(
-                theme=room.get("theme", "climate_change"),
-                player_count=len(room["members"])
-            )
+            if not self.admission.begin(ticket):
+                return
+            room = Data.get_room_info(room_id)
+            if not room or room.get("started", False) or len(room["members"]) < 2:
+                self.__notify("Game could not be started", id=sid)
+                return
+            
+            if ticket.granted:
+                game_data = self.ai_engine.generate_initial_scenario_and_roles(
+                    theme=room.get("theme", "climate_change"),
+                    player_count=len(room["members"])
+                )
+            else:
+                # Waited too long for the AI, start with a locally generated scenario
+                ADMISSION_SHED.labels(kind=ADMISSION_START).inc()
+                game_data = self.ai_engine.story_generator.initial_scenario(
+                    room.get("theme", "climate_change"), len(room["members"])
+                )
             
             if "error" in game_data:
-                self.__notify(f"Failed to start game: {game_data['error']}")
+                self.__notify(f"Failed to start game: {game_data['error']}", id=sid)
                 return
             
-            game_session = {
-                "room_id": room_id,
-                "theme": room.get("theme", "climate_change"),
-                "players": room["members"],
-                "roles": game_data.get("roles", {}),
-                "scenario": game_data.get("scenario", ""),
-                "crisis_score": game_data.get("initial_crisis_score", 50),
-                "current_round": 1,
-                "max_rounds": 3,
-                "game_state": "waiting_for_decisions",
-                "player_decisions": {},
-                "game_history": [],
-                "started_at": time.time(),
-                "player_total_scores": {player: 0 for player in room["members"]},
-                "player_round_scores": {player: [] for player in room["members"]}
-            }
-            
             player_roles = {}
             available_roles = list(game_data.get("roles", {}).keys())
             random.shuffle(available_roles)
@@ -218,19 +412,39 @@ class SocketEngine:
                     if role_key in game_data.get("roles", {}):
                         player_roles[player] = game_data["roles"][role_key]
             
-            game_session["player_roles"] = player_roles
-            self.active_games[room_id] = game_session
+            game_session = GameSession(
+                room_id=room_id,
+                theme=room.get("theme", "climate_change"),
+                players=room["members"],
+                roles=game_data.get("roles", {}),
+                player_roles=player_roles,
+                scenario=game_data.get("scenario", ""),
+                crisis_score=game_data.get("initial_crisis_score", 50),
+                started_at=time.time(),
+                scoring_mode=normalize_scoring_mode(room.get("scoring_mode"), self.config.SCORING_MODE)
+            )
+            self.__begin_decisions(game_session)
+            self.__record(game_session, "game_started", {
+                "round": 1,
+                "scenario": game_session["scenario"],
+                "crisis_score": game_session["crisis_score"],
+                "next_decision_point": game_data.get("next_decision_point", "")
+            }, state=game_session.to_compact())
+            if not self.__save(game_session, overwrite=True):
+                self.__notify("Failed to start game", id=sid)
+                return
             
             # Mark room as started
             Data.update_room_status(room_id, True)
+            self.lobby.room_changed(room_id)
             
             # Send immediate notification to all players that game is starting
-            emit("game_starting", {
+            self.socket.emit("game_starting", {
                 "message": "🚀 Game is starting... AI is generating scenario..."
             }, to=room_id)
             
             # Send game start to all players
-            emit("game_started", {
+            self.__broadcast("game_started", {
                 "scenario": game_data.get("scenario", ""),
                 "time_pressure": game_data.get("time_pressure", ""),
                 "stakeholders": game_data.get("stakeholders", ""),
@@ -241,18 +455,20 @@ class SocketEngine:
                 "next_decision_point": game_data.get("next_decision_point", ""),
                 "round": 1,
                 "decision_time_limit": 60
-            }, to=room_id)
+            }, room_id)
             
             # Start timer for first round
-            self.__start_decision_timer(room_id)
+            self.__start_decision_timer(room_id, game_session)
             # Emit decision timer started event to enable typing for all players
-            emit("decision_timer_started", {
+            self.socket.emit("decision_timer_started", {
                 "time_limit": 120,
                 "message": "You have 2 minutes to submit your decision"
             }, to=room_id)
             
         except Exception as e:
-            self.__notify("Failed to start game")
+            self.__notify("Failed to start game", id=sid)
+        finally:
+            self.admission.release(ticket)
 
     def __submit_decision(self, data):
         """Handle player decision submission"""
@@ -264,128 +480,278 @@ class SocketEngine:
             self.__notify("Invalid decision submission")
             return
         
-        game_session = self.active_games.get(room_id)
-        if not game_session:
-            self.__notify("No active game in this room")
-            return
-        
-        if username not in game_session["players"]:
-            self.__notify("You are not part of this game")
+        # Another worker may save the session between our read and write; re-read and retry
+        for attempt in range(self.config.GAME_SAVE_ATTEMPTS):
+            with self.active_games.lock(room_id):
+                game_session = self.active_games.get(room_id)
+                if not game_session:
+                    self.__notify("No active game in this room")
+                    return
+                
+                if username not in game_session["players"]:
+                    self.__notify("You are not part of this game")
+                    return
+                
+                if game_session["game_state"] == "processing_round":
+                    self.__notify("Decisions for this round are already being processed")
+                    return
+                
+                if game_session["game_state"] == "ended":
+                    self.__notify("This game has ended")
+                    return
+                
+                # Store player decision
+                game_session["player_decisions"][username] = decision
+                
+                # Check if all players have submitted decisions
+                submitted_count = len(game_session["player_decisions"])
+                total_players = len(game_session["players"])
+                self.__record(game_session, "decision_submitted", {
+                    "round": game_session["current_round"],
+                    "username": username,
+                    "decision": decision,
+                    "remaining_players": total_players - submitted_count
+                })
+                if submitted_count == total_players:
+                    game_session["game_state"] = "processing_round"
+                    self.__record(game_session, "round_processing", {"round": game_session["current_round"]})
+                if self.__save(game_session):
+                    break
+        else:
+            self.__notify("Could not save your decision, please submit it again")
             return
         
-        # Store player decision
-        game_session["player_decisions"][username] = decision
+        # Start scoring it right away so the end of the round only waits for stragglers,
+        # unless rounds are queueing and will be scored locally anyway
+        if self.__get_scorer(game_session).incremental and not self.admission.shedding(ADMISSION_ROUND):
+            self.incremental_scorer.submit(
+                room_id, username, game_session["current_round"], decision,
+                lambda: self.__score_decision(game_session, username, decision)
+            )
         
         # Notify other players
         emit("player_decision_submitted", {
             "username": username,
             "decision": decision,
-            "remaining_players": len(game_session["players"]) - len(game_session["player_decisions"])
+            "remaining_players": total_players - submitted_count
         }, to=room_id, include_self=False)
         
-        # Check if all players have submitted decisions
-        submitted_count = len(game_session["player_decisions"])
-        total_players = len(game_session["players"])
-        
         if submitted_count == total_players:
             # Process all decisions with AI
-            self.__process_round(room_id)
+            self.__queue_round(room_id, game_session["current_round"])
         else:
-            # Check if we should add timeout decisions for missing players
-            # Only do this if it's been a while since the round started
-            import time
-            current_time = time.time()
-            round_start_time = game_session.get("round_start_time", current_time)
-            
-            # If more than 2.5 minutes have passed, add timeout decisions
-            if current_time - round_start_time > 150:  # 2.5 minutes
+            if self.config.SPECULATIVE_ROUNDS and submitted_count == total_players - 1:
+                self.__on_speculate(room_id)
+
+    def __queue_round(self, room_id, round_number):
+        """Queue a complete round for admission; it goes to the background room workers once admitted"""
+        self.__cancel_timers(room_id)
+        self.admission.request(
+            ADMISSION_ROUND, room_id,
+            lambda ticket: self.room_tasks.submit(
+                room_id, PROFILER.profiled("task", "process_round", self.__process_round),
+                room_id, round_number, ticket
+            ),
+            on_wait=self.__queue_notice(room_id, ADMISSION_ROUND),
+            key=(room_id, round_number)
+        )
+        self.__schedule_admission_tick()
+
+    def __schedule_admission_tick(self):
+        self.scheduler.schedule(("admission", "tick"), self.config.ADMISSION_UPDATE_SECONDS,
+                                self.socket.start_background_task, self.__admission_tick)
+
+    def __admission_tick(self):
+        """Resend queue positions and expire starts that waited too long, while rooms are waiting"""
+        try:
+            waiting = self.admission.tick()
+        except Exception:
+            waiting = True
+        if waiting:
+            self.__schedule_admission_tick()
+
+    def __on_round_timeout(self, room_id, round_number):
+        """Scheduler callback: fill in missing decisions and process the round"""
+        self.room_tasks.submit(room_id, PROFILER.profiled("task", "timeout_round", self.__timeout_round),
+                               room_id, round_number)
+
+    def __timeout_round(self, token, room_id, round_number):
+        for attempt in range(self.config.GAME_SAVE_ATTEMPTS):
+            with self.active_games.lock(room_id):
+                game_session = self.active_games.get(room_id)
+                if (not game_session or token.cancelled
+                        or game_session["current_round"] != round_number
+                        or game_session["game_state"] != "waiting_for_decisions"):
+                    return
+                
                 missing_players = []
                 for player in game_session["players"]:
                     if player not in game_session["player_decisions"]:
                         missing_players.append(player)
-                        game_session["player_decisions"][player] = "No response provided - timeout"
-                
-                if missing_players:
-                    # Notify about timeout
-                    emit("timeout_notification", {
-                        "message": f"⏰ Time's up! {len(missing_players)} player(s) didn't respond in time.",
-                        "missing_players": missing_players,
-                        "timeout_count": len(missing_players)
-                    }, to=room_id)
-                    
-                    # Process round with timeout decisions
-                    self.__process_round(room_id)
+                        game_session["player_decisions"][player] = TIMEOUT_DECISION
+                game_session["game_state"] = "processing_round"
+                self.__record(game_session, "round_processing", {
+                    "round": round_number,
+                    "missing_players": missing_players
+                })
+                if self.__save(game_session):
+                    break
+        else:
+            # Still conflicting, try the timeout again shortly rather than losing the round
+            self.scheduler.schedule((room_id, "round"), 1, self.__on_round_timeout, room_id, round_number)
+            return
+        
+        if missing_players:
+            # Notify about timeout
+            self.socket.emit("timeout_notification", {
+                "message": f"⏰ Time's up! {len(missing_players)} player(s) didn't respond in time.",
+                "missing_players": missing_players,
+                "timeout_count": len(missing_players)
+            }, to=room_id)
+        
+        # Process round with timeout decisions
+        self.__queue_round(room_id, round_number)
 
+    def __resume_games(self):
+        """Re-arm round timers for games left running by a previous process"""
+        self.__replay_lost_games()
+        for room_id in self.active_games.room_ids():
+            game_session = self.active_games.get(room_id)
+            if not game_session:
+                continue
+            if game_session["game_state"] == "processing_round":
+                # Give a live worker time to finish before treating the round as abandoned
+                self.scheduler.schedule((room_id, "round"), self.config.AI_ROUND_DEADLINE_SECONDS + 5,
+                                        self.__on_round_abandoned, room_id, game_session["current_round"])
+                continue
+            elapsed = time.time() - game_session.get("round_start_time", time.time())
+            self.scheduler.schedule((room_id, "round"), max(0, self.config.ROUND_TIMEOUT_SECONDS - elapsed),
+                                    self.__on_round_timeout, room_id, game_session["current_round"])
 
-    def __process_round(self, room_id):
+    def __replay_lost_games(self):
+        """Rebuild unfinished games whose session was lost (e.g. an in-memory store) from their event streams"""
+        try:
+            # Ended and abandoned games are archived rather than brought back
+            self.event_log.archive_finished(self.config.GAME_REPLAY_MAX_IDLE_SECONDS)
+            room_ids = self.event_log.room_ids()
+        except Exception:
+            return
+        for room_id in room_ids:
+            try:
+                if room_id in self.active_games or self.event_log.is_finished(room_id):
+                    continue
+                game_session = self.event_log.replay(room_id)
+            except Exception:
+                continue
+            if game_session and game_session["game_state"] != "ended":
+                self.active_games.save(game_session, overwrite=True)
+
+    def __on_round_abandoned(self, room_id, round_number):
+        """Scheduler callback: reprocess a round whose worker went away"""
+        self.room_tasks.submit(room_id, PROFILER.profiled("task", "recover_round", self.__recover_round),
+                               room_id, round_number)
+
+    def __recover_round(self, token, room_id, round_number):
+        with self.active_games.lock(room_id):
+            game_session = self.active_games.get(room_id)
+            if (not game_session or game_session["current_round"] != round_number
+                    or game_session["game_state"] != "processing_round"):
+                return
+        self.__queue_round(room_id, round_number)
+
+    def __cancel_timers(self, room_id):
+        self.scheduler.cancel((room_id, "round"))
+        self.scheduler.cancel((room_id, "speculate"))
+
+    def __queue_notice(self, room_id, kind):
+        """Tell a room waiting for admission where it is in line"""
+        def notify(position, eta_seconds):
+            self.socket.emit("admission_queue", {
+                "kind": kind,
+                "position": position,
+                "eta_seconds": eta_seconds,
+                "message": f"⏳ The AI is busy, you are number {position} in line (about {int(eta_seconds)}s)"
+            }, to=room_id)
+        return notify
+
+    def __process_round(self, token, room_id, round_number, ticket):
+        """Process an admitted round; rounds that queued too long are scored locally"""
+        try:
+            if not self.admission.begin(ticket):
+                return
+            if ticket.shed:
+                ADMISSION_SHED.labels(kind=ADMISSION_ROUND).inc()
+            self.__run_round(token, room_id, round_number, shed=ticket.shed)
+        finally:
+            self.admission.release(ticket)
+
+    def __run_round(self, token, room_id, round_number, shed=False):
         """Process a complete round with AI"""
         game_session = self.active_games.get(room_id)
-        if not game_session:
+        # A round is processed once: duplicates find it applied or no longer processing
+        if (not game_session or token.cancelled
+                or game_session["current_round"] != round_number
+                or game_session["game_state"] != "processing_round"):
             return
         
+        # Every AI call for this round shares one budget, bounding its worst case
+        deadline = Deadline(self.config.AI_ROUND_DEADLINE_SECONDS)
+        scored = []
+        
+        def report_progress(username, result):
+            scored.append(username)
+            self.socket.emit("scoring_progress", {
+                "username": username,
+                "round": game_session["current_round"],
+                "scored": len(scored),
+                "total": len(game_session["player_decisions"])
+            }, to=room_id)
+        
         try:
-            # Score individual responses with detailed criteria
-            individual_scores = {}
-            round_scores = {}
-            
-            for username, decision in game_session["player_decisions"].items():
-                role = game_session["player_roles"].get(username, {})
-                score_result = self.ai_engine.score_individual_response(
-                    theme=game_session["theme"],
-                    player_response=decision,
-                    role=role.get("role_name", "Player"),
-                    round_number=game_session["current_round"]
-                )
-                
-                if "error" not in score_result:
-                    # Extract individual criteria scores
-                    creativity = score_result.get("creativity_score", 0)
-                    helping_nature = score_result.get("helping_nature_score", 0)
-                    team_strategy = score_result.get("team_strategy_score", 0)
-                    role_appropriateness = score_result.get("role_appropriateness_score", 0)
-                    total_round_score = score_result.get("total_individual_score", 0)
-                    
-                    # Store detailed scores
-                    individual_scores[username] = score_result
-                    round_scores[username] = {
-                        "creativity": creativity,
-                        "helping_nature": helping_nature,
-                        "team_strategy": team_strategy,
-                        "role_appropriateness": role_appropriateness,
-                        "total_round_score": total_round_score,
-                        "round": game_session["current_round"]
-                    }
-                    
-                    # Update player's total score
-                    game_session["player_total_scores"][username] += total_round_score
-                    game_session["player_round_scores"][username].append(round_scores[username])
-                else:
-                    # Use default scores if AI fails
-                    round_scores[username] = {
-                        "creativity": 0,
-                        "helping_nature": 0,
-                        "team_strategy": 0,
-                        "role_appropriateness": 0,
-                        "total_round_score": 0,
-                        "round": game_session["current_round"]
-                    }
-            
             # Notify all players that AI analysis is starting
             try:
-                emit("ai_analysis_started", {
+                self.socket.emit("ai_analysis_started", {
                     "message": "🤖 AI is analyzing your responses and creating the next scenario..."
                 }, to=room_id)
             except Exception as e:
                 pass
             
+            # Crisis update and story continuation only depend on the decisions,
+            # so run them alongside the outstanding individual scores
+            drafts = self.speculator.take(room_id, game_session["current_round"], game_session["player_decisions"])
+            if drafts:
+                crisis_future, story_future = drafts
+            else:
+                decisions = dict(game_session["player_decisions"])
+                executor = self.incremental_scorer.executor
+                crisis_future = executor.submit(in_trace(self.__update_crisis), game_session, decisions, deadline)
+                story_future = executor.submit(in_trace(self.__continue_story), game_session, decisions, deadline)
+            
+            scorer = self.__get_scorer(game_session)
+            if shed:
+                # Too busy for an LLM call per player: score locally and drop any scoring in flight
+                scorer = self.scorers[SCORING_MODE_HEURISTIC]
+                self.incremental_scorer.discard(room_id)
+            
+            # Score individual responses with detailed criteria
+            if scorer.incremental:
+                score_results = self.incremental_scorer.collect(
+                    room_id,
+                    game_session["current_round"],
+                    game_session["player_decisions"],
+                    lambda username, decision: self.__score_decision(game_session, username, decision, deadline),
+                    timeout=deadline.remaining(),
+                    on_result=report_progress
+                )
+            else:
+                score_results = {}
+                for username, decision in game_session["player_decisions"].items():
+                    score_results[username] = self.__score_decision(game_session, username, decision, deadline, scorer)
+                    report_progress(username, score_results[username])
+            
             # Update crisis score with error handling and timeout
             try:
-                crisis_update = self.ai_engine.update_crisis_score(
-                    theme=game_session["theme"],
-                    current_crisis_score=game_session["crisis_score"],
-                    all_player_responses=game_session["player_decisions"],
-                    round_number=game_session["current_round"]
-                )
+                crisis_update = crisis_future.result(timeout=deadline.remaining() + 1)
             except Exception as e:
                 # Fallback: keep current crisis score
                 crisis_update = {
@@ -396,13 +762,7 @@ class SocketEngine:
             
             # Generate story continuation with error handling
             try:
-                story_continuation = self.ai_engine.generate_story_continuation(
-                    theme=game_session["theme"],
-                    current_scenario=game_session["scenario"],
-                    crisis_score=game_session["crisis_score"],
-                    all_responses=game_session["player_decisions"],
-                    round_number=game_session["current_round"]
-                )
+                story_continuation = story_future.result(timeout=deadline.remaining() + 1)
                 
                 # Check if AI returned an error
                 if isinstance(story_continuation, dict) and "error" in story_continuation:
@@ -419,77 +779,35 @@ class SocketEngine:
                     "next_decision_point": "What should the team do next? Consider the current crisis level and work together to find solutions."
                 }
             
-            # Notify all players that AI analysis is complete
-            try:
-                emit("ai_analysis_completed", {
-                    "message": "✅ AI analysis complete! Preparing next round..."
-                }, to=room_id)
-            except Exception as e:
-                pass
-            
-            # Update game state
-            game_session["crisis_score"] = crisis_update.get("new_crisis_score", game_session["crisis_score"])
-            game_session["scenario"] = story_continuation.get("story_continuation", game_session["scenario"])
-            game_session["current_round"] += 1
+            # Stop before touching the session if the game was ended meanwhile
+            if token.cancelled:
+                return
             
-            # Add to history with detailed scoring
-            game_session["game_history"].append({
-                "round": game_session["current_round"] - 1,
-                "decisions": game_session["player_decisions"].copy(),
-                "individual_scores": individual_scores,
-                "round_scores": round_scores,
-                "crisis_update": crisis_update,
-                "story_continuation": story_continuation,
-                "player_total_scores": game_session["player_total_scores"].copy()
-            })
+            for attempt in range(self.config.GAME_SAVE_ATTEMPTS):
+                with self.active_games.lock(room_id):
+                    game_over = self.__apply_round(
+                        token, room_id, round_number, score_results, crisis_update, story_continuation
+                    )
+                if game_over is not SAVE_CONFLICT:
+                    break
             
-            # Check if game should end
-            if (game_session["crisis_score"] >= 80 or 
-                game_session["crisis_score"] <= 20 or 
-                game_session["current_round"] > game_session["max_rounds"]):
+            if game_over is SAVE_CONFLICT:
+                # Still processing_round in the stored session, so process the round again
+                self.scheduler.schedule((room_id, "round"), 1, self.__on_round_abandoned, room_id, round_number)
+                return
+            if game_over is None:
+                return
+            if game_over:
                 self.__end_game_automatically(room_id)
                 return
             
-            # Send round results to all players with detailed scoring
-            try:
-                round_data = {
-                    "round": game_session["current_round"] - 1,
-                    "individual_scores": individual_scores,
-                    "round_scores": round_scores,
-                    "player_total_scores": game_session["player_total_scores"],
-                    "crisis_score": game_session["crisis_score"],
-                    "score_change": crisis_update.get("score_change", 0),
-                    "story_continuation": story_continuation.get("story_continuation", ""),
-                    "new_challenges": story_continuation.get("new_challenges", ""),
-                    "next_decision_point": story_continuation.get("next_decision_point", ""),
-                    "team_collaboration": crisis_update.get("team_collaboration", ""),
-                    "reasoning": crisis_update.get("reasoning", "")
-                }
-                # Ensure we have content for story continuation and next decision point
-                if not round_data['story_continuation'] or round_data['story_continuation'].strip() == "":
-                    round_data['story_continuation'] = f"The team's decisions in Round {game_session['current_round']} have been noted. The situation continues to evolve..."
-                
-                if not round_data['next_decision_point'] or round_data['next_decision_point'].strip() == "":
-                    round_data['next_decision_point'] = "What should the team do next? Consider the current crisis level and work together to find solutions."
-                
-                emit("round_completed", round_data, to=room_id)
-            except Exception as e:
-                pass
-            
-            # Reset for next round
-            game_session["player_decisions"] = {}
-            game_session["game_state"] = "waiting_for_decisions"
-            
-            # Start timer for next round if game continues
-            if game_session["current_round"] <= game_session["max_rounds"]:
-                self.__start_decision_timer(room_id)
+            if round_number < game_session["max_rounds"]:
                 # Add a small delay to let the frontend process the round_completed messages first
-                import time
-                time.sleep(0.5)  # 500ms delay
+                self.socket.sleep(0.5)  # 500ms delay
                 
                 # Emit decision timer started event to enable typing for all players
                 try:
-                    emit("decision_timer_started", {
+                    self.socket.emit("decision_timer_started", {
                         "time_limit": 120,
                         "message": "You have 2 minutes to submit your decision"
                     }, to=room_id)
@@ -499,25 +817,212 @@ class SocketEngine:
         except Exception as e:
             pass
 
-    def __start_decision_timer(self, room_id):
-        """Start decision phase - frontend handles timer"""
-        import time
-        if room_id in self.active_games:
-            game_session = self.active_games[room_id]
-            game_session["game_state"] = "waiting_for_decisions"
-            game_session["round_start_time"] = time.time()  # Track when round started
+    def __apply_round(self, token, room_id, round_number, score_results, crisis_update, story_continuation):
+        """Apply a processed round to the latest stored session.
+        
+        Returns True if the game is over, False if the next round started,
+        None if the round was already applied or the game ended meanwhile and
+        SAVE_CONFLICT if the session changed before it could be saved.
+        """
+        game_session = self.active_games.get(room_id)
+        if (not game_session or token.cancelled
+                or game_session["current_round"] != round_number
+                or game_session["game_state"] != "processing_round"):
+            return None
+        
+        individual_scores = {
+            username: score_result
+            for username, score_result in score_results.items()
+            if "error" not in score_result
+        }
+        # Failed scores count as zero in the round and are left out of the player's round scores
+        record = game_session.add_round(score_results, crisis_update, story_continuation)
+        round_scores = record.round_scores()
+        
+        # Update game state
+        # Fold the scenario being replaced into the rolling story summary
+        game_session["story_summary"] = self.ai_engine.prompt_builder.update_summary(
+            game_session.get("story_summary", ""),
+            game_session["current_round"],
+            game_session["crisis_score"],
+            game_session["scenario"]
+        )
+        game_session["crisis_score"] = crisis_update.get("new_crisis_score", game_session["crisis_score"])
+        game_session["scenario"] = story_continuation.get("story_continuation", game_session["scenario"])
+        game_session["current_round"] += 1
+        
+        self.__record(game_session, "round_completed", {
+            "round": game_session["current_round"] - 1,
+            "round_scores": round_scores,
+            "player_total_scores": game_session["player_total_scores"],
+            "crisis_score": game_session["crisis_score"],
+            "story_continuation": story_continuation.get("story_continuation", ""),
+            "next_decision_point": story_continuation.get("next_decision_point", "")
+        }, state={
+            "crisis_score": game_session["crisis_score"],
+            "scenario": game_session["scenario"],
+            "story_summary": game_session["story_summary"],
+            "current_round": game_session["current_round"],
+            "history_entry": record.to_compact()
+        })
+        
+        # Check if game should end
+        game_over = (game_session["crisis_score"] >= 80 or 
+                     game_session["crisis_score"] <= 20 or 
+                     game_session["current_round"] > game_session["max_rounds"])
+        if not game_over:
+            # Reset for next round
+            game_session["player_decisions"] = {}
+            self.__begin_decisions(game_session)
+        
+        # Nothing is sent to the players until the round is stored
+        if not self.__save(game_session):
+            return SAVE_CONFLICT
+        
+        # Notify all players that AI analysis is complete
+        try:
+            self.socket.emit("ai_analysis_completed", {
+                "message": "✅ AI analysis complete! Preparing next round..."
+            }, to=room_id)
+        except Exception as e:
+            pass
+        
+        if game_over:
+            return True
+        
+        # Send round results to all players with detailed scoring
+        try:
+            round_data = {
+                "round": game_session["current_round"] - 1,
+                "individual_scores": individual_scores,
+                "round_scores": round_scores,
+                "player_total_scores": game_session["player_total_scores"],
+                "crisis_score": game_session["crisis_score"],
+                "score_change": crisis_update.get("score_change", 0),
+                "story_continuation": story_continuation.get("story_continuation", ""),
+                "new_challenges": story_continuation.get("new_challenges", ""),
+                "next_decision_point": story_continuation.get("next_decision_point", ""),
+                "team_collaboration": crisis_update.get("team_collaboration", ""),
+                "reasoning": crisis_update.get("reasoning", "")
+            }
+            # Ensure we have content for story continuation and next decision point
+            if not round_data['story_continuation'] or round_data['story_continuation'].strip() == "":
+                round_data['story_continuation'] = f"The team's decisions in Round {game_session['current_round']} have been noted. The situation continues to evolve..."
+        
+            if not round_data['next_decision_point'] or round_data['next_decision_point'].strip() == "":
+                round_data['next_decision_point'] = "What should the team do next? Consider the current crisis level and work together to find solutions."
+        
+            self.__broadcast("round_completed", round_data, room_id)
+        except Exception as e:
+            pass
+        
+        # Start timer for next round
+        self.__start_decision_timer(room_id, game_session)
+        return False
+
+    def __get_scorer(self, game_session):
+        """Get the scoring backend selected for this game"""
+        mode = normalize_scoring_mode(game_session.get("scoring_mode"), self.config.SCORING_MODE)
+        return self.scorers[mode]
+
+    def __update_crisis(self, game_session, decisions, deadline=None, priority=PRIORITY_INTERACTIVE):
+        """Get the crisis score update for a set of decisions"""
+        return self.ai_engine.update_crisis_score(
+            theme=game_session["theme"],
+            current_crisis_score=game_session["crisis_score"],
+            all_player_responses=decisions,
+            round_number=game_session["current_round"],
+            deadline=deadline,
+            priority=priority
+        )
+
+    def __continue_story(self, game_session, decisions, deadline=None, priority=PRIORITY_INTERACTIVE):
+        """Get the story continuation for a set of decisions"""
+        return self.ai_engine.generate_story_continuation(
+            theme=game_session["theme"],
+            current_scenario=game_session["scenario"],
+            crisis_score=game_session["crisis_score"],
+            all_responses=decisions,
+            round_number=game_session["current_round"],
+            story_summary=game_session.get("story_summary", ""),
+            deadline=deadline,
+            priority=priority
+        )
+
+    def __on_speculate(self, room_id):
+        """Draft the round on the room's worker, off the handler and scheduler (it reads the session)"""
+        self.room_tasks.submit(room_id, PROFILER.profiled("task", "speculate_round", self.__speculate_round),
+                               room_id)
+
+    def __speculate_round(self, token, room_id):
+        """Draft the round's crisis update and story assuming the last player times out"""
+        game_session = self.active_games.get(room_id)
+        if not game_session or token.cancelled or game_session["game_state"] != "waiting_for_decisions":
+            return
+        self.speculator.speculate(
+            room_id,
+            game_session["current_round"],
+            game_session["player_decisions"],
+            game_session["players"],
+            lambda decisions: self.__update_crisis(game_session, decisions, priority=PRIORITY_BACKGROUND),
+            lambda decisions: self.__continue_story(game_session, decisions, priority=PRIORITY_BACKGROUND)
+        )
+
+    def __score_decision(self, game_session, username, decision, deadline=None, scorer=None):
+        """Score one player's decision against the rest of the team's"""
+        role = game_session["player_roles"].get(username, {})
+        scorer = scorer or self.__get_scorer(game_session)
+        return scorer.score(
+            theme=game_session["theme"],
+            player_response=decision,
+            role=role.get("role_name", "Player"),
+            round_number=game_session["current_round"],
+            teammates=[player for player in game_session["players"] if player != username],
+            other_responses=[
+                other_decision
+                for player, other_decision in game_session["player_decisions"].items()
+                if player != username
+            ],
+            deadline=deadline
+        )
+
+    def __begin_decisions(self, game_session):
+        """Open the decision phase of the session's current round (saved by the caller)"""
+        game_session["game_state"] = "waiting_for_decisions"
+        game_session["round_start_time"] = time.time()  # Track when round started
+
+    def __start_decision_timer(self, room_id, game_session):
+        """Schedule the server-side timeout of a saved round and tell the players"""
+        timeout = self.config.ROUND_TIMEOUT_SECONDS
+        self.scheduler.schedule((room_id, "round"), timeout, self.__on_round_timeout,
+                                room_id, game_session["current_round"])
+        if self.config.SPECULATIVE_ROUNDS:
+            # Draft the round shortly before the timeout fills in missing decisions
+            self.scheduler.schedule((room_id, "speculate"), timeout - self.config.SPECULATION_LEAD_SECONDS,
+                                    self.__on_speculate, room_id)
         
         # Notify players about timer
-        emit("decision_timer_started", {
+        self.socket.emit("decision_timer_started", {
             "time_limit": 120,
             "message": "You have 2 minutes to submit your decision"
         }, to=room_id)
 
     def __end_game_automatically(self, room_id):
         """End game automatically based on conditions"""
-        game_session = self.active_games.get(room_id)
-        if not game_session:
+        # Claim the ending so a concurrent end_game or round cannot run it twice
+        for attempt in range(self.config.GAME_SAVE_ATTEMPTS):
+            with self.active_games.lock(room_id):
+                game_session = self.active_games.get(room_id)
+                if not game_session or game_session["game_state"] == "ended":
+                    return
+                game_session["game_state"] = "ended"
+                self.__record(game_session, "game_ending", {"round": game_session["current_round"]})
+                if self.__save(game_session):
+                    break
+        else:
+            self.__notify("Error ending game", id=room_id)
             return
+        self.__cancel_timers(room_id)
         
         try:
             # Calculate final scores
@@ -568,8 +1073,14 @@ class SocketEngine:
                     "round_scores": player.get("round_scores", [])
                 }
             
+            self.event_log.append(room_id, "game_ended", {
+                "player_rankings": player_rankings,
+                "final_crisis_score": game_session["crisis_score"],
+                "game_history": [record.to_dict() for record in game_session["game_history"]]
+            })
+            
             # Send final results with rankings and winner popup
-            emit("game_ended", {
+            self.__broadcast("game_ended", {
                 "final_scores": final_scores,
                 "player_rankings": player_rankings,
                 "player_scores": player_scores,
@@ -581,39 +1092,72 @@ class SocketEngine:
                 "winner": player_rankings[0]["username"] if player_rankings else None,
                 "show_winner_popup": True,
                 "auto_exit_after_popup": True
-            }, to=room_id)
+            }, room_id)
             
-            # Schedule auto-exit after 10 seconds (time for players to see popup)
-            import threading
-            def auto_exit():
-                import time
-                time.sleep(10)  # Wait 10 seconds for popup
-                for player in game_session["players"]:
+            # Schedule auto-exit (time for players to see popup)
+            players = list(game_session["players"])
+            def auto_exit(token):
+                for player in players:
                     try:
                         Data.exit_room(room_id, player)
-                        emit("notification", {
+                        self.presence.clear_room(player)
+                        self.__emit_to_user("notification", {
                             "message": "Game ended. You have been automatically removed from the room."
-                        }, to=player)
+                        }, player)
                     except:
                         pass
                 # Clean up room if empty
                 Data.cleanup_empty_rooms()
+                self.lobby.room_changed(room_id)
+                # Move the finished game's events out of Redis
+                try:
+                    self.event_log.archive(room_id)
+                except Exception:
+                    pass
             
-            exit_thread = threading.Thread(target=auto_exit)
-            exit_thread.daemon = True
-            exit_thread.start()
+            self.scheduler.schedule(
+                (room_id, "auto_exit"),
+                self.config.GAME_AUTO_EXIT_SECONDS,
+                lambda: self.room_tasks.submit(room_id, auto_exit)
+            )
             
             # Clean up
-            del self.active_games[room_id]
+            self.incremental_scorer.discard(room_id)
+            self.speculator.discard(room_id)
+            self.__cancel_timers(room_id)
+            self.active_games.delete(room_id)
             Data.update_room_status(room_id, False)
+            self.lobby.room_changed(room_id)
             
         except Exception as e:
             self.__notify("Error ending game", id=room_id)
 
+    def __record(self, game_session, event_type, data, state=None):
+        """Bump the session version and queue the change for the game's event stream, with the
+        changed fields (`state`) for replay and the version for clients syncing with `since_version`"""
+        version = next_version(game_session)
+        self.pending_events.setdefault(game_session["room_id"], []).append((event_type, data, state, version))
+        return version
+
+    def __save(self, game_session, overwrite=False):
+        """Save a session and log its recorded events; on a conflict they are dropped with the change"""
+        room_id = game_session["room_id"]
+        events = self.pending_events.pop(room_id, [])
+        if not self.active_games.save(game_session, overwrite=overwrite):
+            return False
+        for event_type, data, state, version in events:
+            self.event_log.append(room_id, event_type, data, state, version)
+        return True
+
     def __get_game_state(self, data):
-        """Get current game state"""
+        """Get current game state.
+        
+        With `since_version`, only the events missed since then are sent when
+        the game's event stream still covers them; otherwise a full snapshot.
+        """
         room_id = data.get("room_id")
         username = data.get("username")
+        since_version = data.get("since_version")
         
         if not room_id or not username:
             self.__notify("Invalid request")
@@ -628,17 +1172,21 @@ class SocketEngine:
             emit("game_state", {"error": "Not part of this game"}, to=request.sid)
             return
         
+        if isinstance(since_version, int):
+            events = self.event_log.events_since(room_id, since_version, game_session.get("version", 0))
+            if events is not None:
+                self.__reply("game_state", {
+                    "sync": "delta",
+                    "since_version": since_version,
+                    "version": game_session.get("version", 0),
+                    "events": events
+                })
+                return
+        
         # Send current game state
-        emit("game_state", {
-            "scenario": game_session["scenario"],
-            "crisis_score": game_session["crisis_score"],
-            "current_round": game_session["current_round"],
-            "max_rounds": game_session["max_rounds"],
-            "game_state": game_session["game_state"],
-            "player_role": game_session["player_roles"].get(username, {}),
-            "remaining_decisions": len(game_session["players"]) - len(game_session["player_decisions"]),
-            "theme": game_session["theme"]
-        }, to=request.sid)
+        state = game_snapshot(game_session, username, self.scheduler.remaining((room_id, "round")))
+        state["sync"] = "snapshot"
+        self.__reply("game_state", state)
 
     def __end_game(self, data):
         """Manually end game"""
@@ -659,8 +1207,10 @@ class SocketEngine:
             self.__notify("Only host can end game")
             return
         
-        # End game manually
-        self.__end_game_automatically(room_id)
+        # End game manually, abandoning any round still being processed or waiting for admission
+        self.room_tasks.cancel(room_id)
+        self.admission.cancel_room(room_id)
+        self.room_tasks.submit(room_id, lambda token: self.__end_game_automatically(room_id))
     
     def __confirm_winner_popup(self, data):
         """Player confirms they've seen the winner popup"""
@@ -0,0 +1,95 @@
+import threading
+
+from metrics import Counter
+from scoring import TIMEOUT_DECISION
+
+SPECULATIONS = Counter(
+    "speculative_round_total",
+    "Speculative crisis/story drafts by outcome (hit, miss)",
+    ("outcome",)
+)
+
+
+def normalize_decision(decision):
+    """Compare decisions ignoring case and whitespace differences"""
+    return " ".join(str(decision).lower().split())
+
+
+def decisions_key(decisions):
+    return tuple(sorted((player, normalize_decision(decision)) for player, decision in decisions.items()))
+
+
+class RoundSpeculator:
+    """Drafts a round's crisis update and story continuation before the last decision arrives.
+
+    Once all but the last player have submitted, the draft is generated in the
+    background assuming the missing players time out. At the end of the round
+    the draft is reused if the final decisions match that assumption (a
+    timeout, or a resubmission of an identical decision), otherwise it is
+    discarded and the caller regenerates.
+    """
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.drafts = {}
+        self.lock = threading.Lock()
+        self.stats = {"started": 0, "hit": 0, "miss": 0}
+
+    def speculate(self, room_id, round_number, decisions, players, generate_crisis, generate_story):
+        """Start drafting with the missing players' decisions filled in as timeouts.
+
+        `generate_crisis(decisions)` and `generate_story(decisions)` are run on
+        the executor.
+        """
+        assumed = dict(decisions)
+        for player in players:
+            assumed.setdefault(player, TIMEOUT_DECISION)
+        key = decisions_key(assumed)
+
+        with self.lock:
+            draft = self.drafts.get(room_id)
+            if draft and draft["round"] == round_number and draft["key"] == key:
+                return
+            if draft:
+                self._cancel(draft)
+            self.drafts[room_id] = {
+                "round": round_number,
+                "key": key,
+                "crisis": self.executor.submit(generate_crisis, assumed),
+                "story": self.executor.submit(generate_story, assumed)
+            }
+            self.stats["started"] += 1
+
+    def take(self, room_id, round_number, decisions):
+        """Return the (crisis, story) futures if the draft matches `decisions`, else None"""
+        with self.lock:
+            draft = self.drafts.pop(room_id, None)
+            if not draft:
+                return None
+            if draft["round"] == round_number and draft["key"] == decisions_key(decisions):
+                self.stats["hit"] += 1
+                SPECULATIONS.inc(outcome="hit")
+                return draft["crisis"], draft["story"]
+            self._cancel(draft)
+            self.stats["miss"] += 1
+            SPECULATIONS.inc(outcome="miss")
+            return None
+
+    def discard(self, room_id):
+        with self.lock:
+            draft = self.drafts.pop(room_id, None)
+            if draft:
+                self._cancel(draft)
+
+    def _cancel(self, draft):
+        draft["crisis"].cancel()
+        draft["story"].cancel()
+
+    def get_stats(self):
+        with self.lock:
+            resolved = self.stats["hit"] + self.stats["miss"]
+            return dict(
+                self.stats,
+                pending=len(self.drafts),
+                hit_rate=self.stats["hit"] / resolved if resolved else 0.0
+            )
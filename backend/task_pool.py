@@ -0,0 +1,136 @@
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger("odyssey.tasks")
+
+# Async modes whose background tasks are green threads on one hub
+GREEN_ASYNC_MODES = ("eventlet", "gevent", "gevent_uwsgi")
+
+
+def check_async_mode(async_mode):
+    """Refuse to run room work on green threads that would block the hub.
+
+    Rounds wait on futures, locks and network I/O. Under eventlet or gevent
+    these only yield to other clients once the standard library has been
+    monkey-patched (see app.py); unpatched, one round freezes the worker.
+    """
+    if async_mode == "eventlet":
+        from eventlet import patcher
+        patched = patcher.is_monkey_patched("thread") and patcher.is_monkey_patched("socket")
+    elif async_mode in GREEN_ASYNC_MODES:
+        from gevent import monkey
+        patched = monkey.is_module_patched("threading") and monkey.is_module_patched("socket")
+    else:
+        return
+    if not patched:
+        raise RuntimeError(f"Socket.IO runs in {async_mode} mode but the standard library is not "
+                           f"monkey-patched; patch it before importing the app")
+
+
+class CancelToken:
+    """Checked by long running room tasks between steps"""
+
+    def __init__(self):
+        self.event = threading.Event()
+
+    def cancel(self):
+        self.event.set()
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+
+class RoomTaskPool:
+    """Runs room work in the background, one task at a time per room.
+
+    Each room has its own FIFO queue. At most `max_concurrent` rooms run at
+    once; rooms waiting for a slot are served in arrival order so a busy room
+    cannot starve the others. Tasks are called as `fn(token, *args)` and
+    should stop early once `token.cancelled` is set.
+    """
+
+    def __init__(self, start_background_task, max_concurrent=8):
+        self.start_background_task = start_background_task
+        self.max_concurrent = max(1, max_concurrent)
+        self.queues = {}
+        self.tokens = {}
+        self.running = set()
+        self.ready = deque()
+        self.lock = threading.Lock()
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0}
+
+    def submit(self, room_id, fn, *args):
+        """Queue `fn` for a room; returns the token that cancels it"""
+        with self.lock:
+            token = self.tokens.setdefault(room_id, CancelToken())
+            self.queues.setdefault(room_id, deque()).append((fn, args, token))
+            self.stats["submitted"] += 1
+            if room_id in self.running or room_id in self.ready:
+                return token
+            if len(self.running) < self.max_concurrent:
+                self.running.add(room_id)
+            else:
+                self.ready.append(room_id)
+                return token
+        self.start_background_task(self._run_room, room_id)
+        return token
+
+    def cancel(self, room_id):
+        """Drop a room's queued tasks and signal the running one to stop"""
+        with self.lock:
+            queue = self.queues.get(room_id)
+            if queue:
+                self.stats["cancelled"] += len(queue)
+                queue.clear()
+            token = self.tokens.pop(room_id, None)
+        if token:
+            token.cancel()
+
+    def is_busy(self, room_id):
+        with self.lock:
+            return room_id in self.running or bool(self.queues.get(room_id))
+
+    def _run_room(self, room_id):
+        while True:
+            with self.lock:
+                queue = self.queues.get(room_id)
+                if not queue:
+                    self.queues.pop(room_id, None)
+                    self.tokens.pop(room_id, None)
+                    self.running.discard(room_id)
+                    next_room = self._next_ready_room()
+                    break
+                fn, args, token = queue.popleft()
+
+            if token.cancelled:
+                continue
+            try:
+                fn(token, *args)
+                outcome = "completed"
+            except Exception:
+                logger.exception("Room task failed for %s", room_id)
+                outcome = "failed"
+            with self.lock:
+                self.stats[outcome] += 1
+
+        if next_room is not None:
+            self.start_background_task(self._run_room, next_room)
+
+    def _next_ready_room(self):
+        while self.ready:
+            room_id = self.ready.popleft()
+            if self.queues.get(room_id):
+                self.running.add(room_id)
+                return room_id
+        return None
+
+    def get_stats(self):
+        with self.lock:
+            return dict(
+                self.stats,
+                running_rooms=len(self.running),
+                waiting_rooms=len(self.ready),
+                queued_tasks=sum(len(queue) for queue in self.queues.values())
+            )
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import fakeredis
+import pytest
+
+# Tests import the backend modules the way app.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data import Data
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    """A fresh fake Redis behind Data.get_redis_client, so tests never reach the configured server"""
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(Data, "get_redis_client", staticmethod(
+        lambda: fakeredis.FakeRedis(server=server, decode_responses=True)
+    ))
+    return Data.get_redis_client()
@@ -0,0 +1,137 @@
+import pytest
+
+import admission
+from admission import ADMISSION_ROUND, ADMISSION_START, AdmissionController
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(admission.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def controller(clock):
+    return AdmissionController({ADMISSION_START: 1, ADMISSION_ROUND: 2}, shed_wait_seconds=20,
+                               update_seconds=2, initial_seconds={ADMISSION_ROUND: 10})
+
+
+class Work:
+    """Start callback that records the tickets it was handed"""
+
+    def __init__(self):
+        self.started = []
+
+    def __call__(self, ticket):
+        self.started.append(ticket)
+
+    def rooms(self):
+        return [ticket.room_id for ticket in self.started]
+
+
+def test_admits_up_to_the_limit_in_arrival_order(controller):
+    work = Work()
+    tickets = [controller.request(ADMISSION_ROUND, f"r{index}", work) for index in range(4)]
+    assert work.rooms() == ["r0", "r1"]
+    assert all(ticket.granted for ticket in tickets[:2])
+
+    controller.begin(tickets[0])
+    controller.release(tickets[0])
+    assert work.rooms() == ["r0", "r1", "r2"]
+    stats = controller.get_stats()
+    assert stats["round_running"] == 2
+    assert stats["round_waiting"] == 1
+
+
+def test_one_ticket_per_key(controller):
+    work = Work()
+    assert controller.request(ADMISSION_START, "r1", work) is not None
+    assert controller.request(ADMISSION_START, "r1", work) is None
+    # Rounds are keyed per round, so the next round can queue behind a running one
+    assert controller.request(ADMISSION_ROUND, "r1", work, key=("r1", 1)) is not None
+    assert controller.request(ADMISSION_ROUND, "r1", work, key=("r1", 2)) is not None
+    assert controller.get_stats()["start_duplicate"] == 1
+
+
+def test_waiting_rooms_get_positions_and_etas(controller, clock):
+    notices = []
+    work = Work()
+    for index in range(4):
+        controller.request(ADMISSION_ROUND, f"r{index}", work,
+                           on_wait=lambda position, eta, index=index: notices.append((index, position, eta)))
+    assert notices == [(2, 1, 10.0), (3, 2, 10.0)]
+
+    # Resent on a tick once `update_seconds` passed
+    assert controller.tick()
+    assert len(notices) == 2
+    clock[0] += 2
+    assert controller.tick()
+    assert notices[2:] == [(2, 1, 10.0), (3, 2, 10.0)]
+
+    controller.release(work.started[0])
+    assert notices[-1] == (3, 1, 10.0)
+
+
+def test_wait_past_threshold_sheds(controller, clock):
+    work = Work()
+    first = controller.request(ADMISSION_ROUND, "r0", work)
+    controller.request(ADMISSION_ROUND, "r1", work)
+    late = controller.request(ADMISSION_ROUND, "r2", work)
+    assert controller.begin(first)
+    assert not first.shed
+
+    clock[0] += 21
+    assert controller.shedding(ADMISSION_ROUND)
+    controller.release(first)
+    # Granted after 21s: the wait is measured until the work begins
+    assert late.granted
+    assert controller.begin(late)
+    assert late.shed
+    assert late.wait_seconds == 21
+    assert controller.get_stats()["round_shed"] == 1
+
+
+def test_max_wait_starts_without_a_slot(controller, clock):
+    work = Work()
+    controller.request(ADMISSION_START, "r0", work)
+    waiting = controller.request(ADMISSION_START, "r1", work, max_wait=30)
+    clock[0] += 30
+    assert not controller.tick()
+    assert waiting.timed_out and not waiting.granted
+    assert work.rooms() == ["r0", "r1"]
+    # Releasing a ticket that never had a slot frees nothing
+    controller.begin(waiting)
+    controller.release(waiting)
+    assert controller.get_stats()["start_running"] == 1
+
+
+def test_cancel_room(controller):
+    work = Work()
+    running = controller.request(ADMISSION_ROUND, "r0", work)
+    granted = controller.request(ADMISSION_ROUND, "r1", work)
+    waiting = controller.request(ADMISSION_ROUND, "r1", work, key=("r1", 2))
+    controller.request(ADMISSION_ROUND, "r2", work)
+    controller.begin(running)
+
+    controller.cancel_room("r1")
+    assert waiting.released and granted.released
+    # The work already handed off finds out when it tries to begin
+    assert not controller.begin(granted)
+    assert work.rooms() == ["r0", "r1", "r2"]
+    controller.release(granted)
+    stats = controller.get_stats()
+    assert stats["round_running"] == 2
+    assert stats["round_cancelled"] == 1
+
+
+def test_release_is_idempotent_and_updates_the_average(controller, clock):
+    work = Work()
+    ticket = controller.request(ADMISSION_ROUND, "r0", work)
+    controller.begin(ticket)
+    clock[0] += 20
+    controller.release(ticket)
+    controller.release(ticket)
+    stats = controller.get_stats()
+    assert stats["round_running"] == 0
+    assert stats["round_average_seconds"] == 12.0
@@ -0,0 +1,98 @@
+import pytest
+
+import circuit_breaker
+from circuit_breaker import STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.monotonic for the breaker's reset timeout"""
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.min_calls):
+        breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+
+
+def test_stays_closed_below_min_calls():
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=4)
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow_request()
+
+
+def test_opens_at_failure_rate():
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=4)
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert breaker.is_open()
+
+
+def test_slow_success_counts_as_failure():
+    breaker = CircuitBreaker(min_calls=1, slow_call_seconds=5)
+    breaker.record_success(latency=4)
+    assert breaker.state == STATE_CLOSED
+    breaker.record_success(latency=6)
+    assert breaker.state == STATE_OPEN
+
+
+def test_open_short_circuits_until_reset_timeout(clock):
+    breaker = CircuitBreaker(min_calls=2, reset_timeout=30)
+    open_breaker(breaker)
+    clock[0] += 29
+    assert not breaker.allow_request()
+    assert breaker.get_stats()["short_circuited"] == 1
+
+    clock[0] += 1
+    assert breaker.allow_request()
+    assert breaker.state == STATE_HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow_request()
+
+
+def test_successful_probe_closes(clock):
+    breaker = CircuitBreaker(min_calls=2, reset_timeout=30)
+    open_breaker(breaker)
+    clock[0] += 30
+    assert breaker.allow_request()
+    breaker.record_success(latency=1)
+    assert breaker.state == STATE_CLOSED
+    assert breaker.get_stats()["recent_calls"] == 0
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker(min_calls=2, reset_timeout=30)
+    open_breaker(breaker)
+    clock[0] += 30
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert breaker.times_opened == 2
+    assert not breaker.allow_request()
+
+
+def test_released_probe_lets_the_next_call_through(clock):
+    breaker = CircuitBreaker(min_calls=2, reset_timeout=30)
+    open_breaker(breaker)
+    clock[0] += 30
+    assert breaker.allow_request()
+    # The probe gave up waiting for the rate limiter and never reached the provider
+    breaker.release_probe()
+    assert breaker.allow_request()
+    assert breaker.state == STATE_HALF_OPEN
+
+
+def test_release_probe_is_a_no_op_when_closed():
+    breaker = CircuitBreaker()
+    breaker.release_probe()
+    assert breaker.half_open_calls == 0
+    assert breaker.allow_request()
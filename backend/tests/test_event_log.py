@@ -0,0 +1,131 @@
+import gzip
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from event_log import GameEventLog, load_archive, replay_events
+from session_model import GameSession
+
+
+@pytest.fixture
+def event_log(redis_client, tmp_path):
+    return GameEventLog(max_length=100, archive_dir=str(tmp_path), history=3, ttl=60)
+
+
+def play_round(event_log, session):
+    """Log one round the way the socket engine does; returns the session afterwards"""
+    for username, decision in (("alice", "Seal"), ("bob", "Evacuate")):
+        session["player_decisions"][username] = decision
+        session["version"] += 1
+        event_log.append("r1", "decision_submitted", {"username": username, "decision": decision},
+                         version=session["version"])
+    session["version"] += 1
+    event_log.append("r1", "round_processing", {"missing_players": []}, version=session["version"])
+    record = session.add_round(
+        {"alice": {"total_individual_score": 30}, "bob": {"total_individual_score": 20}},
+        {"new_crisis_score": 60, "score_change": 10},
+        {"story_continuation": "The hull holds", "next_decision_point": "Now what?"}
+    )
+    session["crisis_score"] = 60
+    session["current_round"] += 1
+    session["player_decisions"] = {}
+    session["version"] += 1
+    event_log.append("r1", "round_completed", {"round": 1}, state={
+        "crisis_score": 60,
+        "current_round": session["current_round"],
+        "history_entry": record.to_compact()
+    }, version=session["version"])
+
+
+def start_game(event_log):
+    session = GameSession("r1", "space", ["alice", "bob"], scenario="A leak in the hull")
+    event_log.append("r1", "game_started", {"round": 1}, state=session.to_compact(), version=1)
+    session["version"] = 1
+    return session
+
+
+def test_replay_rebuilds_the_session(event_log):
+    session = start_game(event_log)
+    play_round(event_log, session)
+    session["player_decisions"]["alice"] = "Vent"
+    session["version"] += 1
+    event_log.append("r1", "decision_submitted", {"username": "alice", "decision": "Vent"},
+                     version=session["version"])
+
+    replayed = event_log.replay("r1")
+    assert replayed["version"] == session["version"]
+    assert replayed["current_round"] == 2
+    assert replayed["crisis_score"] == 60
+    assert replayed["player_decisions"] == {"alice": "Vent"}
+    assert replayed["player_total_scores"] == {"alice": 30, "bob": 20}
+
+
+def test_appends_refresh_the_stream_ttl(event_log, redis_client):
+    start_game(event_log)
+    assert 0 < redis_client.ttl("game_events:r1") <= 60
+
+
+def test_replay_needs_the_start():
+    assert replay_events([("decision_submitted", {"username": "alice", "decision": "x"}, {})]) is None
+
+
+def test_events_since_reads_the_stream(event_log):
+    session = start_game(event_log)
+    play_round(event_log, session)
+    assert session["version"] == 5
+
+    events = event_log.events_since("r1", 3, 5)
+    assert [(event["version"], event["type"]) for event in events] == [
+        (4, "round_processing"), (5, "round_completed")
+    ]
+    assert events[0]["data"] == {"missing_players": []}
+    assert events[0]["at"] > 0
+    assert event_log.events_since("r1", 5, 5) == []
+    # More than `history` events behind, or ahead of the session
+    assert event_log.events_since("r1", 1, 5) is None
+    assert event_log.events_since("r1", 6, 5) is None
+
+
+def test_events_since_skips_unversioned_entries(event_log):
+    session = start_game(event_log)
+    play_round(event_log, session)
+    event_log.append("r1", "game_ended", {"winner": "alice"})
+    assert [event["version"] for event in event_log.events_since("r1", 3, 5)] == [4, 5]
+
+
+def test_events_since_detects_gaps(event_log, redis_client):
+    start_game(event_log)
+    event_log.append("r1", "decision_submitted", {"username": "alice", "decision": "x"}, version=3)
+    assert event_log.events_since("r1", 1, 3) is None
+
+
+def test_archive_finished_games(event_log, redis_client, tmp_path):
+    session = start_game(event_log)
+    play_round(event_log, session)
+    assert not event_log.is_finished("r1")
+    event_log.append("r1", "game_ended", {"winner": "alice"})
+    assert event_log.is_finished("r1")
+
+    (path,) = event_log.archive_finished()
+    assert not redis_client.exists("game_events:r1")
+    events = load_archive(path)
+    assert events[0][0] == "game_started"
+    assert events[-1] == ("game_ended", {"winner": "alice"}, {})
+    with gzip.open(path, "rt") as archive:
+        assert json.load(archive)["room_id"] == "r1"
+
+
+def test_archive_idle_games(event_log, redis_client, monkeypatch):
+    session = start_game(event_log)
+    play_round(event_log, session)
+    assert event_log.archive_finished(max_idle=60) == []
+
+    # Only the event log's clock moves on, so Redis does not expire the stream first
+    monkeypatch.setattr("event_log.time", SimpleNamespace(time=lambda: time.time() + 3600))
+    assert event_log.is_finished("r1", max_idle=60)
+    assert not event_log.is_finished("r1")
+    (path,) = event_log.archive_finished(max_idle=60)
+    assert not redis_client.exists("game_events:r1")
+    assert load_archive(path)[0][0] == "game_started"
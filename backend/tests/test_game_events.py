@@ -0,0 +1,53 @@
+from game_events import events_since, game_snapshot, next_version, round_summary
+from session_model import GameSession
+
+
+def new_session():
+    return GameSession(
+        "r1", "space", ["alice", "bob"],
+        roles={"engineer": {"role_name": "Engineer"}},
+        player_roles={"alice": {"role_name": "Engineer"}},
+        scenario="A leak in the hull"
+    )
+
+
+def versioned(*versions):
+    return [{"version": version, "type": "decision_submitted", "data": {}} for version in versions]
+
+
+def test_next_version_counts_from_zero():
+    session = new_session()
+    assert next_version(session) == 1
+    assert next_version(session) == 2
+    assert session["version"] == 2
+
+
+def test_events_since():
+    events = versioned(3, 4, 5)
+    assert events_since(events, 3, 5) == versioned(4, 5)
+    assert events_since(events, 5, 5) == []
+    # Gaps, or a client ahead of the session, need a full snapshot
+    assert events_since(events, 1, 5) is None
+    assert events_since(versioned(3, 5), 3, 5) is None
+    assert events_since(events, 6, 5) is None
+
+
+def test_game_snapshot():
+    session = new_session()
+    session["player_decisions"]["alice"] = "Seal the breach"
+    session.add_round(
+        {"alice": {"creativity_score": 10, "total_individual_score": 30}, "bob": {"total_individual_score": 20}},
+        {"new_crisis_score": 60, "score_change": 10},
+        {"story_continuation": "The hull holds", "next_decision_point": "Now what?"}
+    )
+    session["player_decisions"] = {"bob": "Evacuate"}
+
+    snapshot = game_snapshot(session, "alice", time_remaining=42)
+    assert snapshot["player_role"] == {"role_name": "Engineer"}
+    assert snapshot["remaining_decisions"] == 1
+    assert snapshot["time_remaining"] == 42
+    assert snapshot["player_total_scores"] == {"alice": 30, "bob": 20}
+    assert snapshot["rounds"] == [round_summary(session["game_history"][0])]
+    assert snapshot["rounds"][0]["crisis_score"] == 60
+    assert snapshot["rounds"][0]["decisions"] == {"alice": "Seal the breach"}
+    assert game_snapshot(session, "bob")["player_role"] == {}
@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+from incremental_scoring import IncrementalScorer
+
+
+@pytest.fixture
+def scorer():
+    scorer = IncrementalScorer(max_workers=4)
+    yield scorer
+    scorer.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def test_reuses_background_scores(scorer):
+    scorer.submit("r1", "alice", 1, "Seal", lambda: {"score": 1})
+    calls = []
+
+    def score_for(username, decision):
+        calls.append(username)
+        return {"score": 2}
+
+    results = scorer.collect("r1", 1, {"alice": "Seal", "bob": "Evacuate"}, score_for, timeout=5)
+    assert results == {"alice": {"score": 1}, "bob": {"score": 2}}
+    assert calls == ["bob"]
+    stats = scorer.get_stats()
+    assert (stats["reused"], stats["scored_at_collect"], stats["pending"]) == (1, 1, 0)
+
+
+def test_stale_scores_are_redone(scorer):
+    scorer.submit("r1", "alice", 1, "Seal", lambda: {"score": "old"})
+    scorer.submit("r1", "bob", 1, "Evacuate", lambda: {"score": "last round"})
+    results = scorer.collect("r1", 2, {"alice": "Vent", "bob": "Evacuate"},
+                             lambda username, decision: {"score": decision})
+    assert results == {"alice": {"score": "Vent"}, "bob": {"score": "Evacuate"}}
+
+
+def test_resubmitting_the_same_decision_keeps_the_score(scorer):
+    scorer.submit("r1", "alice", 1, "Seal", lambda: {"score": 1})
+    scorer.submit("r1", "alice", 1, "Seal", lambda: {"score": 2})
+    scorer.submit("r1", "bob", 1, "Evacuate", lambda: {"score": 3})
+    scorer.submit("r1", "bob", 1, "Shelter", lambda: {"score": 4})
+    results = scorer.collect("r1", 1, {"alice": "Seal", "bob": "Shelter"}, None)
+    assert results == {"alice": {"score": 1}, "bob": {"score": 4}}
+    assert scorer.get_stats()["resubmitted"] == 1
+
+
+def test_results_are_reported_as_they_finish(scorer):
+    release_slow = threading.Event()
+
+    def score_for(username, decision):
+        if username == "slow":
+            release_slow.wait(5)
+        return {"score": username}
+
+    reported = []
+
+    def on_result(username, result):
+        reported.append(username)
+        if username == "fast":
+            release_slow.set()
+
+    results = scorer.collect("r1", 1, {"slow": "a", "fast": "b"}, score_for, timeout=5, on_result=on_result)
+    assert reported == ["fast", "slow"]
+    assert results == {"slow": {"score": "slow"}, "fast": {"score": "fast"}}
+
+
+def test_failures_and_timeouts_become_errors(scorer):
+    stuck = threading.Event()
+
+    def score_for(username, decision):
+        if username == "broken":
+            raise ValueError("bad response")
+        if username == "stuck":
+            stuck.wait(5)
+        return {"score": 1}
+
+    results = scorer.collect("r1", 1, {"broken": "a", "stuck": "b", "fine": "c"}, score_for, timeout=0.2)
+    stuck.set()
+    assert results["fine"] == {"score": 1}
+    assert results["broken"] == {"error": "Scoring failed: bad response"}
+    assert "deadline" in results["stuck"]["error"]
+    assert scorer.get_stats()["timed_out"] == 1
+
+
+def test_discard_cancels_a_rooms_pending_scores(scorer):
+    scorer.submit("r1", "alice", 1, "Seal", lambda: {"score": 1})
+    scorer.submit("r2", "bob", 1, "Seal", lambda: {"score": 1})
+    scorer.discard("r1")
+    assert scorer.get_stats()["pending"] == 1
@@ -0,0 +1,130 @@
+import pytest
+
+from data import Data
+from lobby import LOBBY_DELTA_ROOM, LOBBY_ROOM, LobbyBroadcaster
+
+
+class FakeSocket:
+    """Records emits; background tasks run when the test calls `run_tasks()`"""
+
+    def __init__(self):
+        self.emitted = []
+        self.tasks = []
+
+    def emit(self, event, data, to=None):
+        self.emitted.append((event, data, to))
+
+    def start_background_task(self, target, *args):
+        self.tasks.append((target, args))
+
+    def run_tasks(self):
+        tasks, self.tasks = self.tasks, []
+        for target, args in tasks:
+            target(*args)
+
+    def sleep(self, seconds):
+        pass
+
+
+@pytest.fixture
+def lobby(redis_client):
+    return LobbyBroadcaster(FakeSocket(), window=0, history=3)
+
+
+def changed(lobby, *room_ids):
+    for room_id in room_ids:
+        lobby.room_changed(room_id)
+    lobby.socket.run_tasks()
+
+
+def test_changes_become_one_versioned_delta(lobby):
+    Data.create_room("r1", "alice", "One", max_players=2)
+    Data.create_room("r2", "bob", "Two", max_players=2)
+    changed(lobby, "r1", "r2")
+    assert lobby.socket.tasks == []
+
+    version, rooms = lobby.snapshot()
+    assert version == 1
+    assert sorted(room["room_id"] for room in rooms) == ["r1", "r2"]
+    (event, delta, to), (snapshot_event, snapshot, snapshot_to) = lobby.socket.emitted
+    assert (event, to) == ("lobby-delta", LOBBY_DELTA_ROOM)
+    assert [change["type"] for change in delta["changes"]] == ["room_added", "room_added"]
+    assert (snapshot_event, snapshot_to, snapshot["version"]) == ("available-rooms", LOBBY_ROOM, 1)
+
+
+def test_update_and_remove(lobby):
+    Data.create_room("r1", "alice", "One", max_players=2)
+    changed(lobby, "r1")
+    Data.join_room("r1", "bob")
+    changed(lobby, "r1")
+    # Full rooms are no longer listed
+    assert lobby.socket.emitted[-2][1]["changes"] == [{"type": "room_removed", "room_id": "r1"}]
+    assert lobby.room_count() == 0
+
+    Data.exit_room("r1", "bob")
+    changed(lobby, "r1")
+    change = lobby.socket.emitted[-2][1]["changes"][0]
+    assert change["type"] == "room_added"
+    assert change["room"]["room_size"] == 1
+
+
+def test_unchanged_rooms_are_not_broadcast(lobby):
+    Data.create_room("r1", "alice", "One")
+    changed(lobby, "r1")
+    changed(lobby, "r1")
+    assert len(lobby.socket.emitted) == 2
+    assert lobby.snapshot()[0] == 1
+
+
+def test_deltas_since(lobby):
+    for index in range(4):
+        Data.create_room(f"r{index}", "alice", str(index))
+        changed(lobby, f"r{index}")
+    assert [delta["version"] for delta in lobby.deltas_since(2)] == [3, 4]
+    assert lobby.deltas_since(4) == []
+    # Only the last 3 deltas are kept, and clients cannot be ahead of the lobby
+    assert lobby.deltas_since(0) is None
+    assert lobby.deltas_since(5) is None
+
+
+def test_resync_and_rebuild(lobby, redis_client):
+    Data.create_room("r1", "alice", "One")
+    Data.create_room("r2", "bob", "Two")
+    changed(lobby, None)
+    assert lobby.room_count() == 2
+
+    redis_client.delete("room:r2")
+    lobby.rebuild()
+    version, rooms = lobby.snapshot()
+    assert version == 2
+    assert [room["room_id"] for room in rooms] == ["r1"]
+    assert lobby.deltas_since(1) is None
+
+
+def test_ensure_builds_a_missing_lobby(lobby):
+    Data.create_room("r1", "alice", "One")
+    lobby.ensure()
+    assert lobby.snapshot()[0] == 1
+    assert lobby.room_count() == 1
+    assert lobby.socket.tasks == []
+
+
+def test_ensure_keeps_the_lobby_other_workers_serve(lobby):
+    Data.create_room("r1", "alice", "One")
+    changed(lobby, "r1")
+    Data.create_room("r2", "bob", "Two")
+
+    # Another worker starting up
+    starting = LobbyBroadcaster(lobby.socket, window=0, history=3)
+    starting.ensure()
+    lobby.socket.run_tasks()
+    version, rooms = lobby.snapshot()
+    assert version == 2
+    assert sorted(room["room_id"] for room in rooms) == ["r1", "r2"]
+    # Clients at version 1 can still catch up with a delta
+    (delta,) = lobby.deltas_since(1)
+    assert delta["changes"][0]["room"]["room_id"] == "r2"
+
+    starting.ensure()
+    lobby.socket.run_tasks()
+    assert lobby.snapshot()[0] == 2
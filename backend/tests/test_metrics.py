@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from metrics import Counter, Gauge, Histogram, Registry
+
+
+@pytest.fixture
+def registry():
+    return Registry()
+
+
+def test_counter_render(registry):
+    calls = Counter("ai_calls_total", "AI calls", ["outcome"], registry=registry)
+    calls.inc(outcome="ok")
+    calls.inc(2, outcome="ok")
+    calls.inc(outcome='bad "json"')
+    assert registry.render() == (
+        "# HELP ai_calls_total AI calls\n"
+        "# TYPE ai_calls_total counter\n"
+        'ai_calls_total{outcome="ok"} 3\n'
+        'ai_calls_total{outcome="bad \\"json\\""} 1\n'
+    )
+
+
+def test_gauge_function_and_errors(registry):
+    gauge = Gauge("queue_depth", "Queued calls", registry=registry)
+    gauge.labels().set(4.5)
+    assert "queue_depth 4.5\n" in registry.render()
+    gauge.labels().set_function(lambda: 7)
+    assert "queue_depth 7\n" in registry.render()
+    gauge.labels().set_function(lambda: 1 / 0)
+    assert "queue_depth NaN\n" in registry.render()
+
+
+def test_histogram_render_is_cumulative(registry):
+    latency = Histogram("latency_seconds", "Latency", buckets=(0.1, 1), registry=registry)
+    for value in (0.05, 0.5, 0.5, 3):
+        latency.observe(value)
+    lines = registry.render().splitlines()
+    assert lines[2:] == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 4.05",
+        "latency_seconds_count 4",
+    ]
+
+
+def test_histogram_quantiles(registry):
+    latency = Histogram("latency_seconds", "Latency", buckets=(1, 2, 4), registry=registry)
+    for _ in range(50):
+        latency.observe(0.5)
+    for _ in range(50):
+        latency.observe(3)
+    child = latency.labels()
+    assert child.quantile(0.5) == pytest.approx(1.0)
+    assert child.quantile(0.75) == pytest.approx(3.0)
+    sample = registry.snapshot()["latency_seconds"]["samples"][0]
+    assert sample["count"] == 100
+    assert sample["average"] == pytest.approx(1.75)
+
+
+def test_snapshot_filters_by_prefix(registry):
+    Counter("ai_calls_total", "AI calls", registry=registry).inc()
+    Counter("rounds_total", "Rounds", registry=registry).inc()
+    assert list(registry.snapshot("ai_")) == ["ai_calls_total"]
+
+
+def test_concurrent_updates_are_not_lost(registry):
+    calls = Counter("calls_total", "Calls", registry=registry)
+    latency = Histogram("latency_seconds", "Latency", registry=registry)
+
+    def work():
+        for _ in range(2000):
+            calls.inc()
+            latency.observe(0.2)
+
+    threads = [threading.Thread(target=work) for _ in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls.labels().get() == 80000
+    assert latency.labels().snapshot()[1] == 80000
+    # A fixed number of stripes, however many threads updated them
+    assert len(calls.labels().shards) == calls.labels().STRIPES
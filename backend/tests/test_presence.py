@@ -0,0 +1,91 @@
+import pytest
+
+import presence
+from data import Data
+from presence import PresenceRegistry
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(presence.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def workers(redis_client, clock):
+    """Two workers' registries sharing one Redis"""
+    return PresenceRegistry(ttl=60), PresenceRegistry(ttl=60)
+
+
+def test_connections_on_every_worker(workers):
+    first, second = workers
+    first.connect("sid-1", "alice")
+    second.connect("sid-2", "alice")
+    second.connect("sid-3", "bob")
+    assert sorted(first.sids("alice")) == ["sid-1", "sid-2"]
+    assert first.online_count() == 2
+
+
+def test_last_disconnect_takes_the_user_offline(workers):
+    first, second = workers
+    first.connect("sid-1", "alice")
+    second.connect("sid-2", "alice")
+    assert first.disconnect("sid-1") is None
+    assert first.is_online("alice")
+    assert second.disconnect("sid-2") == "alice"
+    assert not first.is_online("alice")
+    assert first.online_count() == 0
+    assert first.disconnect("unknown") is None
+
+
+def test_connections_expire_without_heartbeat(workers, clock):
+    first, second = workers
+    first.connect("sid-1", "alice")
+    second.connect("sid-2", "bob")
+    clock[0] += 45
+    second.heartbeat()
+    clock[0] += 20
+    # Only the worker that kept beating is still online
+    assert not first.is_online("alice")
+    assert second.is_online("bob")
+    assert first.online_count() == 1
+
+
+def test_sweep_drops_users_of_dead_workers(workers, clock):
+    first, second = workers
+    first.connect("sid-1", "alice")
+    second.connect("sid-2", "bob")
+    clock[0] += 61
+    second.heartbeat()
+    assert second.sweep() == ["alice"]
+    assert second.sweep() == []
+    assert second.online_count() == 1
+
+
+def test_refresh_never_moves_expiry_back(workers, redis_client, clock):
+    first, second = workers
+    first.connect("sid-1", "alice")
+    clock[0] += 30
+    second.connect("sid-2", "alice")
+    clock[0] -= 30
+    first.heartbeat()
+    assert redis_client.zscore("presence:online", "alice") == 1090
+
+
+def test_lobby_room_of_a_user(workers):
+    first, _ = workers
+    first.set_room("alice", "r1")
+    assert first.room_of("alice") == "r1"
+    first.clear_room("alice")
+    assert first.room_of("alice") is None
+
+
+def test_exit_room_only_for_members(redis_client):
+    Data.create_room("r1", "alice", "One")
+    Data.join_room("r1", "bob")
+    assert Data.exit_room("r1", "carol") is False
+    assert Data.get_room_info("r1")["members"] == ["alice", "bob"]
+    assert Data.exit_room("r1", "bob") is True
+    assert Data.exit_room("r1", "alice") is True
+    assert Data.get_room_info("r1") is None
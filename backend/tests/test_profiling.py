@@ -0,0 +1,113 @@
+import json
+import os
+
+import pytest
+from flask import Flask
+
+import profiling
+from api import Api
+from config import Config
+from profiling import PROFILER, Profiler, in_trace
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    return Profiler(enabled=True, sample_rate=0, slow_seconds=0.05, output_dir=str(tmp_path))
+
+
+def test_disabled_profiler_only_calls_through(profiler):
+    profiler.configure(enabled=False)
+    assert profiler.profiled("socket", "join", lambda value: value * 2)(21) == 42
+    assert profiler.get_status()["stats"] == {}
+
+
+def test_spans_are_recorded_inside_a_trace(profiler, monkeypatch):
+    clock = iter([0.0, 0.1, 0.3, 1.0])
+    monkeypatch.setattr(profiling.time, "perf_counter", lambda: next(clock))
+    lookup = profiler.traced("data.get_room", lambda room_id: {"room_id": room_id})
+    handler = profiler.profiled("socket", "join", lambda: lookup("r1"))
+    assert handler() == {"room_id": "r1"}
+
+    (trace,) = profiler.get_status()["slow_traces"]
+    assert trace["name"] == "join"
+    assert trace["duration"] == 1.0
+    assert trace["spans"][0]["name"] == "data.get_room"
+    assert trace["spans"][0]["duration"] == pytest.approx(0.2)
+
+
+def test_fast_calls_are_counted_but_not_kept(profiler):
+    profiler.configure(slow_seconds=10)
+    profiler.profiled("socket", "join", lambda: None)()
+    status = profiler.get_status()
+    assert status["stats"] == {"traces": 1}
+    assert status["slow_traces"] == []
+
+
+@pytest.mark.parametrize("roll, dumped", [(0.49, True), (0.5, False)])
+def test_only_sampled_slow_calls_are_dumped(profiler, tmp_path, monkeypatch, roll, dumped):
+    profiler.configure(sample_rate=0.5, slow_seconds=0)
+    monkeypatch.setattr(profiling.random, "random", lambda: roll)
+    profiler.profiled("task", "process_round", lambda: sum(range(1000)))()
+
+    files = sorted(os.listdir(tmp_path))
+    assert profiler.get_status()["stats"].get("dumped", 0) == int(dumped)
+    if dumped:
+        assert [name.rsplit(".", 1)[1] for name in files] == ["json", "prof"]
+        with open(tmp_path / files[0]) as trace:
+            assert json.load(trace)["name"] == "process_round"
+    else:
+        assert files == []
+
+
+def test_nested_handlers_join_the_outer_trace(profiler):
+    inner = profiler.profiled("task", "inner", lambda: None)
+    profiler.profiled("socket", "outer", inner)()
+    assert profiler.get_status()["stats"]["traces"] == 1
+
+
+def test_configure_clamps_sample_rate(profiler):
+    assert profiler.configure(sample_rate=5)["sample_rate"] == 1.0
+    assert profiler.configure(sample_rate=-1, enabled="off")["sample_rate"] == 0.0
+    assert profiler.enabled is False
+
+
+def test_in_trace_runs_in_the_callers_trace(profiler):
+    span = profiler.traced("ai.call", lambda: None)
+    spans = []
+
+    def handler():
+        in_trace(span)()
+        spans.extend(profiling._current_trace.get().spans)
+
+    profiler.profiled("socket", "submit", handler)()
+    assert [item["name"] for item in spans] == ["ai.call"]
+    assert in_trace(span) is span
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(Config, "PROFILING_ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(Config, "PROFILING_MAX_SAMPLE_RATE", 0.1)
+    monkeypatch.setattr(Config, "PROFILING_MIN_SLOW_SECONDS", 0.2)
+    settings = (PROFILER.enabled, PROFILER.sample_rate, PROFILER.slow_seconds)
+    app = Flask(__name__)
+    Api(app)
+    yield app.test_client()
+    PROFILER.configure(enabled=settings[0], sample_rate=settings[1], slow_seconds=settings[2])
+
+
+def test_profiling_endpoint_is_read_only_without_the_admin_token(client, monkeypatch):
+    assert client.get("/api/profiling").status_code == 200
+    assert client.post("/api/profiling", json={"enabled": True}).status_code == 403
+    assert client.post("/api/profiling", json={"enabled": True},
+                       headers={"X-Admin-Token": "wrong"}).status_code == 403
+    monkeypatch.setattr(Config, "PROFILING_ADMIN_TOKEN", "")
+    assert client.post("/api/profiling", json={"enabled": True}, headers={"X-Admin-Token": ""}).status_code == 403
+    assert PROFILER.enabled is False
+
+
+def test_profiling_endpoint_clamps_settings(client):
+    response = client.post("/api/profiling", json={"enabled": True, "sample_rate": 1, "slow_seconds": 0},
+                           headers={"X-Admin-Token": "secret"})
+    status = response.get_json()["profiling"]
+    assert (status["enabled"], status["sample_rate"], status["slow_seconds"]) == (True, 0.1, 0.2)
@@ -0,0 +1,165 @@
+import pytest
+
+from prompt_builder import PromptBuilder, compact_text, estimate_tokens, first_sentence
+from prompts import PROMPT_TEMPLATES
+
+BUDGETS = {"crisis_score_update": 900, "story_continuation": 1400, "final_scoring": 1500, "individual_scoring": 400}
+
+LONG_DECISION = " ".join(f"word{i}" for i in range(400))
+
+
+@pytest.fixture
+def builder():
+    return PromptBuilder(BUDGETS, decision_max_tokens=150, summary_max_tokens=60)
+
+
+def round_data(number, decision="We seal the breach and reroute power"):
+    return {
+        "round": number,
+        "decisions": {"alice": decision, "bob": "I help evacuate"},
+        "round_scores": {"alice": {"total_round_score": 40}, "bob": {"total_round_score": 30}},
+        "crisis_update": {"new_crisis_score": 50 + number, "score_change": 1}
+    }
+
+
+@pytest.mark.parametrize("text, tokens", [
+    ("", 0),
+    ("abc", 1),
+    ("abcd", 1),
+    ("abcde", 2),
+    ("x" * 400, 100),
+])
+def test_estimate_tokens(text, tokens):
+    assert estimate_tokens(text) == tokens
+
+
+@pytest.mark.parametrize("text, max_tokens, expected", [
+    ("  seal   the\n breach ", 10, "seal the breach"),
+    ("seal the breach now", 3, "seal the..."),
+    ("seal the breach", 0, ""),
+    ("seal the breach", -5, ""),
+    ("abcdefghijklmnop", 2, "abcde..."),
+])
+def test_compact_text(text, max_tokens, expected):
+    assert compact_text(text, max_tokens) == expected
+
+
+@pytest.mark.parametrize("max_tokens", [1, 2, 5, 20, 100])
+def test_compact_text_fits_the_budget(max_tokens):
+    assert estimate_tokens(compact_text(LONG_DECISION, max_tokens)) <= max_tokens
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("The hull holds. Power is back!", "The hull holds."),
+    ("No end", "No end"),
+    ("", ""),
+])
+def test_first_sentence(text, expected):
+    assert first_sentence(text) == expected
+
+
+def test_available_tokens_is_the_budget_minus_the_template(builder):
+    overhead = estimate_tokens(PROMPT_TEMPLATES["crisis_score_update"].format(
+        theme="space station", current_crisis_score=50, round_number=1, formatted_responses=""
+    ))
+    assert builder.available_tokens("crisis_score_update", theme="space_station", current_crisis_score=50,
+                                    round_number=1) == 900 - overhead
+    # A template larger than its budget leaves nothing
+    assert PromptBuilder({"crisis_score_update": 10}).available_tokens(
+        "crisis_score_update", theme="x", current_crisis_score=50, round_number=1) == 0
+
+
+def test_theme_objects_are_sent_by_name(builder):
+    prompt = builder.build("initial_scenario", theme={"id": "space", "name": "Space Station", "intro": "x" * 500},
+                           player_count=2)
+    assert "Space Station" in prompt
+    assert "x" * 50 not in prompt
+
+
+@pytest.mark.parametrize("players, budget", [
+    (2, 100),
+    (4, 100),
+    (6, 300),
+    (8, 40),
+])
+def test_responses_share_the_budget(builder, players, budget):
+    responses = {f"player{i}": LONG_DECISION for i in range(players)}
+    text = builder.format_responses(responses, budget)
+    lines = text.splitlines()
+    assert len(lines) == players
+    assert estimate_tokens(text) <= budget + players
+    # Equal shares, capped by the per-decision limit
+    assert len({len(line) for line in lines}) == 1
+
+
+def test_short_responses_are_kept_whole(builder):
+    text = builder.format_responses({"alice": "Seal it", "bob": "Evacuate"}, 100)
+    assert text == "- alice: Seal it\n- bob: Evacuate\n"
+    assert builder.format_responses({}, 100) == ""
+
+
+def test_decisions_are_capped_even_with_budget_to_spare(builder):
+    assert estimate_tokens(builder.format_decision(LONG_DECISION, 10000)) <= 150
+
+
+@pytest.mark.parametrize("budget", [40, 60, 120])
+def test_oldest_rounds_are_summarized_first(builder, budget):
+    rounds = [round_data(number, LONG_DECISION) for number in range(1, 6)]
+    text = builder.format_rounds(rounds, budget)
+    assert estimate_tokens(text) <= budget + 1
+    assert text.startswith("Rounds 1-")
+    assert "points: alice" in text
+
+
+def test_rounds_within_budget_are_all_kept(builder):
+    rounds = [round_data(number) for number in range(1, 4)]
+    lines = builder.format_rounds(rounds, 1000).splitlines()
+    assert [line.split(" |")[0] for line in lines] == ["Round 1", "Round 2", "Round 3"]
+    assert "alice (40/100): We seal the breach and reroute power" in lines[0]
+
+
+def test_latest_round_is_kept_when_summarizing(builder):
+    rounds = [round_data(number) for number in range(1, 6)]
+    full = builder.format_rounds(rounds, 1000)
+    text = builder.format_rounds(rounds, estimate_tokens(full) - 10)
+    assert text.startswith("Rounds 1-")
+    assert text.rstrip("\n").endswith(full.rstrip("\n").splitlines()[-1])
+
+
+def test_rounds_are_cut_when_even_the_summary_does_not_fit(builder):
+    rounds = [round_data(number, LONG_DECISION) for number in range(1, 3)]
+    text = builder.format_rounds(rounds, 10)
+    assert estimate_tokens(text) <= 11
+    assert text.endswith("...\n")
+
+
+@pytest.mark.parametrize("budget", [20, 80, 400])
+def test_scenario_keeps_within_budget(builder, budget):
+    text = builder.format_scenario(LONG_DECISION, "R1 (crisis 50): " + LONG_DECISION, budget)
+    assert estimate_tokens(text) <= budget + 1
+    assert text.startswith("Story so far: ")
+    assert "Latest: " in text
+
+
+def test_scenario_without_summary(builder):
+    assert builder.format_scenario("The hull holds", "", 100) == "The hull holds"
+
+
+def test_summary_drops_the_oldest_recaps(builder):
+    summary = ""
+    for number in range(1, 10):
+        summary = builder.update_summary(summary, number, 50 + number, f"Round {number} happened. More detail.")
+    lines = summary.split("\n")
+    assert estimate_tokens(summary) <= 60
+    assert lines[-1] == "R9 (crisis 59): Round 9 happened."
+    assert not summary.startswith("R1 ")
+
+
+def test_build_records_prompt_sizes(builder):
+    builder.build("individual_scoring", theme="space", role="Medic", round_number=1, player_response="Help")
+    builder.build("individual_scoring", theme="space", role="Medic", round_number=1, player_response=LONG_DECISION * 2)
+    stats = builder.get_stats()["individual_scoring"]
+    assert stats["count"] == 2
+    assert stats["over_budget"] == 1
+    assert stats["budget"] == 400
+    assert stats["max_tokens"] > 400
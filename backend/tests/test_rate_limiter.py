@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+from rate_limiter import (
+    PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, LocalTokenBucket, RateLimiter, RedisTokenBucket, RequestQueue
+)
+
+
+class FakeLimiter:
+    """Always grants capacity; records which calls got through"""
+
+    def __init__(self):
+        self.acquired = []
+
+    def try_acquire(self, cost):
+        self.acquired.append(cost)
+        return 0
+
+
+def test_redis_bucket_allows_up_to_request_capacity(redis_client):
+    bucket = RedisTokenBucket("test", requests_per_minute=3, tokens_per_minute=10000)
+    assert [bucket.try_acquire(10) for _ in range(3)] == [0, 0, 0]
+    # One request refills every 20s at 3 per minute
+    assert 19 < bucket.try_acquire(10) <= 20
+
+
+def test_redis_bucket_waits_for_tokens(redis_client):
+    bucket = RedisTokenBucket("test", requests_per_minute=100, tokens_per_minute=600)
+    assert bucket.try_acquire(500) == 0
+    # 400 more tokens needed at 10 per second
+    assert 39 < bucket.try_acquire(500) <= 40
+
+
+def test_redis_bucket_caps_cost_at_capacity(redis_client):
+    bucket = RedisTokenBucket("test", requests_per_minute=100, tokens_per_minute=600)
+    assert bucket.try_acquire(10000) == 0
+
+
+def test_redis_bucket_is_shared_between_instances(redis_client):
+    first = RedisTokenBucket("test", requests_per_minute=1, tokens_per_minute=1000)
+    second = RedisTokenBucket("test", requests_per_minute=1, tokens_per_minute=1000)
+    assert first.try_acquire(1) == 0
+    assert second.try_acquire(1) > 0
+    assert RedisTokenBucket("other", requests_per_minute=1, tokens_per_minute=1000).try_acquire(1) == 0
+
+
+def test_redis_bucket_block_and_debit(redis_client):
+    bucket = RedisTokenBucket("test", requests_per_minute=100, tokens_per_minute=600)
+    bucket.block(5)
+    assert 4 < bucket.try_acquire(1) <= 5
+
+    other = RedisTokenBucket("debit", requests_per_minute=100, tokens_per_minute=600)
+    assert other.try_acquire(100) == 0
+    other.debit(500)
+    assert other.try_acquire(1) > 0
+
+
+def test_local_bucket_matches_redis_math():
+    bucket = LocalTokenBucket(requests_per_minute=100, tokens_per_minute=600)
+    assert bucket.try_acquire(500) == 0
+    assert bucket.try_acquire(500) == pytest.approx(40, abs=0.1)
+    bucket.block(30)
+    assert bucket.try_acquire(1) == pytest.approx(30, abs=0.1)
+
+
+def test_rate_limiter_falls_back_to_local_bucket(redis_client):
+    limiter = RateLimiter("test", 100, 600)
+
+    def broken(cost):
+        raise ConnectionError("redis down")
+
+    limiter.bucket.try_acquire = broken
+    assert limiter.try_acquire(10) == 0
+    assert limiter.local_bucket.tokens == pytest.approx(590, abs=1)
+
+
+def test_queue_serves_interactive_before_background():
+    limiter = FakeLimiter()
+    queue = RequestQueue(limiter, max_concurrent=1)
+    assert queue.acquire(PRIORITY_BACKGROUND, 1) is not None
+
+    order = []
+
+    def call(priority, tokens):
+        queue.acquire(priority, tokens)
+        order.append(priority)
+        queue.release()
+
+    background = threading.Thread(target=call, args=(PRIORITY_BACKGROUND, 2))
+    background.start()
+    time.sleep(0.05)
+    interactive = threading.Thread(target=call, args=(PRIORITY_INTERACTIVE, 3))
+    interactive.start()
+    time.sleep(0.05)
+    assert queue.get_stats()["queue_depth"] == {"interactive": 1, "background": 1}
+
+    queue.release()
+    background.join(1)
+    interactive.join(1)
+    assert order == [PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND]
+    assert limiter.acquired == [1, 3, 2]
+
+
+def test_queue_asks_the_limiter_without_holding_the_lock():
+    stats = []
+
+    class SlowLimiter:
+        def try_acquire(self, cost):
+            # Other threads can still use the queue during the (Redis) call
+            reader = threading.Thread(target=lambda: stats.append(queue.get_stats()))
+            reader.start()
+            reader.join(1)
+            return 0
+
+    queue = RequestQueue(SlowLimiter(), max_concurrent=1)
+    assert queue.acquire(PRIORITY_INTERACTIVE, 1) is not None
+    assert stats and stats[0]["queue_depth"]["interactive"] == 1
+
+
+def test_queue_times_out_and_leaves_the_line():
+    queue = RequestQueue(FakeLimiter(), max_concurrent=1)
+    queue.acquire(PRIORITY_INTERACTIVE, 1)
+    assert queue.acquire(PRIORITY_INTERACTIVE, 1, timeout=0.05) is None
+    stats = queue.get_stats()
+    assert stats["queue_depth"] == {"interactive": 0, "background": 0}
+    assert stats["active_requests"] == 1
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+
+import retry_policy
+from retry_policy import Deadline, RetryPolicy, parse_retry_after
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [500.0]
+    monkeypatch.setattr(retry_policy.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_deadline_counts_down(clock):
+    deadline = Deadline(10)
+    clock[0] += 4
+    assert deadline.remaining() == pytest.approx(6)
+    assert not deadline.expired()
+    clock[0] += 7
+    assert deadline.remaining() == 0
+    assert deadline.expired()
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("") is None
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after("-3") == 0.0
+    assert parse_retry_after("soon") is None
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 28 <= parse_retry_after(later) <= 30
+
+
+def test_retry_classification():
+    policy = RetryPolicy()
+    assert all(policy.is_retryable_status(code) for code in (408, 429, 500, 502, 503, 504))
+    assert not any(policy.is_retryable_status(code) for code in (400, 401, 404, 422))
+    assert policy.is_retryable_exception(requests.exceptions.ReadTimeout())
+    assert policy.is_retryable_exception(requests.exceptions.ConnectionError())
+    assert not policy.is_retryable_exception(ValueError())
+
+
+def test_timeout_is_capped_by_deadline(clock):
+    policy = RetryPolicy(attempt_timeout=30)
+    deadline = Deadline(45)
+    assert policy.timeout_for(deadline) == 30
+    clock[0] += 35
+    assert policy.timeout_for(deadline) == pytest.approx(10)
+
+
+def test_backoff_is_jittered_and_capped(monkeypatch):
+    policy = RetryPolicy(base_delay=0.5, max_delay=3)
+    monkeypatch.setattr(retry_policy.random, "uniform", lambda low, high: high)
+    assert [policy.backoff(attempt) for attempt in (1, 2, 3, 4, 5)] == [0.5, 1.0, 2.0, 3, 3]
+    assert policy.backoff(1, retry_after=7) == 7
+    monkeypatch.undo()
+    assert all(0 <= policy.backoff(3) <= 2.0 for _ in range(100))
+
+
+def test_should_retry_needs_attempts_and_budget(clock):
+    policy = RetryPolicy(max_attempts=3, min_attempt_timeout=2)
+    deadline = Deadline(10)
+    assert policy.should_retry(1, deadline, delay=1)
+    assert not policy.should_retry(3, deadline, delay=0)
+    clock[0] += 7
+    # 3s left: a 1s backoff leaves exactly the minimum, 1.5s does not
+    assert policy.should_retry(2, deadline, delay=1)
+    assert not policy.should_retry(2, deadline, delay=1.5)
+
+
+def test_new_deadline_uses_default_budget(clock):
+    assert RetryPolicy(default_budget=12).new_deadline().remaining() == 12
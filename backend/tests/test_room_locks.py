@@ -0,0 +1,158 @@
+import threading
+
+import pytest
+from redis.exceptions import LockError
+
+from room_locks import RoomLock, StripedLock
+
+
+class FakeRemote:
+    """Stands in for a redis-py Lock; counts how often the room is locked across workers"""
+
+    def __init__(self, acquire_result=True, acquire_error=None, release_error=None):
+        self.acquire_result = acquire_result
+        self.acquire_error = acquire_error
+        self.release_error = release_error
+        self.acquired = 0
+        self.released = 0
+
+    def acquire(self):
+        if self.acquire_error:
+            raise self.acquire_error
+        self.acquired += 1
+        return self.acquire_result
+
+    def release(self):
+        self.released += 1
+        if self.release_error:
+            raise self.release_error
+
+
+@pytest.fixture
+def stripes():
+    return StripedLock(8)
+
+
+@pytest.fixture
+def held():
+    return threading.local()
+
+
+def room_lock(stripes, held, room_id, remote=None):
+    return RoomLock(room_id, stripes.get(room_id), remote, held)
+
+
+def stripe_is_free(stripe):
+    """Whether another thread could take the stripe right now"""
+    result = []
+
+    def try_stripe():
+        acquired = stripe.acquire(blocking=False)
+        if acquired:
+            stripe.release()
+        result.append(acquired)
+
+    thread = threading.Thread(target=try_stripe)
+    thread.start()
+    thread.join(1)
+    return result == [True]
+
+
+@pytest.mark.parametrize("count, expected", [(8, 8), (1, 1), (0, 1), (-3, 1)])
+def test_stripe_count_is_fixed(count, expected):
+    assert len(StripedLock(count).locks) == expected
+
+
+def test_a_key_always_maps_to_the_same_stripe(stripes):
+    assert stripes.get("room-1") is stripes.get("room-1")
+    assert stripes.get(("room-1", 2)) is stripes.get(("room-1", 2))
+
+
+def test_keys_spread_over_the_stripes(stripes):
+    used = {id(stripes.get(f"room-{number}")) for number in range(200)}
+    assert len(used) == len(stripes.locks)
+    # However many rooms there are
+    assert len(stripes.locks) == 8
+
+
+def test_stripes_are_reentrant(stripes):
+    lock = stripes.get("room-1")
+    with lock:
+        assert lock.acquire(blocking=False)
+        lock.release()
+
+
+def test_local_only_room_lock_is_reentrant(stripes, held):
+    with room_lock(stripes, held, "r1"):
+        with room_lock(stripes, held, "r1"):
+            assert not stripe_is_free(stripes.get("r1"))
+        assert not stripe_is_free(stripes.get("r1"))
+    assert stripe_is_free(stripes.get("r1"))
+
+
+def test_reentering_a_room_takes_the_remote_lock_once(stripes, held):
+    outer, inner = FakeRemote(), FakeRemote()
+    with room_lock(stripes, held, "r1", outer):
+        with room_lock(stripes, held, "r1", inner):
+            pass
+        assert (outer.acquired, outer.released) == (1, 0)
+        assert inner.acquired == 0
+    assert (outer.acquired, outer.released) == (1, 1)
+    assert held.rooms == set()
+
+
+def test_other_rooms_take_their_own_remote_lock(stripes, held):
+    first, second = FakeRemote(), FakeRemote()
+    with room_lock(stripes, held, "r1", first):
+        with room_lock(stripes, held, "r2", second):
+            assert held.rooms == {"r1", "r2"}
+        assert held.rooms == {"r1"}
+    assert (first.acquired, first.released, second.acquired, second.released) == (1, 1, 1, 1)
+
+
+def test_threads_do_not_share_held_rooms(stripes, held):
+    acquired = []
+
+    def other_thread():
+        remote = FakeRemote()
+        with room_lock(stripes, held, "r1", remote):
+            acquired.append(remote.acquired)
+
+    with room_lock(stripes, held, "r1", FakeRemote()):
+        thread = threading.Thread(target=other_thread)
+        thread.start()
+        thread.join(0.1)
+        # Waits on the stripe while this thread holds the room
+        assert thread.is_alive()
+    thread.join(1)
+    assert acquired == [1]
+
+
+@pytest.mark.parametrize("remote, error", [
+    (FakeRemote(acquire_result=False), LockError),
+    (FakeRemote(acquire_error=ConnectionError("down")), ConnectionError),
+])
+def test_failed_remote_lock_releases_the_stripe(stripes, held, remote, error):
+    with pytest.raises(error):
+        with room_lock(stripes, held, "r1", remote):
+            pass
+    assert stripe_is_free(stripes.get("r1"))
+    assert getattr(held, "rooms", set()) == set()
+
+
+def test_expired_remote_lock_is_ignored_on_release(stripes, held):
+    remote = FakeRemote(release_error=LockError("expired"))
+    with room_lock(stripes, held, "r1", remote):
+        pass
+    assert remote.released == 1
+    assert stripe_is_free(stripes.get("r1"))
+    assert held.rooms == set()
+
+
+def test_errors_inside_the_block_still_release_everything(stripes, held):
+    remote = FakeRemote()
+    with pytest.raises(ValueError):
+        with room_lock(stripes, held, "r1", remote):
+            raise ValueError("boom")
+    assert remote.released == 1
+    assert stripe_is_free(stripes.get("r1"))
@@ -0,0 +1,86 @@
+import threading
+import time
+
+from scheduler import DeadlineScheduler
+
+
+def start_thread(target, *args):
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def collector():
+    fired = []
+    done = threading.Event()
+
+    def callback(name):
+        fired.append(name)
+        done.set()
+
+    return fired, done, callback
+
+
+def test_fires_in_deadline_order():
+    scheduler = DeadlineScheduler(start_thread)
+    fired, _, callback = collector()
+    scheduler.schedule("late", 0.2, callback, "late")
+    scheduler.schedule("early", 0.05, callback, "early")
+    time.sleep(0.35)
+    assert fired == ["early", "late"]
+    assert scheduler.get_stats() == {"scheduled": 0, "heap_size": 0, "fired": 2}
+
+
+def test_earlier_deadline_wakes_the_loop():
+    scheduler = DeadlineScheduler(start_thread)
+    fired, done, callback = collector()
+    scheduler.schedule("far", 60, callback, "far")
+    time.sleep(0.05)
+    started = time.monotonic()
+    scheduler.schedule("near", 0.05, callback, "near")
+    assert done.wait(1)
+    assert fired == ["near"]
+    assert time.monotonic() - started < 0.5
+
+
+def test_rescheduling_replaces_the_deadline():
+    scheduler = DeadlineScheduler(start_thread)
+    fired, _, callback = collector()
+    scheduler.schedule("round", 0.05, callback, "first")
+    scheduler.schedule("round", 0.1, callback, "second")
+    time.sleep(0.25)
+    assert fired == ["second"]
+
+
+def test_cancel_and_remaining():
+    scheduler = DeadlineScheduler(start_thread)
+    fired, _, callback = collector()
+    scheduler.schedule("round", 0.05, callback, "round")
+    assert 0 < scheduler.remaining("round") <= 0.05
+    assert scheduler.cancel("round")
+    assert not scheduler.cancel("round")
+    assert scheduler.remaining("round") is None
+    time.sleep(0.15)
+    assert fired == []
+
+
+def test_failing_callback_does_not_stop_the_loop():
+    scheduler = DeadlineScheduler(start_thread)
+    fired, done, callback = collector()
+    scheduler.schedule("bad", 0, lambda: 1 / 0)
+    scheduler.schedule("good", 0.05, callback, "good")
+    assert done.wait(1)
+    assert fired == ["good"]
+
+
+def test_loop_is_started_once_through_the_given_function():
+    started = []
+
+    def start(target, *args):
+        started.append(target)
+        return start_thread(target, *args)
+
+    scheduler = DeadlineScheduler(start)
+    for index in range(5):
+        scheduler.schedule(index, 10, print)
+    assert len(started) == 1
@@ -0,0 +1,173 @@
+import json
+
+import pytest
+
+import scoring_calibration
+from scoring import (
+    SCORE_FIELDS, SCORING_MODE_HEURISTIC, SCORING_MODE_LLM, TIMEOUT_DECISION, HeuristicScorer,
+    normalize_scoring_mode
+)
+
+RESPONSES = [
+    ("", "Scientist", (), ()),
+    ("ok", "Leader", (), ()),
+    ("We coordinate together and help evacuate everyone", "Leader", ("bob",), ()),
+    ("I measure the data and test the water", "Scientist", (), ("We test the water",)),
+    ("help " * 200, "Helper", (), ()),
+    ("Together our team will plan, share and coordinate with bob and carol to support "
+     "and protect everyone, rescue the injured and restore power", "Organizer", ("bob", "carol"), ()),
+]
+
+
+def score(scorer, response, role="Player", teammates=(), others=()):
+    return scorer.score("climate_change", response, role, 1, teammates=teammates, other_responses=others)
+
+
+@pytest.mark.parametrize("response, role, teammates, others", RESPONSES)
+def test_scores_stay_in_range(response, role, teammates, others):
+    result = score(HeuristicScorer(), response, role, teammates, others)
+    for field in SCORE_FIELDS:
+        assert isinstance(result[field], int)
+        assert 0 <= result[field] <= 25
+    assert result["total_individual_score"] == sum(result[field] for field in SCORE_FIELDS)
+    assert result["scoring_mode"] == SCORING_MODE_HEURISTIC
+
+
+@pytest.mark.parametrize("response", ["", "   ", "!!!", TIMEOUT_DECISION])
+def test_empty_and_timed_out_decisions_score_zero(response):
+    assert score(HeuristicScorer(), response)["total_individual_score"] == 0
+
+
+@pytest.mark.parametrize("field, role, teammates, others, plain, better", [
+    ("helping_nature_score", "Player", (), (), "We wait here", "We help and protect and rescue them"),
+    ("team_strategy_score", "Player", (), (), "I wait here", "We coordinate together as a team"),
+    ("team_strategy_score", "Player", ("bob",), (), "I wait for news", "I wait for bob"),
+    ("role_appropriateness_score", "Scientist", (), (), "I wait here", "I measure and analyze the data"),
+    ("creativity_score", "Player", (), ("We seal the hull",), "We seal the hull",
+     "Reroute the reactor coolant through the greenhouse"),
+])
+def test_criteria_reward_their_features(field, role, teammates, others, plain, better):
+    scorer = HeuristicScorer()
+    plain_score = scorer.raw_scores("space", plain, role, teammates, others)[field]
+    better_score = scorer.raw_scores("space", better, role, teammates, others)[field]
+    assert better_score > plain_score
+
+
+@pytest.mark.parametrize("params, expected", [
+    ({"scale": 1.0, "offset": 0.0}, None),
+    ({"scale": 10.0}, 25),
+    ({"offset": -100.0}, 0),
+    ({"scale": 0.0, "offset": 12.0}, 12),
+])
+def test_calibration_is_applied_and_clamped(params, expected):
+    response = "We coordinate together and help evacuate everyone"
+    plain = score(HeuristicScorer(), response)
+    calibrated = score(HeuristicScorer({"creativity_score": params}), response)
+    assert calibrated["creativity_score"] == (plain["creativity_score"] if expected is None else expected)
+    assert calibrated["helping_nature_score"] == plain["helping_nature_score"]
+
+
+@pytest.mark.parametrize("content", [None, "not json"])
+def test_unreadable_calibration_files_are_ignored(tmp_path, content):
+    path = tmp_path / "calibration.json"
+    if content is not None:
+        path.write_text(content)
+    assert HeuristicScorer.from_calibration_file(str(path)).calibration == {}
+
+
+def test_calibration_file_is_loaded(tmp_path):
+    path = tmp_path / "calibration.json"
+    path.write_text(json.dumps({"creativity_score": {"scale": 2.0}}))
+    assert HeuristicScorer.from_calibration_file(str(path)).calibration == {"creativity_score": {"scale": 2.0}}
+
+
+@pytest.mark.parametrize("mode, expected", [
+    ("llm", SCORING_MODE_LLM),
+    ("HEURISTIC", SCORING_MODE_HEURISTIC),
+    ("", SCORING_MODE_LLM),
+    (None, SCORING_MODE_LLM),
+    ("magic", SCORING_MODE_LLM),
+])
+def test_normalize_scoring_mode(mode, expected):
+    assert normalize_scoring_mode(mode) == expected
+
+
+def test_normalize_scoring_mode_default():
+    assert normalize_scoring_mode("magic", SCORING_MODE_HEURISTIC) == SCORING_MODE_HEURISTIC
+
+
+# scoring_calibration
+
+@pytest.mark.parametrize("xs, ys, expected", [
+    ([1, 2, 3], [3, 5, 7], {"scale": 2.0, "offset": 1.0}),
+    ([0, 10], [5, 0], {"scale": -0.5, "offset": 5.0}),
+    ([4, 4, 4], [6, 7, 8], {"scale": 1.0, "offset": 3.0}),
+])
+def test_fit_linear(xs, ys, expected):
+    assert scoring_calibration.fit_linear(xs, ys) == expected
+
+
+@pytest.mark.parametrize("xs, ys, expected", [
+    ([1, 2, 3], [2, 4, 6], 1.0),
+    ([1, 2, 3], [6, 4, 2], -1.0),
+    ([1, 1, 1], [1, 2, 3], 0.0),
+    ([1], [1], 0.0),
+])
+def test_pearson(xs, ys, expected):
+    assert scoring_calibration.pearson(xs, ys) == pytest.approx(expected)
+
+
+def make_records(transform):
+    """Records whose LLM scores are `transform` of the raw heuristic scores"""
+    scorer = HeuristicScorer()
+    records = []
+    for response, role, teammates, others in RESPONSES[1:]:
+        record = {
+            "theme": "climate_change", "role": role, "player_response": response,
+            "teammates": list(teammates), "other_responses": list(others)
+        }
+        raw = scoring_calibration.score_record(scorer, record, raw=True)
+        record["llm_scores"] = {field: transform(raw[field]) for field in SCORE_FIELDS}
+        records.append(record)
+    return records
+
+
+def test_calibrate_recovers_a_linear_relation():
+    calibration = scoring_calibration.calibrate(make_records(lambda raw: 0.5 * raw + 2))
+    for field in SCORE_FIELDS:
+        assert calibration[field]["scale"] == pytest.approx(0.5, abs=1e-3)
+        assert calibration[field]["offset"] == pytest.approx(2, abs=1e-2)
+
+
+def test_compare_reports_error_of_the_fitted_scorer():
+    records = make_records(lambda raw: 0.5 * raw + 2)
+    fitted = HeuristicScorer(scoring_calibration.calibrate(records))
+    report = scoring_calibration.compare(fitted, records)
+    assert set(report) == set(SCORE_FIELDS) | {"total_individual_score"}
+    for field in SCORE_FIELDS:
+        # Only rounding to whole points is left
+        assert report[field]["mae"] <= 0.5
+
+
+def test_load_records_skips_unusable_lines(tmp_path):
+    path = tmp_path / "records.jsonl"
+    good = {"player_response": "Help", "llm_scores": {"creativity_score": 10}}
+    path.write_text("\n".join([json.dumps(good), "", "not json", json.dumps({"player_response": "x"})]))
+    assert scoring_calibration.load_records(str(path)) == [good]
+
+
+def test_main_writes_the_fitted_calibration(tmp_path, capsys):
+    records_path = tmp_path / "records.jsonl"
+    records_path.write_text("\n".join(json.dumps(record) for record in make_records(lambda raw: raw)))
+    output = tmp_path / "calibration.json"
+    assert scoring_calibration.main([str(records_path), "--write", str(output), "--repeat", "1"]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["records"] == len(RESPONSES) - 1
+    assert report["benchmark"]["calls"] == len(RESPONSES) - 1
+    assert json.loads(output.read_text()) == report["fitted_calibration"]
+
+
+def test_main_without_records(tmp_path):
+    path = tmp_path / "records.jsonl"
+    path.write_text("")
+    assert scoring_calibration.main([str(path)]) == 1
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from session_model import GameSession, RoundRecord, decode_session, encode_session
+
+ROLES = {
+    "engineer": {"role_name": "Engineer", "description": "Keeps the station running"},
+    "medic": {"role_name": "Medic", "description": "Keeps the crew alive"}
+}
+
+
+def new_session():
+    session = GameSession(
+        "r1", "space", ["alice", "bob"], roles=ROLES,
+        player_roles={"alice": dict(ROLES["engineer"]), "bob": dict(ROLES["medic"])},
+        scenario="A leak in the hull", started_at=1000.0, scoring_mode="heuristic"
+    )
+    session["player_decisions"] = {"alice": "Seal the breach", "bob": "Evacuate"}
+    session.add_round(
+        {
+            "alice": {"creativity_score": 8, "helping_nature_score": 7.5, "total_individual_score": 30.25,
+                      "feedback": "Quick thinking"},
+            "bob": {"error": "scoring failed"}
+        },
+        {"new_crisis_score": 60, "score_change": 10},
+        {"story_continuation": "The hull holds", "next_decision_point": "Now what?"}
+    )
+    session["player_decisions"] = {"alice": "Vent the bay"}
+    session["current_round"] = 2
+    session["version"] = 7
+    session["round_start_time"] = 1234.5
+    return session
+
+
+def test_round_trip():
+    session = new_session()
+    restored = decode_session(encode_session(session))
+    assert restored.to_dict() == session.to_dict()
+    assert restored["version"] == 7
+    assert restored["player_roles"]["bob"] is restored["roles"]["medic"]
+
+
+def test_round_scores_and_totals():
+    session = new_session()
+    assert session["player_total_scores"] == {"alice": 30.25, "bob": 0}
+    (alice_round,) = session["player_round_scores"]["alice"]
+    assert alice_round == {
+        "creativity": 8, "helping_nature": 7.5, "team_strategy": 0, "role_appropriateness": 0,
+        "total_round_score": 30.25, "round": 1
+    }
+    entry = session["game_history"][0]
+    assert entry["decisions"] == {"alice": "Seal the breach", "bob": "Evacuate"}
+    assert entry["crisis_update"] == {"new_crisis_score": 60, "score_change": 10}
+
+
+def test_failed_scores_are_left_out_of_player_round_scores():
+    session = new_session()
+    # bob's scoring failed: zero in the round, but no entry of his own
+    assert session["player_round_scores"]["bob"] == []
+    assert session["game_history"][0]["round_scores"]["bob"]["total_round_score"] == 0
+
+
+def test_history_keeps_individual_scores():
+    entry = new_session()["game_history"][0]
+    assert entry["individual_scores"] == {
+        "alice": {
+            "creativity_score": 8, "helping_nature_score": 7.5, "team_strategy_score": 0,
+            "role_appropriateness_score": 0, "total_individual_score": 30.25, "feedback": "Quick thinking"
+        }
+    }
+    assert entry.to_dict()["individual_scores"] == entry["individual_scores"]
+
+
+def test_loads_old_session_dicts():
+    session = new_session()
+    old = session.to_dict()
+    # Older sessions carried their own event list; it is dropped on load
+    old["events"] = [{"version": 7, "type": "decision_submitted", "data": {}}]
+    restored = GameSession.load(json.loads(json.dumps(old)))
+    assert restored.to_dict() == session.to_dict()
+    assert "events" not in restored
+    assert encode_session(old) == encode_session(session)
+
+
+def test_loads_compact_sessions_with_extra_optional_fields():
+    data = new_session().to_compact()
+    data[-1] = data[-1] + [[{"version": 7}]]
+    assert GameSession.load(data).to_dict() == new_session().to_dict()
+
+
+def test_dict_access():
+    session = new_session()
+    assert "story_summary" not in session
+    assert session.get("story_summary", "") == ""
+    assert session.setdefault("story_summary", "So far") == "So far"
+    assert "player_total_scores" in session
+    session.update({"crisis_score": 40, "player_total_scores": {"ignored": 1}})
+    assert session["crisis_score"] == 40
+    with pytest.raises(KeyError):
+        session["unknown"] = 1
+
+
+def test_round_record_loads_old_history_entries():
+    record = new_session()["game_history"][0]
+    loaded = RoundRecord.load(record.to_dict(), record.players)
+    assert loaded.to_dict() == record.to_dict()
+    assert RoundRecord.load(record.to_compact(), record.players).to_dict() == record.to_dict()
+
+
+def test_round_record_loads_records_without_feedback():
+    record = new_session()["game_history"][0]
+    loaded = RoundRecord.load(record.to_compact()[:7], record.players)
+    assert loaded.scored(1)
+    assert set(loaded.individual_scores()) == {"alice", "bob"}
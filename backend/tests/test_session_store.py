@@ -0,0 +1,116 @@
+import pytest
+
+from session_model import GameSession
+from session_store import SessionStore
+
+
+def new_session(room_id="r1"):
+    return GameSession(room_id, "space", ["alice", "bob"], scenario="A leak in the hull")
+
+
+@pytest.fixture
+def stores(redis_client):
+    """Two workers sharing one Redis"""
+    return SessionStore(ttl=60), SessionStore(ttl=60)
+
+
+def test_round_trip_between_workers(stores):
+    first, second = stores
+    first["r1"] = new_session()
+    session = second.get("r1")
+    assert session["scenario"] == "A leak in the hull"
+    assert session["players"] == ("alice", "bob")
+    assert "r1" in second
+    assert second.room_ids() == ["r1"]
+
+
+def test_save_checks_the_version_it_read(stores, redis_client):
+    first, second = stores
+    first["r1"] = new_session()
+    mine, theirs = first.get("r1"), second.get("r1")
+
+    theirs["player_decisions"]["bob"] = "Evacuate"
+    assert second.save(theirs)
+    mine["player_decisions"]["alice"] = "Seal"
+    assert not first.save(mine)
+    # The stale copy is dropped, so the next read sees the other worker's write
+    assert first.get("r1")["player_decisions"] == {"bob": "Evacuate"}
+    assert redis_client.hget("game_session:r1", "version") == "2"
+
+
+def test_overwrite_ignores_the_version(stores):
+    first, second = stores
+    first["r1"] = new_session()
+    second.get("r1")
+    first.save(first.get("r1"))
+    assert second.save(new_session(), overwrite=True)
+
+
+def test_cached_copy_is_reused_until_changed(stores):
+    first, second = stores
+    first["r1"] = new_session()
+    cached = second.get("r1")
+    assert second.get("r1") is cached
+    session = first.get("r1")
+    session["crisis_score"] = 70
+    first.save(session)
+    assert second.get("r1") is not cached
+    assert second.get("r1")["crisis_score"] == 70
+
+
+def test_payload_and_version_are_read_together(stores, monkeypatch):
+    first, second = stores
+    first["r1"] = new_session()
+    hget = first.redis_client.hget
+
+    def hget_then_write(key, field):
+        # Another worker saves between the version check and the payload read
+        value = hget(key, field)
+        session = second.get("r1")
+        session["crisis_score"] = 70
+        second.save(session)
+        return value
+
+    monkeypatch.setattr(first.redis_client, "hget", hget_then_write)
+    first.versions.clear()
+    session = first.get("r1")
+    assert session["crisis_score"] == 70
+    assert first.versions["r1"] == 2
+    monkeypatch.undo()
+    # The cached version matches the payload, so a save on top of it succeeds
+    session["crisis_score"] = 75
+    assert first.save(session)
+
+
+def test_saves_set_the_ttl(stores, redis_client):
+    first, _ = stores
+    first["r1"] = new_session()
+    assert 0 < redis_client.ttl("game_session:r1") <= 60
+
+
+def test_delete(stores):
+    first, second = stores
+    first["r1"] = new_session()
+    second.get("r1")
+    del first["r1"]
+    assert second.get("r1") is None
+    assert "r1" not in first
+
+
+def test_memory_backend_keeps_sessions_in_process(redis_client):
+    store = SessionStore(backend="memory")
+    session = new_session()
+    store["r1"] = session
+    assert store.get("r1") is session
+    assert store.room_ids() == ["r1"]
+    assert redis_client.keys("*") == []
+
+
+def test_room_lock_is_reentrant(stores, redis_client):
+    first, _ = stores
+    with first.lock("r1"):
+        assert redis_client.exists("game_lock:r1")
+        with first.lock("r1"):
+            pass
+        assert redis_client.exists("game_lock:r1")
+    assert not redis_client.exists("game_lock:r1")
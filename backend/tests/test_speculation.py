@@ -0,0 +1,97 @@
+from concurrent.futures import Future
+
+import pytest
+
+from scoring import TIMEOUT_DECISION
+from speculation import RoundSpeculator
+
+PLAYERS = ("alice", "bob", "carol")
+
+
+class ManualExecutor:
+    """Keeps submitted work pending until `run()`, so drafts can be cancelled"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.submitted.append((future, fn, args))
+        return future
+
+    def run(self):
+        for future, fn, args in self.submitted:
+            if future.set_running_or_notify_cancel():
+                future.set_result(fn(*args))
+
+
+@pytest.fixture
+def executor():
+    return ManualExecutor()
+
+
+@pytest.fixture
+def speculator(executor):
+    return RoundSpeculator(executor)
+
+
+def speculate(speculator, decisions, round_number=1):
+    speculator.speculate(
+        "r1", round_number, decisions, PLAYERS,
+        lambda assumed: ("crisis", dict(assumed)),
+        lambda assumed: ("story", dict(assumed))
+    )
+
+
+def test_draft_assumes_missing_players_time_out(speculator, executor):
+    speculate(speculator, {"alice": "Seal", "bob": "Evacuate"})
+    executor.run()
+    crisis, story = speculator.take("r1", 1, {"alice": "Seal", "bob": "Evacuate", "carol": TIMEOUT_DECISION})
+    assert crisis.result() == ("crisis", {"alice": "Seal", "bob": "Evacuate", "carol": TIMEOUT_DECISION})
+    assert story.result()[0] == "story"
+    assert speculator.get_stats() == {"started": 1, "hit": 1, "miss": 0, "pending": 0, "hit_rate": 1.0}
+
+
+def test_draft_is_reused_for_the_same_decisions_differently_spaced(speculator, executor):
+    speculate(speculator, {"alice": "Seal the hull", "bob": "Evacuate"})
+    final = {"alice": "  seal THE   hull ", "bob": "evacuate", "carol": TIMEOUT_DECISION}
+    assert speculator.take("r1", 1, final) is not None
+
+
+def test_late_decision_invalidates_the_draft(speculator, executor):
+    speculate(speculator, {"alice": "Seal", "bob": "Evacuate"})
+    (crisis, _, _), (story, _, _) = executor.submitted
+    assert speculator.take("r1", 1, {"alice": "Seal", "bob": "Evacuate", "carol": "Vent"}) is None
+    # The pending drafts are cancelled rather than left running
+    assert crisis.cancelled() and story.cancelled()
+    stats = speculator.get_stats()
+    assert (stats["miss"], stats["pending"], stats["hit_rate"]) == (1, 0, 0.0)
+
+
+def test_draft_of_another_round_is_not_reused(speculator):
+    speculate(speculator, {"alice": "Seal", "bob": "Evacuate"}, round_number=1)
+    assert speculator.take("r1", 2, {"alice": "Seal", "bob": "Evacuate", "carol": TIMEOUT_DECISION}) is None
+
+
+def test_speculating_again_with_the_same_decisions_keeps_the_draft(speculator, executor):
+    speculate(speculator, {"alice": "Seal", "bob": "Evacuate"})
+    speculate(speculator, {"alice": "Seal", "bob": "Evacuate"})
+    assert len(executor.submitted) == 2
+    assert speculator.get_stats()["started"] == 1
+
+
+def test_changed_decisions_replace_the_draft(speculator, executor):
+    speculate(speculator, {"alice": "Seal", "bob": "Evacuate"})
+    first = [future for future, _, _ in executor.submitted]
+    speculate(speculator, {"alice": "Seal", "bob": "Vent"})
+    assert all(future.cancelled() for future in first)
+    assert speculator.take("r1", 1, {"alice": "Seal", "bob": "Vent", "carol": TIMEOUT_DECISION}) is not None
+
+
+def test_discard(speculator, executor):
+    speculate(speculator, {"alice": "Seal", "bob": "Evacuate"})
+    speculator.discard("r1")
+    speculator.discard("r1")
+    assert all(future.cancelled() for future, _, _ in executor.submitted)
+    assert speculator.take("r1", 1, {"alice": "Seal", "bob": "Evacuate", "carol": TIMEOUT_DECISION}) is None
+    assert speculator.get_stats()["pending"] == 0
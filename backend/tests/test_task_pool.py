@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+
+from task_pool import RoomTaskPool, check_async_mode
+
+
+class ManualStarter:
+    """start_background_task that queues room workers until the test runs them"""
+
+    def __init__(self):
+        self.started = []
+
+    def __call__(self, target, *args):
+        self.started.append((target, args))
+
+    def run_next(self):
+        target, args = self.started.pop(0)
+        target(*args)
+
+
+def record(log):
+    def task(token, name):
+        log.append(name)
+    return task
+
+
+def test_room_tasks_run_in_order_on_one_worker():
+    starter = ManualStarter()
+    pool = RoomTaskPool(starter, max_concurrent=2)
+    log = []
+    for name in ("a1", "a2", "a3"):
+        pool.submit("a", record(log), name)
+    assert len(starter.started) == 1
+    assert pool.is_busy("a")
+    starter.run_next()
+    assert log == ["a1", "a2", "a3"]
+    assert not pool.is_busy("a")
+    assert pool.get_stats()["completed"] == 3
+
+
+def test_rooms_over_the_limit_wait_their_turn():
+    starter = ManualStarter()
+    pool = RoomTaskPool(starter, max_concurrent=1)
+    log = []
+    pool.submit("a", record(log), "a1")
+    pool.submit("b", record(log), "b1")
+    pool.submit("c", record(log), "c1")
+    assert len(starter.started) == 1
+    assert pool.get_stats()["waiting_rooms"] == 2
+
+    starter.run_next()
+    # Finishing a room hands the slot to the next waiting room, in arrival order
+    assert log == ["a1"]
+    starter.run_next()
+    starter.run_next()
+    assert log == ["a1", "b1", "c1"]
+    assert starter.started == []
+
+
+def test_cancel_drops_queued_tasks_and_signals_the_running_one():
+    starter = ManualStarter()
+    pool = RoomTaskPool(starter, max_concurrent=1)
+    log = []
+    tokens = []
+
+    def running(token, name):
+        tokens.append(token)
+        pool.cancel("a")
+        log.append((name, token.cancelled))
+
+    pool.submit("a", running, "a1")
+    pool.submit("a", record(log), "a2")
+    starter.run_next()
+    assert log == [("a1", True)]
+    assert pool.get_stats()["cancelled"] == 1
+
+    # A new task after the cancel gets a fresh token
+    pool.submit("a", record(log), "a3")
+    starter.run_next()
+    assert log[-1] == "a3"
+
+
+def test_failing_task_does_not_stop_the_room():
+    starter = ManualStarter()
+    pool = RoomTaskPool(starter)
+    log = []
+    pool.submit("a", lambda token: 1 / 0)
+    pool.submit("a", record(log), "a2")
+    starter.run_next()
+    assert log == ["a2"]
+    stats = pool.get_stats()
+    assert (stats["failed"], stats["completed"]) == (1, 1)
+
+
+def test_room_is_never_run_twice_at_once():
+    def start_thread(target, *args):
+        threading.Thread(target=target, args=args, daemon=True).start()
+
+    pool = RoomTaskPool(start_thread, max_concurrent=4)
+    active = []
+    overlaps = []
+    done = threading.Event()
+
+    def task(token, index):
+        active.append(index)
+        if len(active) > 1:
+            overlaps.append(index)
+        time.sleep(0.001)
+        active.remove(index)
+        if index == 49:
+            done.set()
+
+    for index in range(50):
+        pool.submit("a", task, index)
+    assert done.wait(5)
+    assert overlaps == []
+
+
+def test_check_async_mode():
+    check_async_mode("threading")
+    with pytest.raises(RuntimeError):
+        check_async_mode("eventlet")
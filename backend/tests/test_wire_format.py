@@ -0,0 +1,88 @@
+import json
+
+import msgpack
+import pytest
+
+from wire_format import client_encoding, encode_payload, encoding_room
+
+ROUND_COMPLETED = {
+    "round": 1,
+    "individual_scores": {
+        "alice": {
+            "creativity_score": 20, "helping_nature_score": 15, "team_strategy_score": 10,
+            "role_appropriateness_score": 5, "total_individual_score": 50, "feedback": "Bold move"
+        },
+        "bob": {"creativity_score": 5, "total_individual_score": 5, "fallback": True}
+    },
+    "round_scores": {"alice": {"total_round_score": 50, "round": 1}, "bob": {"total_round_score": 5, "round": 1}},
+    "player_total_scores": {"alice": 50, "bob": 5},
+    "crisis_score": 61.5,
+    "story_continuation": "The hull holds – for now 🚀"
+}
+
+GAME_ENDED = {
+    "player_rankings": [{"username": "alice", "total_score": 50, "rank": 1}],
+    "player_scores": {"alice": {"total_score": 50, "rank": 1}},
+    "winner": "alice",
+    "show_winner_popup": True
+}
+
+
+def decode(payload):
+    return msgpack.unpackb(payload, raw=False)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("msgpack", "msgpack"),
+    ("json", "json"),
+    (None, "json"),
+    ("", "json"),
+    ("MSGPACK", "json"),
+    ("protobuf", "json"),
+])
+def test_clients_that_do_not_negotiate_msgpack_get_json(value, expected):
+    assert client_encoding(value) == expected
+
+
+def test_encoding_room():
+    assert encoding_room("r1", "msgpack") == "r1:msgpack"
+    assert encoding_room("r1", "json") != encoding_room("r1", "msgpack")
+
+
+@pytest.mark.parametrize("event, data", [
+    ("decision_timer_started", {"time_limit": 120, "message": "You have 2 minutes"}),
+    ("game_state", {"version": 7, "players": ["alice", "bob"], "time_remaining": None, "crisis_score": 61.5}),
+    ("notification", {"message": "Ünïcödé ✅"}),
+    ("empty", {}),
+])
+def test_msgpack_round_trip(event, data):
+    payload = encode_payload(event, data)
+    assert isinstance(payload, bytes)
+    assert decode(payload) == data
+    # The same payload a JSON client gets
+    assert decode(payload) == json.loads(json.dumps(data))
+
+
+def test_round_completed_keeps_only_score_feedback():
+    decoded = decode(encode_payload("round_completed", ROUND_COMPLETED))
+    assert decoded["individual_scores"] == {"alice": {"feedback": "Bold move"}, "bob": {"fallback": True}}
+    # Everything else arrives unchanged; the numbers are still in round_scores
+    assert {key: value for key, value in decoded.items() if key != "individual_scores"} == \
+        {key: value for key, value in ROUND_COMPLETED.items() if key != "individual_scores"}
+
+
+def test_game_ended_drops_the_repeated_player_scores():
+    decoded = decode(encode_payload("game_ended", GAME_ENDED))
+    assert "player_scores" not in decoded
+    assert decoded["player_rankings"] == GAME_ENDED["player_rankings"]
+
+
+@pytest.mark.parametrize("event, data", [("round_completed", ROUND_COMPLETED), ("game_ended", GAME_ENDED)])
+def test_compacting_leaves_the_json_payload_alone(event, data):
+    before = json.dumps(data, sort_keys=True)
+    encode_payload(event, data)
+    assert json.dumps(data, sort_keys=True) == before
+
+
+def test_msgpack_is_smaller_than_json_for_round_results():
+    assert len(encode_payload("round_completed", ROUND_COMPLETED)) < len(json.dumps(ROUND_COMPLETED))
@@ -0,0 +1,49 @@
+import msgpack
+
+from scoring import SCORE_FIELDS
+
+ENCODINGS = ("json", "msgpack")
+
+
+def client_encoding(value):
+    """Payload encoding a client asked for, defaulting to plain JSON"""
+    return value if value in ENCODINGS else "json"
+
+
+def encoding_room(room_id, encoding):
+    """Socket.IO room of the clients in `room_id` that use `encoding`"""
+    return f"{room_id}:{encoding}"
+
+
+def compact_round_completed(data):
+    # round_scores already carries the numeric scores, keep only the feedback
+    compact = dict(data)
+    compact["individual_scores"] = {
+        username: {
+            key: value for key, value in result.items()
+            if key not in SCORE_FIELDS and key != "total_individual_score"
+        }
+        for username, result in data.get("individual_scores", {}).items()
+    }
+    return compact
+
+
+def compact_game_ended(data):
+    # player_scores repeats totals, ranks and round_scores from player_rankings
+    compact = dict(data)
+    compact.pop("player_scores", None)
+    return compact
+
+
+COMPACT_EVENTS = {
+    "round_completed": compact_round_completed,
+    "game_ended": compact_game_ended,
+}
+
+
+def encode_payload(event, data):
+    """MessagePack-encode an event payload, dropping fields the client can rebuild"""
+    compact = COMPACT_EVENTS.get(event)
+    if compact:
+        data = compact(data)
+    return msgpack.packb(data, use_bin_type=True)
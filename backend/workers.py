@@ -0,0 +1,93 @@
+"""Run several Socket.IO server processes on one host.
+
+Workers listen on consecutive ports starting at --port and share room
+broadcasts through SOCKETIO_MESSAGE_QUEUE. Put them (and other hosts' workers)
+behind a load balancer with sticky sessions, e.g. nginx `ip_hash`, since the
+long-polling transport needs every request of a client to reach one worker.
+
+    SOCKETIO_MESSAGE_QUEUE=redis python workers.py --workers 4 --port 5001
+
+Each worker serves with eventlet's WSGI server, not the Werkzeug dev server.
+"""
+# Workers are forked from this process, so patch before anything else is imported (see app.py)
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import logging
+import multiprocessing
+import signal
+import time
+
+from config import Config
+from message_queue import get_message_queue
+
+logger = logging.getLogger("odyssey.workers")
+
+
+def serve(host, port):
+    # Forked workers inherit the launcher's handlers; let SIGTERM stop them again
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    from app import app, socket
+    socket.run(app, host=host, port=port, debug=False, use_reloader=False)
+
+
+class WorkerLauncher:
+    """Starts the worker processes and restarts any that exit unexpectedly"""
+
+    def __init__(self, workers, host, port, restart_delay=1.0):
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.restart_delay = restart_delay
+        self.processes = {}
+        self.stopping = False
+
+    def start_worker(self, index):
+        port = self.port + index
+        process = multiprocessing.Process(target=serve, args=(self.host, port), name=f"worker-{index}")
+        process.start()
+        self.processes[index] = process
+        logger.info("Worker %s listening on %s:%s (pid %s)", index, self.host, port, process.pid)
+
+    def stop(self, *_):
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for index in range(self.workers):
+            self.start_worker(index)
+
+        while not self.stopping:
+            time.sleep(self.restart_delay)
+            for index, process in list(self.processes.items()):
+                if not process.is_alive() and not self.stopping:
+                    logger.warning("Worker %s exited with %s, restarting", index, process.exitcode)
+                    self.start_worker(index)
+
+        for process in self.processes.values():
+            process.terminate()
+        for process in self.processes.values():
+            process.join(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=Config.WORKERS)
+    parser.add_argument("--host", default=Config.HOST)
+    parser.add_argument("--port", type=int, default=Config.PORT, help="port of the first worker")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=Config.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    if args.workers > 1 and not get_message_queue():
+        parser.error("SOCKETIO_MESSAGE_QUEUE is required to run more than one worker")
+    if args.workers > 1 and Config.GAME_STATE_BACKEND != "redis":
+        parser.error("GAME_STATE_BACKEND must be 'redis' to run more than one worker")
+
+    WorkerLauncher(args.workers, args.host, args.port).run()
+
+
+if __name__ == "__main__":
+    main()